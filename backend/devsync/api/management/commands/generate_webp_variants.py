@@ -0,0 +1,17 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from api.tasks import generate_webp_variants
+from config.utils.fields import WEBPField
+
+
+class Command(BaseCommand):
+    help = "Schedule generation of missing variants of images converted before their fields got variant sizes."
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, WEBPField) and field.variant_sizes:
+                    opts = model._meta
+                    generate_webp_variants.delay(opts.app_label, opts.model_name, field.attname)
+                    self.stdout.write(f"Scheduled variants generation for {opts.label}.{field.name}.")
@@ -1,4 +1,4 @@
-from prometheus_client import Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 
 online_users = Gauge(
@@ -7,4 +7,35 @@ online_users = Gauge(
     ['app']
 )
 
-online_users.labels(app='devsync').set(0)
\ No newline at end of file
+online_users.labels(app='devsync').set(0)
+
+notification_outbox_lag = Histogram(
+    'notification_outbox_lag_seconds',
+    'Задержка доставки уведомлений из outbox',
+    ['app'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+)
+
+notification_outbox_failures = Counter(
+    'notification_outbox_failures',
+    'Количество неудачных попыток доставки уведомлений из outbox',
+    ['app']
+)
+notification_retention_deleted = Counter(
+    'notification_retention_deleted',
+    'Количество удаленных устаревших уведомлений',
+    ['app']
+)
+
+notification_retention_batch_duration = Histogram(
+    'notification_retention_batch_duration_seconds',
+    'Длительность удаления пачки устаревших уведомлений',
+    ['app'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+project_deletion_deleted = Counter(
+    'project_deletion_deleted',
+    'Количество строк, удаленных при удалении проектов',
+    ['app', 'model']
+)
@@ -1,7 +1,68 @@
+import logging
+
+from django.apps import apps
+from django.db import transaction
+
 from api.service import send_email
 from config.celery import app
+from config import settings
+from config.utils.fields import WEBP_EXTENSION, InvalidImageError
+
+logger = logging.getLogger('django')
 
 
 @app.task
 def send_confirm_account_email(user_email: str):
-    send_email(user_email)
\ No newline at end of file
+    send_email(user_email)
+
+@app.task(autoretry_for=(Exception,), max_retries=settings.WEBP_PROCESSING_MAX_RETRIES, retry_backoff=True)
+def process_webp_image(app_label: str, model_name: str, pk: int, field_name: str, name: str):
+    """
+    Replace the raw image with its WEBP conversion.
+
+    Failed conversions are retried with a backoff and keep the raw image,
+    only images that are invalid for sure are removed.
+    """
+    model = apps.get_model(app_label, model_name)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or getattr(instance, field_name).name != name:
+        # Instance was deleted or got another image before the conversion
+        return
+
+    field_file = getattr(instance, field_name)
+    try:
+        processed_name = field_file.process()
+    except InvalidImageError as e:
+        logger.warning(f"Removed invalid image {name} of {model_name} {pk}. {str(e)}")
+        processed_name = None
+
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=pk).first()
+        if instance is None or getattr(instance, field_name).name != name:
+            if processed_name:
+                processed_file = field_file.field.attr_class(field_file.instance, field_file.field, processed_name)
+                processed_file.delete(save=False)
+            return
+
+        # The raw image is removed by django_cleanup once the new name is committed
+        setattr(instance, field_name, processed_name)
+        instance.save(update_fields=[field_name])
+
+
+@app.task
+def generate_webp_variants(app_label: str, model_name: str, field_name: str):
+    """Save missing variants of images converted before the field got its variant sizes."""
+    model = apps.get_model(app_label, model_name)
+    instances = model.objects.filter(**{f'{field_name}__endswith': WEBP_EXTENSION}).only('pk', field_name)
+    generated = 0
+    for instance in instances.iterator(chunk_size=500):
+        field_file = getattr(instance, field_name)
+        if field_file.has_variants():
+            continue
+        try:
+            field_file.save_variants()
+            generated += 1
+        except Exception:
+            logger.exception(f"Failed to generate variants of image {field_file.name} of {model_name} {instance.pk}.")
+
+    logger.info(f"Generated image variants for {generated} {model_name} instances.")
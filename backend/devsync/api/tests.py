@@ -1,3 +1,189 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest.mock import patch
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.tasks import process_webp_image, generate_webp_variants
+from config import settings
+from config.utils.fields import validate_image_pixels
+from config.utils.serializers import WEBPImageField
+from users.models import User
+from users.serializers import UserSerializer
+
+
+def create_image_file(size=(300, 200), image_format='PNG', name='avatar.png'):
+    content = io.BytesIO()
+    Image.new('RGB', size, 'red').save(content, format=image_format)
+    return SimpleUploadedFile(name, content.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class WEBPFieldTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='user@test.com', password='testpass')
+
+    def _upload_avatar(self, image_file=None):
+        with patch('api.tasks.process_webp_image.delay') as delay, self.captureOnCommitCallbacks(execute=True):
+            self.user.avatar = image_file or create_image_file()
+            self.user.save()
+        delay.assert_called_once()
+        return delay.call_args.args
+
+    def test_placeholder_before_processing(self):
+        task_args = self._upload_avatar()
+
+        self.assertEqual(task_args, ('users', 'user', self.user.id, 'avatar', self.user.avatar.name))
+        self.assertTrue(self.user.avatar.name.endswith('.raw'))
+        self.assertFalse(self.user.avatar.is_processed)
+        self.assertEqual(self.user.avatar.url, staticfiles_storage.url(settings.WEBP_PLACEHOLDER))
+        self.assertEqual(self.user.avatar.get_variant_url(64), self.user.avatar.url)
+
+    def test_raw_image_converted_to_webp(self):
+        task_args = self._upload_avatar(create_image_file(size=(3000, 1000), image_format='JPEG', name='a.jpg'))
+        raw_name = self.user.avatar.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_webp_image(*task_args)
+
+        self.user.refresh_from_db()
+        avatar = self.user.avatar
+        self.assertTrue(avatar.is_processed)
+        self.assertNotEqual(avatar.url, staticfiles_storage.url(settings.WEBP_PLACEHOLDER))
+        self.assertFalse(avatar.storage.exists(raw_name))
+        with avatar.storage.open(avatar.name) as file, Image.open(file) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(max(image.size), settings.WEBP_MAX_SIDE)
+        for size in settings.AVATAR_SIZES:
+            with avatar.storage.open(avatar.get_variant_name(size)) as file, Image.open(file) as image:
+                self.assertEqual(image.size, (size, size))
+
+    def test_conversion_skipped_for_replaced_image(self):
+        task_args = self._upload_avatar()
+        self._upload_avatar()
+
+        process_webp_image(*task_args)
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar.is_processed)
+
+    def test_failed_conversion_keeps_raw_image(self):
+        task_args = self._upload_avatar()
+        raw_name = self.user.avatar.name
+
+        with patch('config.utils.fields.WEBPFieldFile.process', side_effect=OSError), self.assertRaises(OSError):
+            process_webp_image(*task_args)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, raw_name)
+        self.assertTrue(self.user.avatar.storage.exists(raw_name))
+
+    def test_invalid_image_removed(self):
+        task_args = self._upload_avatar(SimpleUploadedFile('avatar.png', b'not an image', content_type='image/png'))
+
+        with self.captureOnCommitCallbacks(execute=True), patch('api.tasks.logger') as logger:
+            process_webp_image(*task_args)
+
+        logger.warning.assert_called_once()
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+        self.assertFalse(self.user.avatar.storage.exists(task_args[-1]))
+
+    def test_generate_missing_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            process_webp_image(*self._upload_avatar())
+        self.user.refresh_from_db()
+        avatar = self.user.avatar
+        avatar.storage.delete(avatar.get_variant_name(max(settings.AVATAR_SIZES)))
+        self.assertFalse(avatar.has_variants())
+
+        generate_webp_variants('users', 'user', 'avatar')
+
+        self.assertTrue(avatar.has_variants())
+
+    def test_deconstruct_keeps_variant_sizes(self):
+        _, _, _, kwargs = User._meta.get_field('avatar').deconstruct()
+        self.assertEqual(kwargs['variant_sizes'], settings.AVATAR_SIZES)
+
+    def test_generate_variants_command(self):
+        with patch('api.tasks.generate_webp_variants.delay') as delay:
+            call_command('generate_webp_variants', stdout=io.StringIO())
+
+        delay.assert_any_call('users', 'user', 'avatar')
+        delay.assert_any_call('projects', 'project', 'avatar')
+
+
+class ValidateImagePixelsTests(TestCase):
+    def test_valid_image(self):
+        image_file = create_image_file()
+        image_file.seek(10)
+
+        validate_image_pixels(image_file)
+
+        self.assertEqual(image_file.tell(), 10)
+
+    @patch.object(settings, 'WEBP_MAX_PIXELS', 300 * 200 - 1)
+    def test_too_many_pixels(self):
+        with self.assertRaises(ValidationError):
+            validate_image_pixels(create_image_file())
+
+
+class WEBPImageFieldTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@test.com', password='testpass')
+        User.objects.filter(pk=self.user.pk).update(avatar='users/avatar.webp')
+        self.user.refresh_from_db()
+
+    def _get_avatar(self, query_params=None, **context):
+        request = APIRequestFactory().get('/', query_params)
+        request.query_params = request.GET
+        return UserSerializer(self.user, context={'request': request, **context}).data['avatar']
+
+    def test_size_from_query(self):
+        self.assertEqual(self._get_avatar({'avatar_size': 64}), 'http://testserver/media/users/avatar_64.webp')
+
+    def test_size_from_context(self):
+        avatar = self._get_avatar(**{WEBPImageField.SIZE_PARAM: settings.AVATAR_ICON_SIZE})
+        self.assertEqual(avatar, 'http://testserver/media/users/avatar_32.webp')
+
+    def test_query_overrides_context(self):
+        avatar = self._get_avatar({'avatar_size': 128}, **{WEBPImageField.SIZE_PARAM: settings.AVATAR_ICON_SIZE})
+        self.assertEqual(avatar, 'http://testserver/media/users/avatar_128.webp')
+
+    def test_size_without_variant(self):
+        self.assertEqual(self._get_avatar({'avatar_size': 60}), 'http://testserver/media/users/avatar_64.webp')
+        self.assertEqual(self._get_avatar({'avatar_size': 1000}), 'http://testserver/media/users/avatar_256.webp')
+
+    def test_invalid_or_missing_size(self):
+        for query_params in (None, {'avatar_size': 'large'}, {'avatar_size': 0}):
+            self.assertEqual(self._get_avatar(query_params), 'http://testserver/media/users/avatar.webp')
+
+    def test_field_without_variants(self):
+        with patch.object(User._meta.get_field('avatar'), 'variant_sizes', ()):
+            self.assertEqual(self._get_avatar({'avatar_size': 64}), 'http://testserver/media/users/avatar.webp')
+
+    def test_unprocessed_image(self):
+        User.objects.filter(pk=self.user.pk).update(avatar='users/avatar.raw')
+        self.user.refresh_from_db()
+
+        avatar = self._get_avatar({'avatar_size': 64})
+        self.assertEqual(avatar, f'http://testserver{staticfiles_storage.url(settings.WEBP_PLACEHOLDER)}')
+
+    def test_user_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(reverse('user-detail', kwargs={'pk': self.user.id}), {'avatar_size': 32})
+        self.assertEqual(response.data['avatar'], 'http://testserver/media/users/avatar_32.webp')
@@ -15,4 +15,28 @@ app.conf.beat_schedule = {
         'task': 'notifications.tasks.cleanup_old_notifications',
         'schedule': crontab(hour=2, minute=00),
     },
+    'dispatch-notification-outbox': {
+        'task': 'notifications.tasks.dispatch_notification_outbox',
+        'schedule': crontab(),
+    },
+    'reconcile-unread-notification-counts': {
+        'task': 'notifications.tasks.reconcile_unread_counts',
+        'schedule': crontab(minute='*/15'),
+    },
+    'schedule-ending-votings': {
+        'task': 'voting.tasks.schedule_ending_votings',
+        'schedule': crontab(minute='*/5'),
+    },
+    'sweep-presence': {
+        'task': 'users.tasks.sweep_presence',
+        'schedule': 15.0,
+    },
+    'flush-last-seen': {
+        'task': 'users.tasks.flush_last_seen',
+        'schedule': crontab(),
+    },
+    'expire-project-invitations': {
+        'task': 'projects.tasks.expire_invitations',
+        'schedule': crontab(minute=0),
+    },
 }
@@ -134,7 +134,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
@@ -323,7 +323,7 @@ REQUEST_LOGGING = {
 # django channels
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'config.utils.redis_channel.ExtendedRedisChannelLayer',
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
             'hosts': [(REDIS_HOST, REDIS_PORT)],
         },
@@ -333,3 +333,42 @@ CHANNEL_LAYERS = {
 # general
 PROJECT_INVITATION_EXPIRY_DAYS = 7
 INVITATION_IS_EXPIRED_MESSAGE = 'Приглашение истекло. Запросите новое или проигнорируйте!'
+VOTING_BULK_IMPORT_MAX_SIZE = 100
+VOTING_EXPORT_CHUNK_SIZE = 2000
+VOTING_END_SCHEDULE_HORIZON = 60 * 10
+VOTING_RESULTS_CACHE_TIMEOUT = 60 * 60 * 24
+NOTIFICATION_OUTBOX_BATCH_SIZE = 500
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 5
+NOTIFICATION_OUTBOX_RETRY_DELAY = 5
+NOTIFICATION_OUTBOX_CLAIM_TIMEOUT = 60
+NOTIFICATION_BULK_BATCH_SIZE = 1000
+NOTIFICATION_UNREAD_COUNT_TIMEOUT = 60 * 60 * 24
+NOTIFICATION_EVENTS_MAX_LENGTH = 200
+NOTIFICATION_EVENTS_TTL = 60 * 60 * 24
+NOTIFICATION_MARK_BATCH_SIZE = 200
+NOTIFICATION_MARK_BUFFER_WINDOW = 0.25
+PRESENCE_HEARTBEAT_INTERVAL = 30
+PRESENCE_TIMEOUT = 75
+PRESENCE_DISCONNECT_GRACE = 15
+PRESENCE_SWEEP_BATCH_SIZE = 1000
+USER_STATUSES_MAX_SIZE = 100
+LAST_SEEN_THROTTLE = 60
+LAST_SEEN_FLUSH_BATCH_SIZE = 1000
+TOKEN_AUTH_CACHE_TIMEOUT = 60 * 15
+TOKEN_AUTH_LOCAL_CACHE_TIMEOUT = 5
+TOKEN_AUTH_LOCAL_CACHE_SIZE = 1024
+NOTIFICATION_RETENTION_PERIOD = 60 * 60 * 24 * 14
+NOTIFICATION_RETENTION_BATCH_SIZE = 2000
+NOTIFICATION_RETENTION_MAX_DURATION = 60
+NOTIFICATION_TOMBSTONE_PERIOD = 60 * 60 * 24 * 7
+WEBP_MAX_PIXELS = 40_000_000
+WEBP_MAX_SIDE = 2048
+WEBP_QUALITY = 80
+WEBP_PLACEHOLDER = 'api/images/placeholder.webp'
+WEBP_PROCESSING_MAX_RETRIES = 5
+AVATAR_SIZES = (32, 64, 128, 256)
+AVATAR_ICON_SIZE = 32
+PROJECT_DELETION_BATCH_SIZE = 1000
+PROJECT_DELETION_MAX_DURATION = 60
+PROJECT_INVITATION_BULK_MAX_SIZE = 200
+INVITATION_EXPIRY_BATCH_SIZE = 500
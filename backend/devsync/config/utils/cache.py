@@ -1,4 +1,21 @@
+from typing import Optional
+
 from django_redis import get_redis_connection
+from redis import Redis
+
+
+def get_cache_redis() -> Optional[Redis]:
+    """
+    Get the Redis connection of the default cache.
+
+    Returns:
+        Connection or None if the cache isn't backed by Redis, then Redis-only features are skipped
+    """
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
 
 def delete_pattern(pattern):
     conn = get_redis_connection("default")
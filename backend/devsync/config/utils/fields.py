@@ -1,24 +1,180 @@
 import io
+import os
 import uuid
+from collections.abc import Iterable
+from typing import Optional
 
-from PIL import Image
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 from django.db.models.fields.files import ImageFieldFile
+from django.db.models.signals import post_save
+
+from config import settings
+
+WEBP_EXTENSION = '.webp'
+RAW_EXTENSION = '.raw'
+
+
+def validate_image_pixels(value) -> None:
+    """Reject images with more pixels than WEBP_MAX_PIXELS, reading only the image header."""
+    file = getattr(value, 'file', value)
+    position = file.tell()
+    try:
+        width, height = Image.open(file).size
+    finally:
+        file.seek(position)
+
+    if width * height > settings.WEBP_MAX_PIXELS:
+        raise ValidationError(
+            f"Изображение слишком большое: {width}x{height}. "
+            f"Максимум {settings.WEBP_MAX_PIXELS} пикселей."
+        )
+
+
+class InvalidImageError(ValueError):
+    """Raised for uploads that can't be converted whatever the number of attempts."""
 
 
 class WEBPFieldFile(ImageFieldFile):
+    """
+    Image that is stored as uploaded and converted to WEBP by a Celery task.
+
+    Until the conversion finishes the file keeps a raw name and its URL points to a placeholder.
+    """
+
     def save(self, name, content, save=True):
-        name = f"{uuid.uuid4().hex}.webp"
+        name = f"{uuid.uuid4().hex}{RAW_EXTENSION}"
         content.file.seek(0)
-        image = Image.open(content.file)
+        # Conversion is scheduled by the field once the instance is saved and has a pk
+        self.instance.__dict__.setdefault('_pending_webp_fields', set()).add(self.field.attname)
+        super().save(name, content, save)
 
-        image_bytes = io.BytesIO()
-        image.save(fp=image_bytes, format="WEBP")
+    @property
+    def is_processed(self) -> bool:
+        return self.name.endswith(WEBP_EXTENSION)
+
+    @property
+    def url(self):
+        if self.name and not self.is_processed:
+            return staticfiles_storage.url(settings.WEBP_PLACEHOLDER)
+        return super().url
+
+    def get_variant_name(self, size: int) -> str:
+        root, _ = os.path.splitext(self.name)
+        return f"{root}_{size}{WEBP_EXTENSION}"
+
+    def process(self) -> str:
+        """
+        Convert the raw image to WEBP and save it with its square variants.
+
+        JPEG images are decoded already reduced with the draft mode,
+        so big photos are never fully loaded into memory.
+
+        Returns:
+            Name of the converted image
+
+        Raises:
+            InvalidImageError: If the raw file isn't an image or has too many pixels
+        """
+        max_side = settings.WEBP_MAX_SIDE
+        with self.storage.open(self.name, 'rb') as file:
+            try:
+                image = Image.open(file)
+            except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+                raise InvalidImageError(f"Image {self.name} can't be decoded: {str(e)}.") from e
+            width, height = image.size
+            if width * height > settings.WEBP_MAX_PIXELS:
+                raise InvalidImageError(f"Image {self.name} has too many pixels: {width}x{height}.")
+
+            image.draft('RGB', (max_side, max_side))
+            image.load()
+            image.thumbnail((max_side, max_side))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
 
-        image_content_file = ContentFile(content=image_bytes.getvalue())
-        return super().save(name, image_content_file, save)
+        root, _ = os.path.splitext(self.name)
+        name = self._save_image(f"{root}{WEBP_EXTENSION}", image)
+        self.field.attr_class(self.instance, self.field, name).save_variants(image)
+        return name
+
+    def save_variants(self, image: Optional[Image.Image] = None) -> None:
+        """Save square variants of the converted image, reading it from the storage if it isn't passed."""
+        if image is None:
+            with self.storage.open(self.name, 'rb') as file:
+                image = Image.open(file)
+                image.load()
+
+        for size in self.field.variant_sizes:
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            self._save_image(self.get_variant_name(size), variant)
+
+    def has_variants(self) -> bool:
+        sizes = self.field.variant_sizes
+        return not sizes or self.storage.exists(self.get_variant_name(max(sizes)))
+
+    def get_variant_url(self, size: int) -> str:
+        """
+        Get URL of the smallest variant not smaller than the size.
+
+        The biggest variant is used for bigger sizes, the image itself if the field has no variants.
+        """
+        sizes = sorted(self.field.variant_sizes)
+        if not self.name or not self.is_processed or not sizes:
+            return self.url
+
+        variant_size = next((variant_size for variant_size in sizes if variant_size >= size), sizes[-1])
+        return self.storage.url(self.get_variant_name(variant_size))
+
+    def delete(self, save=True):
+        if self.name and self.is_processed:
+            for size in self.field.variant_sizes:
+                self.storage.delete(self.get_variant_name(size))
+        super().delete(save)
+
+    def _save_image(self, name: str, image: Image.Image) -> str:
+        image_bytes = io.BytesIO()
+        image.save(fp=image_bytes, format="WEBP", quality=settings.WEBP_QUALITY)
+        return self.storage.save(name, ContentFile(image_bytes.getvalue()))
 
 
 class WEBPField(models.ImageField):
+    """
+    Image field converting uploads to WEBP in the background.
+
+    Args:
+        variant_sizes: Sides of square variants saved along with the image
+    """
     attr_class = WEBPFieldFile
+    default_validators = [*models.ImageField.default_validators, validate_image_pixels]
+
+    def __init__(self, *args, variant_sizes: Iterable[int] = (), **kwargs):
+        self.variant_sizes = tuple(variant_sizes)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.variant_sizes:
+            kwargs['variant_sizes'] = self.variant_sizes
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            post_save.connect(self.schedule_processing, sender=cls)
+
+    def schedule_processing(self, instance, **kwargs):
+        pending_fields = instance.__dict__.get('_pending_webp_fields')
+        if not pending_fields or self.attname not in pending_fields:
+            return
+
+        from api.tasks import process_webp_image
+
+        pending_fields.discard(self.attname)
+        name = getattr(instance, self.attname).name
+        opts = instance._meta
+        transaction.on_commit(lambda: process_webp_image.delay(
+            opts.app_label, opts.model_name, instance.pk, self.attname, name
+        ))
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from rest_framework import serializers
+
+from config.utils.fields import WEBPField, WEBPFieldFile
+
+
+class WEBPImageField(serializers.ImageField):
+    """
+    Image field returning a variant of the image sized for the client.
+
+    The size is taken from the 'avatar_size' query parameter, falling back to
+    the 'avatar_size' serializer context, which views use for dense lists.
+    Without a size the full image is returned.
+    """
+
+    SIZE_PARAM = 'avatar_size'
+
+    def to_representation(self, value):
+        size = self.get_size()
+        if not value or size is None or not isinstance(value, WEBPFieldFile):
+            return super().to_representation(value)
+
+        url = value.get_variant_url(size)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_size(self) -> Optional[int]:
+        request = self.context.get('request', None)
+        query_params = getattr(request, 'query_params', {})
+        size = query_params.get(self.SIZE_PARAM, self.context.get(self.SIZE_PARAM))
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            return None
+        return size if size > 0 else None
+
+
+class WEBPModelSerializer(serializers.ModelSerializer):
+    """Model serializer mapping WEBPField to WEBPImageField."""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        WEBPField: WEBPImageField
+    }
@@ -0,0 +1,63 @@
+from typing import AsyncIterator, Iterator, TypeVar
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, StreamingHttpResponse
+
+T = TypeVar("T")
+
+_END = object()
+
+
+def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Wrap a blocking iterator into an async iterator consumed item by item.
+
+    Under ASGI Django buffers synchronous streaming content completely before
+    sending it. Stepping the iterator through thread-sensitive sync_to_async keeps
+    memory constant and keeps all database work on the request thread.
+
+    Args:
+        iterator: Blocking iterator producing response chunks
+
+    Returns:
+        Async iterator producing the same chunks
+    """
+    get_next = sync_to_async(next, thread_sensitive=True)
+
+    async def wrapper() -> AsyncIterator[T]:
+        try:
+            while (item := await get_next(iterator, _END)) is not _END:
+                yield item
+        finally:
+            if close := getattr(iterator, 'close', None):
+                await sync_to_async(close, thread_sensitive=True)()
+
+    return wrapper()
+
+
+def streaming_response(
+        request: HttpRequest,
+        content: Iterator[str],
+        content_type: str,
+        filename: str | None = None,
+) -> StreamingHttpResponse:
+    """
+    Build a StreamingHttpResponse that streams lazily under both WSGI and ASGI.
+
+    Args:
+        request: Current request, used to detect the ASGI handler
+        content: Blocking iterator producing response chunks
+        content_type: Response content type
+        filename: Optional attachment file name
+
+    Returns:
+        StreamingHttpResponse instance
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = iterate_in_thread(content)
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
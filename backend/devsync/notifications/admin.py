@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.contenttypes.admin import GenericTabularInline
+from django.utils import timezone
 from django.utils.html import format_html
 
 from notifications.models import NotificationContextObject, Notification
+from notifications.services.counters import invalidate_unread_counts
 
 
 class NotificationContextObjectInline(GenericTabularInline):
@@ -88,15 +90,18 @@ class NotificationAdmin(admin.ModelAdmin):
 
     @admin.action(description='Mark selected as read')
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        queryset.update(is_read=True, updated_at=timezone.now())
+        invalidate_unread_counts(queryset.values_list('user_id', flat=True))
 
     @admin.action(description='Mark selected as unread')
     def mark_as_unread(self, request, queryset):
-        queryset.update(is_read=False)
+        queryset.update(is_read=False, updated_at=timezone.now())
+        invalidate_unread_counts(queryset.values_list('user_id', flat=True))
 
     @admin.action(description='Hide selected notifications')
     def hide_notifications(self, request, queryset):
-        queryset.update(is_hidden=True)
+        queryset.update(is_hidden=True, updated_at=timezone.now())
+        invalidate_unread_counts(queryset.values_list('user_id', flat=True))
 
 
 def admin_url(obj):
@@ -1,14 +1,18 @@
 import asyncio
 import json
 import logging
+import uuid
 from typing import Any, Optional, Awaitable, Callable, Self
+from urllib.parse import parse_qs
 
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.layers import get_channel_layer
+from django.utils import timezone
 
 from api.metrics import online_users
-from users.services import update_user_status
+from config import settings
+from users import activity, presence
 
 logger: logging.Logger = logging.getLogger('django')
 
@@ -26,6 +30,11 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         self.user = None
         self.group_name: Optional[str] = None
         self.connection_id: Optional[str] = None
+        self._pending_read_ids: set[int] = set()
+        self._pending_hidden_ids: set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._heartbeat_task: Optional[asyncio.Task] = None
 
     async def connect(self) -> None:
         self.user = self.scope.get('user')
@@ -33,20 +42,27 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         if not self.user:
             await self.close(code=4001)
             return
-        self.connection_id = id(self)
+        self.connection_id = uuid.uuid4().hex
         await self._setup_user_group()
         await self.accept()
-        await self.update_user_status(is_online=True)
+        if await sync_to_async(presence.connect)(self.user.id, self.connection_id):
+            await sync_to_async(activity.touch)(self.user.id)
+        self._heartbeat_task = asyncio.create_task(self._send_heartbeats())
         online_users.labels(app='devsync').inc()
+        await self._send_message("unread_count", {"count": await self.get_unread_count()})
+        if last_event_id := self._get_query_param('last_event_id'):
+            await self._replay_events(last_event_id)
 
     async def disconnect(self, close_code: int) -> None:
-        if self.group_name:
-            await self._remove_from_group()
-        online_users.labels(app='devsync').dec()
-        await asyncio.sleep(15)
-        if await self.check_user_connection_async(self.user.id):
+        if not self.group_name:
             return
-        await self.update_user_status(is_online=False)
+
+        await self._flush_pending()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        await sync_to_async(presence.disconnect)(self.user.id, self.connection_id)
+        await self._remove_from_group()
+        online_users.labels(app='devsync').dec()
 
     async def receive(self, text_data: Optional[str] = None, bytes_data: Optional[bytes] = None) -> None:
         try:
@@ -66,13 +82,6 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             )
             await self._send_error("Internal server error")
 
-    @classmethod
-    async def check_user_connection_async(cls, user_id: int) -> bool:
-        channel_layer = get_channel_layer()
-        group_name = f'user_{user_id}'
-        channels = await channel_layer.get_group_channels(group_name)
-        return len(channels) > 0
-
     async def send_notification(self, event: dict[str, Any]) -> None:
         try:
             await self._send_message(
@@ -90,47 +99,45 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 exc_info=True
             )
 
+    async def send_unread_count(self, event: dict[str, Any]) -> None:
+        await self._send_message(
+            message_type="unread_count",
+            payload={"count": event['count']}
+        )
+
     @database_sync_to_async
-    def update_user_status(self, is_online: bool) -> None:
-        update_user_status(self.user, is_online)
+    def get_unread_count(self) -> int:
+        from .services.counters import get_unread_count
+
+        return get_unread_count(self.user.id)
 
     @database_sync_to_async
-    def read_notification(self, notification_id: int) -> None:
-        from .models import Notification
+    def mark_notifications(self, read_ids: set[int], hidden_ids: set[int]) -> None:
+        from .services.marking import mark_notifications
 
-        if notification := Notification.objects.filter(
-                id=notification_id,
-                user=self.user
-        ).first():
-            notification.read()
+        mark_notifications(self.user.id, read_ids, hidden_ids)
 
     @database_sync_to_async
     def read_all_notifications(self) -> None:
         from .models import Notification
+        from .services.counters import reset_unread_count
 
         Notification.objects.filter(
             user=self.user,
             is_read=False
-        ).update(is_read=True)
-
-    @database_sync_to_async
-    def hide_notification(self, notification_id: int) -> None:
-        from .models import Notification
-
-        if notification := Notification.objects.filter(
-                id=notification_id,
-                user=self.user
-        ).first():
-            notification.hide()
+        ).update(is_read=True, updated_at=timezone.now())
+        reset_unread_count(self.user.id)
 
     @database_sync_to_async
     def hide_all_notifications(self) -> None:
         from .models import Notification
+        from .services.counters import reset_unread_count
 
         Notification.objects.filter(
             user=self.user,
             is_hidden=False
-        ).update(is_hidden=True)
+        ).update(is_hidden=True, updated_at=timezone.now())
+        reset_unread_count(self.user.id)
 
     async def _process_message(self, text_data: str) -> None:
         data: dict[str, Any] = json.loads(text_data)
@@ -150,25 +157,108 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self._send_error(f"Unknown message type: {message_type}")
 
     async def _handle_mark_as_read(self, data: dict[str, Any]) -> None:
-        if not (notification_id := data.get('notification_id')):
-            await self._send_error("notification_id is required")
-            return
-
-        await self.read_notification(notification_id)
+        if notification_ids := await self._get_notification_ids(data):
+            await self._buffer(self._pending_read_ids, notification_ids)
 
     async def _handle_mark_all_read(self, data: dict[str, Any]) -> None:
+        await self._flush_pending()
         await self.read_all_notifications()
 
     async def _handle_mark_as_hidden(self, data: dict[str, Any]) -> None:
-        if not (notification_id := data.get('notification_id')):
-            await self._send_error("notification_id is required")
-            return
-
-        await self.hide_notification(notification_id)
+        if notification_ids := await self._get_notification_ids(data):
+            await self._buffer(self._pending_hidden_ids, notification_ids)
 
     async def _handle_mark_all_hidden(self, data: dict[str, Any]) -> None:
+        await self._flush_pending()
         await self.hide_all_notifications()
 
+    async def _get_notification_ids(self, data: dict[str, Any]) -> Optional[list[int]]:
+        """Get IDs from notification_id or a notification_ids list of a mark message."""
+        notification_ids = data.get('notification_ids')
+        if notification_ids is None and data.get('notification_id'):
+            notification_ids = [data['notification_id']]
+
+        if not notification_ids or not isinstance(notification_ids, list):
+            await self._send_error("notification_id or notification_ids is required")
+            return None
+        if len(notification_ids) > settings.NOTIFICATION_MARK_BATCH_SIZE:
+            await self._send_error(
+                f"No more than {settings.NOTIFICATION_MARK_BATCH_SIZE} notifications can be marked at once"
+            )
+            return None
+        if not all(isinstance(notification_id, int) for notification_id in notification_ids):
+            await self._send_error("Notification IDs must be integers")
+            return None
+        return notification_ids
+
+    async def _buffer(self, pending_ids: set[int], notification_ids: list[int]) -> None:
+        """
+        Buffer marked IDs for NOTIFICATION_MARK_BUFFER_WINDOW seconds,
+        so that a series of messages is applied with a single database hop.
+        """
+        pending_ids.update(notification_ids)
+        pending_count = len(self._pending_read_ids) + len(self._pending_hidden_ids)
+        if pending_count >= settings.NOTIFICATION_MARK_BATCH_SIZE:
+            await self._flush_pending()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(settings.NOTIFICATION_MARK_BUFFER_WINDOW)
+        self._flush_task = None
+        await self._flush_pending()
+
+    async def _flush_pending(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        async with self._flush_lock:
+            read_ids, self._pending_read_ids = self._pending_read_ids, set()
+            hidden_ids, self._pending_hidden_ids = self._pending_hidden_ids, set()
+            if not read_ids and not hidden_ids:
+                return
+
+            try:
+                await self.mark_notifications(read_ids, hidden_ids)
+            except Exception as e:
+                logger.error(
+                    f"Failed to mark notifications of user {self.user.id}: {str(e)} "
+                    f"(conn_id: {self.connection_id})",
+                    exc_info=True
+                )
+
+    async def _send_heartbeats(self) -> None:
+        """Keep the connection alive in the presence registry while the socket is open."""
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_INTERVAL)
+            try:
+                await sync_to_async(presence.heartbeat)(self.user.id, self.connection_id)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to prolong presence of user {self.user.id}: {str(e)} "
+                    f"(conn_id: {self.connection_id})"
+                )
+
+    async def _replay_events(self, last_event_id: str) -> None:
+        from .services.events import get_missed_events
+
+        events = await sync_to_async(get_missed_events)(self.user.id, last_event_id)
+        if events is None:
+            await self._send_message("resync_required", {"last_event_id": last_event_id})
+            return
+
+        logger.debug(
+            f"Replay {len(events)} notification events to user {self.user.id} "
+            f"(conn_id: {self.connection_id})"
+        )
+        for event_id, payload in events:
+            await self._send_message("notification", {**payload, "event_id": event_id})
+
+    def _get_query_param(self, name: str) -> Optional[str]:
+        values = parse_qs(self.scope.get('query_string', b'').decode()).get(name)
+        return values[0] if values else None
+
     async def _send_message(self, message_type: str, payload: Any) -> None:
         await self.send(text_data=json.dumps({
             "type": message_type,
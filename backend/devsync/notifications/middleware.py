@@ -22,10 +22,9 @@ class TokenBasedAuthMiddleware:
 
     @database_sync_to_async
     def get_user_from_token(self, token_key):
-        from rest_framework.authtoken.models import Token
+        from users.authentication import get_user_by_token
 
-        try:
-            token = Token.objects.select_related("user").get(key=token_key)
-            return token.user
-        except Token.DoesNotExist:
+        user = get_user_by_token(token_key)
+        if user is None or not user.is_active:
             return None
+        return user
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2025-06-16 12:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0010_notificationcontextobject_notificatio_notific_5f18d9_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.PositiveBigIntegerField()),
+                ('notification_id', models.PositiveBigIntegerField()),
+                ('event_type', models.CharField(choices=[('NEW', 'New'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=8)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['available_at', 'id'], name='notificatio_availab_491528_idx')],
+            },
+        ),
+    ]
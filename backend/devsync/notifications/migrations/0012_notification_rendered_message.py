@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2025-06-17 10:05
+
+from collections import defaultdict
+from itertools import batched
+
+from django.db import migrations, models
+
+
+def render_messages(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationContextObject = apps.get_model('notifications', 'NotificationContextObject')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    content_types = ContentType.objects.in_bulk()
+    notification_ids = Notification.objects.order_by('id').values_list('id', flat=True)
+    for ids in batched(notification_ids, 1000):
+        notifications = Notification.objects.in_bulk(ids)
+        context_objects = list(NotificationContextObject.objects.filter(
+            notification_id__in=ids,
+            content_type__isnull=False,
+        ))
+
+        object_ids = defaultdict(set)
+        for context in context_objects:
+            object_ids[context.content_type_id].add(context.object_id)
+        objects = {}
+        for content_type_id, ids_of_type in object_ids.items():
+            content_type = content_types[content_type_id]
+            try:
+                model = apps.get_model(content_type.app_label, content_type.model)
+            except LookupError:
+                continue
+            for pk, obj in model._default_manager.in_bulk(ids_of_type).items():
+                objects[content_type_id, pk] = obj
+
+        contexts = defaultdict(dict)
+        for context in context_objects:
+            contexts[context.notification_id][context.name] = objects.get(
+                (context.content_type_id, context.object_id)
+            )
+
+        for notification in notifications.values():
+            try:
+                notification.rendered_message = notification.message.format(**contexts[notification.id])
+            except (KeyError, AttributeError, IndexError):
+                notification.rendered_message = notification.message
+        Notification.objects.bulk_update(notifications.values(), ['rendered_message'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0011_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='rendered_message',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(render_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2025-06-18 09:30
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def fill_updated_at(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0012_notification_rendered_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_hidden', 'created_at'], name='user_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'updated_at'], name='user_updated_notifications_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2025-06-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0013_notification_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'content_type', 'object_id', 'created_at'], name='related_notifications_idx'),
+        ),
+    ]
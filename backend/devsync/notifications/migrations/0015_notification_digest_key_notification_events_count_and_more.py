@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2025-06-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0014_notification_related_notifications_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='digest_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='events_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('digest_key__isnull', False), ('is_hidden', False), ('is_read', False)), fields=['user', 'digest_key', 'created_at'], name='user_digests_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2025-06-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0015_notification_digest_key_notification_events_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='event_id',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
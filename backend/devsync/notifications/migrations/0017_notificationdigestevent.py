@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2025-06-18 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0016_notificationoutbox_event_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDigestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to='notifications.notification')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='digest_event_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('notification', 'content_type', 'object_id'), name='unique_notification_digest_event')],
+            },
+        ),
+    ]
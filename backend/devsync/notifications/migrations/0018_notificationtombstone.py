@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2025-06-18 19:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0017_notificationdigestevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.PositiveBigIntegerField()),
+                ('notification_id', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'deleted_at'], name='notificatio_user_id_28e722_idx'), models.Index(fields=['deleted_at'], name='notificatio_deleted_8031fa_idx')],
+            },
+        ),
+    ]
@@ -1,11 +1,10 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -35,14 +34,18 @@ class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=128)
     message = models.CharField(max_length=256)
+    rendered_message = models.TextField(blank=True, default='')
     is_read = models.BooleanField(default=False)
     is_hidden = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
     object_id = models.PositiveBigIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
     actions_data = models.JSONField(default=dict)
     footnote = models.CharField(max_length=256, null=True, blank=True)
+    digest_key = models.CharField(max_length=64, null=True, blank=True)
+    events_count = models.PositiveIntegerField(default=1)
 
     objects = models.Manager()
     visible_objects = VisibleNotificationManager()
@@ -58,32 +61,124 @@ class Notification(models.Model):
             ),
             models.Index(
                 fields=['created_at']
-            )
+            ),
+            models.Index(
+                name='user_feed_idx',
+                fields=['user', 'is_hidden', 'created_at']
+            ),
+            models.Index(
+                name='user_updated_notifications_idx',
+                fields=['user', 'updated_at']
+            ),
+            models.Index(
+                name='related_notifications_idx',
+                fields=['user', 'content_type', 'object_id', 'created_at']
+            ),
+            models.Index(
+                name='user_digests_idx',
+                fields=['user', 'digest_key', 'created_at'],
+                condition=models.Q(digest_key__isnull=False, is_read=False, is_hidden=False)
+            ),
         ]
 
     @property
     def formatted_message(self):
-        try:
-            context_data = {
-                context.name: context.content_object
-                for context in self.context_objects.all()
-            }
-            return self.message.format(**context_data)
-        except (KeyError, AttributeError):
-            return self.message
+        if self.rendered_message:
+            return self.rendered_message
+
+        from notifications.services.utils import get_notification_context, render_message
+
+        return render_message(self.message, get_notification_context(self))
 
     def read(self):
+        from notifications.services.counters import change_unread_count
+
+        is_updated = Notification.objects.filter(id=self.id, is_read=False).update(
+            is_read=True,
+            updated_at=timezone.now()
+        )
         self.is_read = True
-        self.save(update_fields=['is_read'])
+        if is_updated and not self.is_hidden:
+            change_unread_count(self.user_id, -1)
 
     def hide(self):
+        from notifications.services.counters import change_unread_count
+
+        is_updated = Notification.objects.filter(id=self.id, is_hidden=False).update(
+            is_hidden=True,
+            updated_at=timezone.now()
+        )
         self.is_hidden = True
-        self.save(update_fields=['is_hidden'])
+        if is_updated and not self.is_read:
+            change_unread_count(self.user_id, -1)
 
     def __str__(self):
         return f"Notification <{self.title}> for {self.user}"
 
 
+class NotificationDigestEvent(models.Model):
+    """Related object of an event coalesced into a digest, so the digest is found by any of its events."""
+
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='digest_events')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['notification', 'content_type', 'object_id'],
+                name='unique_notification_digest_event'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                name='digest_event_object_idx',
+                fields=['content_type', 'object_id']
+            ),
+        ]
+
+
+class NotificationOutbox(models.Model):
+    class EventType(models.TextChoices):
+        NEW = 'NEW'
+        UPDATE = 'UPDATE'
+        DELETE = 'DELETE'
+
+    user_id = models.PositiveBigIntegerField()
+    notification_id = models.PositiveBigIntegerField()
+    event_type = models.CharField(max_length=8, choices=EventType.choices)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    # ID of the event in the user's event stream, so retried events are logged once
+    event_id = models.CharField(max_length=32, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} event of notification {self.notification_id} for user {self.user_id}"
+
+
+class NotificationTombstone(models.Model):
+    """Deleted notification, kept for NOTIFICATION_TOMBSTONE_PERIOD, so delta sync clients drop it too."""
+
+    user_id = models.PositiveBigIntegerField()
+    notification_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Tombstone of notification {self.notification_id} for user {self.user_id}"
+
+
 @receiver(post_save, sender=Notification)
 def notification_updated(sender, instance, created, **kwargs):
     update_fields = kwargs['update_fields']
@@ -92,38 +187,26 @@ def notification_updated(sender, instance, created, **kwargs):
     if instance.is_hidden or is_only_read_updated:
         return
 
-    from .serializers import NotificationSerializer
-
-    channel_layer = get_channel_layer()
+    from notifications.services.counters import change_unread_count
+    from notifications.services.outbox import enqueue_notification_event
 
-    async_to_sync(channel_layer.group_send)(
-        f'user_{instance.user.id}',
-        {
-            'type': 'send_notification',
-            'notification': {
-                'id': instance.id,
-                'type': 'UPDATE' if not created else 'NEW',
-                'data': NotificationSerializer(instance).data
-            }
-        }
+    enqueue_notification_event(
+        instance,
+        NotificationOutbox.EventType.NEW if created else NotificationOutbox.EventType.UPDATE
     )
+    if created and not instance.is_read:
+        change_unread_count(instance.user_id, 1)
 
 
 @receiver(post_delete, sender=Notification)
 def notification_deleted(sender, instance, **kwargs):
+    NotificationTombstone.objects.create(user_id=instance.user_id, notification_id=instance.id)
     if instance.is_hidden:
         return
 
-    channel_layer = get_channel_layer()
-
-    async_to_sync(channel_layer.group_send)(
-        f'user_{instance.user.id}',
-        {
-            'type': 'send_notification',
-            'notification': {
-                'id': instance.id,
-                'type': 'DELETE',
-                'data': {}
-            }
-        }
-    )
+    from notifications.services.counters import change_unread_count
+    from notifications.services.outbox import enqueue_notification_event
+
+    enqueue_notification_event(instance, NotificationOutbox.EventType.DELETE)
+    if not instance.is_read:
+        change_unread_count(instance.user_id, -1)
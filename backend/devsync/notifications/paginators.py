@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class NotificationCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'per_page'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    sync_ordering = ('updated_at', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('since'):
+            return self.sync_ordering
+        return self.ordering
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link()
+            },
+            'notifications': data
+        })
@@ -1,5 +0,0 @@
-from config.utils.renderers import ListRenderer
-
-
-class NotificationRenderer(ListRenderer):
-    wrapper_key = 'notifications'
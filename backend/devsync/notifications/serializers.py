@@ -7,24 +7,17 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
-        fields = ['id', 'title', 'message', 'created_at', 'is_read', 'actions_data', 'footnote']
-        read_only_fields = ['id', 'title', 'message', 'created_at', 'actions_data', 'footnote']
+        fields = [
+            'id', 'title', 'message', 'created_at', 'updated_at',
+            'is_read', 'is_hidden', 'actions_data', 'footnote', 'events_count'
+        ]
+        read_only_fields = [
+            'id', 'title', 'message', 'created_at', 'updated_at',
+            'is_hidden', 'actions_data', 'footnote', 'events_count'
+        ]
 
     def get_message(self, obj: Notification):
-        if hasattr(obj, 'prefetched_context_objects'):
-            context_data = {
-                context.name: context.content_object
-                for context in obj.prefetched_context_objects
-            }
-        else:
-            context_data = {
-                context.name: context.content_object
-                for context in obj.context_objects.prefetch_related('content_object').all()
-            }
-        try:
-            return obj.message.format(**context_data)
-        except (KeyError, AttributeError):
-            return obj.message
+        return obj.rendered_message or obj.message
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
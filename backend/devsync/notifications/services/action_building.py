@@ -1,6 +1,8 @@
-from typing import Any, Protocol, runtime_checkable
+from functools import cached_property
+from typing import Any, Optional, Protocol, runtime_checkable
+from urllib.parse import quote
 
-from django.urls import reverse
+from django.urls import NoReverseMatch, reverse
 
 from notifications.models import Notification
 from notifications.services.actions import NotificationAction
@@ -14,20 +16,79 @@ class NotificationActionsBuilder(Protocol):
         """Build notification actions"""
 
 
+class ActionUrlFormatter:
+    """
+    URL of a template action, reversed once with placeholder arguments.
+
+    Formatting the URL only substitutes values of the notification object
+    into the reversed pattern and doesn't touch the URL resolver.
+    """
+
+    # Digits match any path converter used by the API routes
+    _PLACEHOLDER = '9{index}0729183'
+    # Same safe characters as reverse() uses for quoting
+    _SAFE_CHARS = "!$&'()*+,;=/~:@"
+
+    def __init__(self, action: NotificationActionTemplate):
+        self._action = action
+        self._pattern = self._compile(action)
+
+    def format(self, notification: Notification) -> str:
+        kwargs = {
+            key: _format_value(notification, value)
+            for key, value in self._action.viewname_kwargs.items()
+        }
+        if self._pattern is None:
+            return reverse(self._action.viewname, kwargs=kwargs)
+        return self._pattern.format(**{
+            key: quote(str(value), safe=self._SAFE_CHARS)
+            for key, value in kwargs.items()
+        })
+
+    @classmethod
+    def _compile(cls, action: NotificationActionTemplate) -> Optional[str]:
+        placeholders = {
+            key: cls._PLACEHOLDER.format(index=index)
+            for index, key in enumerate(action.viewname_kwargs)
+        }
+        try:
+            url = reverse(action.viewname, kwargs=placeholders)
+        except NoReverseMatch:
+            # Arguments of the route can't be replaced with placeholders, so it is reversed every time
+            return None
+
+        pattern = url.replace('{', '{{').replace('}', '}}')
+        for key, placeholder in placeholders.items():
+            if pattern.count(placeholder) != 1:
+                return None
+            pattern = pattern.replace(placeholder, f'{{{key}}}')
+        return pattern
+
+
 class TemplateActionsBuilder:
     def __init__(self, template: NotificationTemplate):
         self.template = template
 
+    @cached_property
+    def _url_formatters(self) -> dict[ActionName, ActionUrlFormatter]:
+        # Compiled on the first build, when the URLconf is surely loaded
+        return {
+            action_name: ActionUrlFormatter(action)
+            for action_name, action in self.template.actions.items()
+            if action.viewname
+        }
+
     def build(self, notification: Notification) -> dict[ActionName, NotificationAction]:
         """Build list of NotificationAction from template"""
         actions = {}
         for action_name, action in self.template.actions.items():
-            actions[action_name] = self._build_action(notification, action)
+            url_formatter = self._url_formatters.get(action_name)
+            url = url_formatter.format(notification) if url_formatter else None
+            actions[action_name] = self._build_action(action, url)
         return actions
 
     @classmethod
-    def _build_action(cls, notification: Notification, action: NotificationActionTemplate) -> NotificationAction:
-        url = cls._build_url(notification, action) if action.viewname else None
+    def _build_action(cls, action: NotificationActionTemplate, url: Optional[str]) -> NotificationAction:
         payload = cls._build_payload(action, url)
 
         return NotificationAction(
@@ -37,19 +98,6 @@ class TemplateActionsBuilder:
             style=action.style,
         )
 
-    @classmethod
-    def _build_url(cls, notification: Notification, action: NotificationActionTemplate) -> str:
-        kwargs = {
-            key: cls._format_value(notification, value)
-            for key, value in action.viewname_kwargs.items()
-        }
-        return reverse(action.viewname, kwargs=kwargs)
-
-    @staticmethod
-    def _format_value(notification: Notification, value: str) -> Any:
-        formatted = value.format(object=notification.content_object)
-        return int(formatted) if formatted.isdigit() else formatted
-
     @staticmethod
     def _build_payload(action: NotificationActionTemplate, url: str | None) -> dict:
         payload: dict[str, Any] = {'url': url} if url else {}
@@ -59,3 +107,8 @@ class TemplateActionsBuilder:
             payload['method'] = action.method
 
         return payload
+
+
+def _format_value(notification: Notification, value: str) -> Any:
+    formatted = value.format(object=notification.content_object)
+    return int(formatted) if formatted.isdigit() else formatted
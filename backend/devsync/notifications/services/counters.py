@@ -0,0 +1,116 @@
+import asyncio
+from collections.abc import Iterable, Mapping
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from config import settings
+from notifications.models import Notification
+
+
+class CacheKeys:
+    UNREAD_COUNT = "user:{user_pk}:notifications:unread"
+
+
+def get_unread_count_key(user_pk: int) -> str:
+    return CacheKeys.UNREAD_COUNT.format(user_pk=user_pk)
+
+
+def count_unread_notifications(user_ids: Iterable[int]) -> dict[int, int]:
+    """Count unread visible notifications of users with one grouped query."""
+    user_ids = list(user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(
+        Notification.visible_objects.filter(
+            user_id__in=user_ids,
+            is_read=False
+        ).values_list(
+            'user_id'
+        ).annotate(
+            count=Count('id')
+        ).order_by()
+    )
+    return counts
+
+
+def get_unread_count(user_id: int) -> int:
+    cache_key = get_unread_count_key(user_id)
+    count = cache.get(cache_key)
+    if count is None:
+        count = count_unread_notifications([user_id])[user_id]
+        cache.add(cache_key, count, settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def change_unread_counts(deltas: Mapping[int, int]) -> None:
+    """
+    Change unread counters of users by the given deltas once the current transaction commits.
+
+    Counters are changed with atomic INCRBY, missing counters are left to be
+    counted lazily on the next read. Users get their new counters over WebSocket.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply_deltas(deltas))
+
+
+def change_unread_count(user_id: int, delta: int) -> None:
+    change_unread_counts({user_id: delta})
+
+
+def reset_unread_count(user_id: int) -> None:
+    """Set the unread counter of the user to zero once all notifications are read or hidden."""
+    def reset():
+        cache.set(get_unread_count_key(user_id), 0, settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT)
+        publish_unread_counts({user_id: 0})
+
+    transaction.on_commit(reset)
+
+
+def refresh_unread_count(user_id: int) -> None:
+    """Recount the unread counter of the user once the current transaction commits."""
+    transaction.on_commit(lambda: publish_unread_counts(reconcile_unread_counts([user_id])))
+
+
+def invalidate_unread_counts(user_ids: Iterable[int]) -> None:
+    cache.delete_many([get_unread_count_key(user_id) for user_id in set(user_ids)])
+
+
+def reconcile_unread_counts(user_ids: Iterable[int]) -> dict[int, int]:
+    """Recount unread counters of users from the database and store them."""
+    counts = count_unread_notifications(user_ids)
+    cache.set_many(
+        {get_unread_count_key(user_id): count for user_id, count in counts.items()},
+        settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT
+    )
+    return counts
+
+
+def _apply_deltas(deltas: Mapping[int, int]) -> None:
+    counts = {}
+    for user_id, delta in deltas.items():
+        try:
+            counts[user_id] = max(cache.incr(get_unread_count_key(user_id), delta), 0)
+        except ValueError:
+            # Counter is not cached, it is counted on the next read
+            continue
+    publish_unread_counts(counts)
+
+
+def publish_unread_counts(counts: Mapping[int, int]) -> None:
+    if counts:
+        async_to_sync(_publish)(counts)
+
+
+async def _publish(counts: Mapping[int, int]) -> None:
+    channel_layer = get_channel_layer()
+    await asyncio.gather(*(
+        channel_layer.group_send(f'user_{user_id}', {
+            'type': 'send_unread_count',
+            'count': count
+        })
+        for user_id, count in counts.items()
+    ))
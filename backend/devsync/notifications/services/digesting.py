@@ -0,0 +1,160 @@
+from collections.abc import Iterable
+from copy import deepcopy
+from dataclasses import asdict
+from datetime import timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model
+from django.utils import timezone
+
+from config import settings
+from notifications.models import Notification, NotificationOutbox, NotificationDigestEvent
+from notifications.services.factories import TemplateNotificationFactory
+from notifications.services.outbox import enqueue_notification_events
+from notifications.services.utils import render_message
+
+
+class NotificationDigester:
+    """
+    Coalesces events of a digested template into one notification per user and window.
+
+    An event, that comes while the user has an unread digest of the template created
+    less than the digest window ago, updates the digest in place instead of creating
+    a new notification, so a burst of events costs UPDATEs and is pushed once per user.
+    Related objects of all events are recorded, so a digest is found by any of them.
+    """
+
+    UPDATE_FIELDS = [
+        'title', 'message', 'rendered_message', 'footnote', 'actions_data',
+        'content_type', 'object_id', 'events_count', 'updated_at'
+    ]
+
+    def __init__(self, factory: TemplateNotificationFactory):
+        if factory.template.digest is None:
+            raise ValueError(f"Template {factory.template.name} is not digested.")
+        self._factory = factory
+
+    def get_open_digests(self, user_ids: Iterable[int]) -> dict[int, Notification]:
+        """
+        Lock the latest open digests of users until the end of the current transaction.
+
+        Returns:
+            Digests by user IDs, users without an open digest are missing
+        """
+        window = timedelta(seconds=self._factory.template.digest.window)
+        digests = Notification.objects.select_for_update().filter(
+            user_id__in=list(user_ids),
+            digest_key=self._factory.template.name,
+            is_read=False,
+            is_hidden=False,
+            created_at__gte=timezone.now() - window
+        ).order_by('created_at', 'id')
+        return {digest.user_id: digest for digest in digests}
+
+    def add_events(
+            self,
+            digests: Iterable[Notification],
+            related_object: Model,
+            context: dict[str, Model]
+    ) -> list[Notification]:
+        """
+        Add an event about the related object to digests and save them with one query.
+
+        Digests point to the latest related object and get its actions.
+        """
+        digests = list(digests)
+        if not digests:
+            return []
+
+        now = timezone.now()
+        for digest in digests:
+            digest.events_count += 1
+            self._apply_count(digest, context)
+            digest.updated_at = now
+        self._retarget(digests, related_object)
+
+        Notification.objects.bulk_update(
+            digests,
+            self.UPDATE_FIELDS,
+            batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE
+        )
+        NotificationDigestEvent.objects.bulk_create(
+            [
+                NotificationDigestEvent(
+                    notification=digest,
+                    content_type_id=digest.content_type_id,
+                    object_id=related_object.id
+                )
+                for digest in digests
+            ],
+            batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        enqueue_notification_events(digests, NotificationOutbox.EventType.UPDATE)
+        return digests
+
+    @staticmethod
+    def record_events(notifications: Iterable[Notification]) -> None:
+        """Record related objects of new digests as their first events."""
+        NotificationDigestEvent.objects.bulk_create(
+            [
+                NotificationDigestEvent(
+                    notification=notification,
+                    content_type_id=notification.content_type_id,
+                    object_id=notification.object_id
+                )
+                for notification in notifications
+                if notification.digest_key and notification.object_id is not None
+            ],
+            batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+    @staticmethod
+    def get_event_object_ids(digest: Notification) -> list[int]:
+        """Get IDs of related objects of all recorded events of the digest."""
+        return list(digest.digest_events.values_list('object_id', flat=True))
+
+    def set_events(
+            self,
+            digest: Notification,
+            related_objects: list[Model],
+            context: dict[str, Model]
+    ) -> Notification:
+        """
+        Keep only events about the related objects in the digest.
+
+        Related objects go from the latest one, the digest points to it and gets its actions.
+        """
+        content_type = ContentType.objects.get_for_model(related_objects[0])
+        digest.digest_events.exclude(
+            content_type=content_type,
+            object_id__in=[related_object.id for related_object in related_objects]
+        ).delete()
+
+        digest.events_count = len(related_objects)
+        self._apply_count(digest, context)
+        self._retarget([digest], related_objects[0])
+        digest.save()
+        return digest
+
+    def _apply_count(self, digest: Notification, context: dict[str, Model]) -> None:
+        template = self._factory.template
+        digest.title = template.digest.title
+        digest.footnote = template.footnote
+        # Count is substituted right away, so stored messages can be re-rendered by context only
+        digest.message = template.digest.message.replace('{count}', str(digest.events_count))
+        digest.rendered_message = render_message(digest.message, context)
+
+    def _retarget(self, digests: list[Notification], related_object: Model) -> None:
+        content_type = ContentType.objects.get_for_model(related_object)
+        for digest in digests:
+            digest.content_type = content_type
+            digest.object_id = related_object.id
+
+        # Actions depend on the related object only, so they are built once
+        prototype = digests[0]
+        Notification.content_object.set_cached_value(prototype, related_object)
+        actions = self._factory.actions_builder.build(prototype)
+        actions_data = {action_name: asdict(action) for action_name, action in actions.items()}
+        for digest in digests:
+            digest.actions_data = deepcopy(actions_data)
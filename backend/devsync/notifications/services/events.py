@@ -0,0 +1,93 @@
+import json
+import logging
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from redis import RedisError
+
+from config import settings
+from config.utils.cache import get_cache_redis
+
+logger = logging.getLogger('django')
+
+
+class StreamKeys:
+    USER_EVENTS = "notifications:user:{user_pk}:events"
+
+
+def get_user_events_key(user_pk: int) -> str:
+    return StreamKeys.USER_EVENTS.format(user_pk=user_pk)
+
+
+def append_events(events: Sequence[tuple[int, dict[str, Any]]]) -> list[Optional[str]]:
+    """
+    Append notification events to bounded per-user Redis streams with one pipeline.
+
+    Streams are trimmed to NOTIFICATION_EVENTS_MAX_LENGTH entries and expire
+    NOTIFICATION_EVENTS_TTL seconds after the last event.
+
+    Args:
+        events: Pairs of user ID and event payload
+
+    Returns:
+        Stream IDs of appended events, None for every event if the log is unavailable
+    """
+    connection = get_cache_redis()
+    if connection is None or not events:
+        return [None] * len(events)
+
+    pipeline = connection.pipeline(transaction=False)
+    for user_id, payload in events:
+        key = get_user_events_key(user_id)
+        pipeline.xadd(
+            key,
+            {'payload': json.dumps(payload)},
+            maxlen=settings.NOTIFICATION_EVENTS_MAX_LENGTH,
+            approximate=True
+        )
+        pipeline.expire(key, settings.NOTIFICATION_EVENTS_TTL)
+
+    try:
+        results = pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to append notification events: {str(e)}")
+        return [None] * len(events)
+    return [event_id.decode() for event_id in results[::2]]
+
+
+def get_missed_events(user_id: int, last_event_id: str) -> Optional[list[tuple[str, dict[str, Any]]]]:
+    """
+    Read events of the user published after last_event_id.
+
+    Args:
+        user_id: ID of the user
+        last_event_id: ID of the last event received by the client
+
+    Returns:
+        Pairs of event ID and payload, or None if some events after last_event_id were
+        already trimmed or expired and the client has to refetch notifications
+    """
+    connection = get_cache_redis()
+    if connection is None:
+        return None
+
+    key = get_user_events_key(user_id)
+    try:
+        pipeline = connection.pipeline(transaction=False)
+        pipeline.xrange(key, min=last_event_id, max=last_event_id)
+        pipeline.xrange(key, min=f'({last_event_id}', count=settings.NOTIFICATION_EVENTS_MAX_LENGTH)
+        last_event, events = pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to read notification events of user {user_id}: {str(e)}")
+        return None
+
+    # Streams are trimmed from the oldest events, so while the last received event is
+    # still in the stream, no event after it was lost
+    if not last_event:
+        return None
+
+    return [
+        (event_id.decode(), json.loads(fields[b'payload']))
+        for event_id, fields in events
+    ]
+
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+from copy import deepcopy
 from typing import Optional, Protocol, runtime_checkable
 
 from django.contrib.auth.models import AbstractUser
@@ -33,6 +35,14 @@ class TemplateNotificationFactory:
         self._template = template
         self._actions_builder = actions_builder or TemplateActionsBuilder(template)
 
+    @property
+    def template(self) -> NotificationTemplate:
+        return self._template
+
+    @property
+    def actions_builder(self) -> NotificationActionsBuilder:
+        return self._actions_builder
+
     def create(self, user: AbstractUser, related_object: Model) -> Notification:
         """Create a notification for the given user and related object."""
         content_type = ContentType.objects.get_for_model(related_object)
@@ -42,8 +52,12 @@ class TemplateNotificationFactory:
         notification = Notification(
             user=user,
             content_type=content_type,
-            object_id=related_object.id
+            object_id=related_object.id,
+            # Notifications of digested templates can absorb similar later events
+            digest_key=self._template.name if self._template.digest else None
         )
+        # Keep the related object cached, so building actions doesn't fetch it again
+        Notification.content_object.set_cached_value(notification, related_object)
         apply_template_to_notification(
             notification,
             self._template,
@@ -52,6 +66,26 @@ class TemplateNotificationFactory:
 
         return notification
 
+    def create_bulk(self, users: Iterable[AbstractUser], related_object: Model) -> list[Notification]:
+        """
+        Create unsaved notifications for many users and the same related object.
+
+        The template is applied and actions are built once, recipients get copies of the result.
+        """
+        users = list(users)
+        if not users:
+            return []
+
+        prototype = self.create(users[0], related_object)
+        fields = {
+            field_name: getattr(prototype, field_name)
+            for field_name in ('content_type', 'object_id', 'title', 'message', 'footnote', 'digest_key')
+        }
+        return [prototype] + [
+            Notification(user=user, actions_data=deepcopy(prototype.actions_data), **fields)
+            for user in users[1:]
+        ]
+
 
 class ContextObjectFactory:
     """Factory for creating notification context objects."""
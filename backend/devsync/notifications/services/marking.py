@@ -0,0 +1,41 @@
+from collections.abc import Collection
+
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import Notification
+from notifications.services.counters import change_unread_count, refresh_unread_count
+
+
+@transaction.atomic
+def mark_notifications(
+        user_id: int,
+        read_ids: Collection[int] = (),
+        hidden_ids: Collection[int] = ()
+) -> None:
+    """
+    Mark notifications of the user as read or hidden with one UPDATE per kind.
+
+    Notifications of other users in the ID lists are ignored.
+
+    Args:
+        user_id: ID of the notifications owner
+        read_ids: IDs of notifications to mark as read
+        hidden_ids: IDs of notifications to hide
+    """
+    now = timezone.now()
+    if read_ids:
+        read_count = Notification.visible_objects.filter(
+            id__in=read_ids,
+            user_id=user_id,
+            is_read=False
+        ).update(is_read=True, updated_at=now)
+        change_unread_count(user_id, -read_count)
+
+    if hidden_ids:
+        hidden_count = Notification.visible_objects.filter(
+            id__in=hidden_ids,
+            user_id=user_id
+        ).update(is_hidden=True, updated_at=now)
+        if hidden_count:
+            refresh_unread_count(user_id)
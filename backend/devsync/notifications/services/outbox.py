@@ -0,0 +1,216 @@
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import timedelta
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+from api.metrics import notification_outbox_lag, notification_outbox_failures
+from config import settings
+from notifications.models import Notification, NotificationOutbox
+from notifications.services.events import append_events
+
+logger = logging.getLogger('django')
+
+
+def enqueue_notification_event(notification: Notification, event_type: NotificationOutbox.EventType) -> None:
+    """
+    Store a notification event in the outbox within the current transaction.
+
+    The event is published to the user's channel group by the dispatcher
+    only after the transaction commits and is dropped together with it on rollback.
+    """
+    enqueue_notification_events([notification], event_type)
+
+
+def enqueue_notification_events(
+        notifications: Iterable[Notification],
+        event_type: NotificationOutbox.EventType
+) -> None:
+    events = NotificationOutbox.objects.bulk_create([
+        NotificationOutbox(
+            user_id=notification.user_id,
+            notification_id=notification.id,
+            event_type=event_type
+        )
+        for notification in notifications
+    ], batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE)
+    if events:
+        transaction.on_commit(_schedule_dispatch)
+
+
+def _schedule_dispatch() -> None:
+    from notifications.tasks import dispatch_notification_outbox
+
+    dispatch_notification_outbox.delay()
+
+
+def dispatch_outbox(batch_size: int = settings.NOTIFICATION_OUTBOX_BATCH_SIZE) -> int:
+    """
+    Publish a batch of pending outbox events to the channel layer.
+
+    Events are claimed with a short transaction, which hides them from other dispatchers
+    for NOTIFICATION_OUTBOX_CLAIM_TIMEOUT seconds, so several dispatchers can drain
+    the outbox concurrently and no row locks are held while publishing. Events
+    of a dispatcher, that died before finishing, are published again after the claim expires.
+    Delivered events are deleted, failed ones are postponed with an exponential
+    backoff and dropped after NOTIFICATION_OUTBOX_MAX_ATTEMPTS attempts.
+
+    Args:
+        batch_size: Maximum number of events published at once
+
+    Returns:
+        Number of processed events
+    """
+    events = _claim_events(batch_size)
+    if not events:
+        return 0
+
+    messages = _build_messages(events)
+    if logged := _log_messages(messages):
+        # Stream IDs are stored before publishing, so events published again are logged once
+        NotificationOutbox.objects.bulk_update(logged, ['event_id'])
+    failed_ids = async_to_sync(_publish)(messages)
+
+    delivered = [event for event in events if event.id not in failed_ids]
+    failed = [event for event in events if event.id in failed_ids]
+    with transaction.atomic():
+        NotificationOutbox.objects.filter(id__in=[event.id for event in delivered]).delete()
+        if failed:
+            _postpone(failed)
+
+    now = timezone.now()
+    for event in delivered:
+        notification_outbox_lag.labels(app='devsync').observe((now - event.created_at).total_seconds())
+    return len(events)
+
+
+@transaction.atomic
+def _claim_events(batch_size: int) -> list[NotificationOutbox]:
+    """Take a batch of available events and postpone them until the claim expires."""
+    now = timezone.now()
+    events = list(NotificationOutbox.objects.select_for_update(
+        skip_locked=True
+    ).filter(
+        available_at__lte=now
+    ).order_by('id')[:batch_size])
+    if events:
+        NotificationOutbox.objects.filter(
+            id__in=[event.id for event in events]
+        ).update(
+            available_at=now + timedelta(seconds=settings.NOTIFICATION_OUTBOX_CLAIM_TIMEOUT)
+        )
+    return events
+
+
+def _build_messages(events: list[NotificationOutbox]) -> list[tuple[NotificationOutbox, dict[str, Any]]]:
+    from notifications.serializers import NotificationSerializer
+
+    notification_ids = {
+        event.notification_id
+        for event in events
+        if event.event_type != NotificationOutbox.EventType.DELETE
+    }
+    notifications = Notification.visible_objects.in_bulk(notification_ids)
+
+    messages = []
+    for event in events:
+        if event.event_type == NotificationOutbox.EventType.DELETE:
+            data = {}
+        elif notification := notifications.get(event.notification_id):
+            data = NotificationSerializer(notification).data
+        else:
+            # Notification was hidden or deleted after the event, a later event covers it
+            continue
+
+        messages.append((event, {
+            'type': 'send_notification',
+            'notification': {
+                'id': event.notification_id,
+                'type': event.event_type,
+                'data': data
+            }
+        }))
+    return messages
+
+
+def _log_messages(messages: list[tuple[NotificationOutbox, dict[str, Any]]]) -> list[NotificationOutbox]:
+    """
+    Append messages to users' event logs, so reconnecting clients can replay them.
+
+    Every event is appended once, retried events keep the stream ID of their first attempt.
+
+    Returns:
+        Events appended by this call
+    """
+    unlogged = []
+    for event, message in messages:
+        if event.event_id:
+            message['notification']['event_id'] = event.event_id
+        else:
+            unlogged.append((event, message))
+
+    event_ids = append_events([
+        (event.user_id, message['notification'])
+        for event, message in unlogged
+    ])
+    logged = []
+    for (event, message), event_id in zip(unlogged, event_ids):
+        if event_id:
+            event.event_id = event_id
+            message['notification']['event_id'] = event_id
+            logged.append(event)
+    return logged
+
+
+async def _publish(messages: list[tuple[NotificationOutbox, dict[str, Any]]]) -> set[int]:
+    """Publish messages concurrently per user, keeping the order of each user's events."""
+    channel_layer = get_channel_layer()
+    user_messages = defaultdict(list)
+    for event, message in messages:
+        user_messages[event.user_id].append((event, message))
+
+    async def publish_user_messages(user_id: int, user_events) -> set[int]:
+        for index, (event, message) in enumerate(user_events):
+            try:
+                await channel_layer.group_send(f'user_{user_id}', message)
+            except Exception as e:
+                logger.warning(f"Failed to publish notification events of user {user_id}: {str(e)}")
+                return {failed_event.id for failed_event, _ in user_events[index:]}
+        return set()
+
+    results = await asyncio.gather(*(
+        publish_user_messages(user_id, user_events)
+        for user_id, user_events in user_messages.items()
+    ))
+    return set().union(*results)
+
+
+def _postpone(events: list[NotificationOutbox]) -> None:
+    notification_outbox_failures.labels(app='devsync').inc(len(events))
+
+    expired_ids = []
+    retried = []
+    now = timezone.now()
+    for event in events:
+        event.attempts += 1
+        if event.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+            expired_ids.append(event.id)
+            continue
+        event.available_at = now + timedelta(
+            seconds=settings.NOTIFICATION_OUTBOX_RETRY_DELAY * 2 ** (event.attempts - 1)
+        )
+        retried.append(event)
+
+    if expired_ids:
+        logger.error(
+            f"Dropped {len(expired_ids)} notification events "
+            f"after {settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS} attempts."
+        )
+        NotificationOutbox.objects.filter(id__in=expired_ids).delete()
+    NotificationOutbox.objects.bulk_update(retried, ['attempts', 'available_at'])
@@ -0,0 +1,75 @@
+from itertools import batched
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Model, Prefetch
+from django.utils import timezone
+
+from config import settings
+from notifications.models import Notification, NotificationContextObject, NotificationOutbox
+from notifications.services.outbox import enqueue_notification_events
+from notifications.services.utils import get_notification_context, render_message
+
+
+def schedule_messages_rerender(context_object: Model) -> None:
+    """Re-render messages referencing the object in background once the current transaction commits."""
+    from notifications.tasks import rerender_notification_messages
+
+    content_type_id = ContentType.objects.get_for_model(context_object).id
+    object_id = context_object.id
+    transaction.on_commit(lambda: rerender_notification_messages.delay(content_type_id, object_id))
+
+
+def rerender_messages(
+        content_type_id: int,
+        object_id: int,
+        batch_size: int = settings.NOTIFICATION_BULK_BATCH_SIZE
+) -> int:
+    """
+    Re-render stored messages of notifications referencing the object in their context.
+
+    Notifications are processed in batches, each batch is updated with one query
+    and visible notifications are pushed to their users as updated.
+
+    Args:
+        content_type_id: Content type of the changed object
+        object_id: ID of the changed object
+        batch_size: Number of notifications re-rendered at once
+
+    Returns:
+        Number of re-rendered notifications
+    """
+    notification_ids = NotificationContextObject.objects.filter(
+        content_type_id=content_type_id,
+        object_id=object_id
+    ).order_by('notification_id').values_list('notification_id', flat=True)
+
+    count = 0
+    for ids in batched(notification_ids, batch_size):
+        notifications = list(Notification.objects.filter(
+            id__in=ids
+        ).prefetch_related(
+            Prefetch(
+                'context_objects',
+                queryset=NotificationContextObject.objects.select_related(
+                    'content_type'
+                ).prefetch_related('content_object'),
+                to_attr='prefetched_context_objects'
+            )
+        ))
+        now = timezone.now()
+        for notification in notifications:
+            notification.updated_at = now
+            notification.rendered_message = render_message(
+                notification.message,
+                get_notification_context(notification)
+            )
+
+        with transaction.atomic():
+            Notification.objects.bulk_update(notifications, ['rendered_message', 'updated_at'])
+            enqueue_notification_events(
+                [notification for notification in notifications if not notification.is_hidden],
+                NotificationOutbox.EventType.UPDATE
+            )
+        count += len(notifications)
+    return count
@@ -0,0 +1,126 @@
+import logging
+import time
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count
+
+from api.metrics import notification_retention_deleted, notification_retention_batch_duration
+from config import settings
+from notifications.models import Notification, NotificationContextObject, NotificationDigestEvent, \
+    NotificationTombstone
+from notifications.services.counters import change_unread_counts
+
+logger = logging.getLogger('django')
+
+
+def delete_notifications_before(
+        cutoff: datetime,
+        batch_size: int = settings.NOTIFICATION_RETENTION_BATCH_SIZE,
+        max_duration: float = settings.NOTIFICATION_RETENTION_MAX_DURATION
+) -> bool:
+    """
+    Delete notifications created before the cutoff in batches for at most max_duration seconds.
+
+    Deletion always continues from the oldest remaining notifications,
+    so an interrupted cleanup is resumed by calling it again with the same cutoff.
+
+    Args:
+        cutoff: Notifications created before this date are deleted
+        batch_size: Maximum number of notifications deleted with one transaction
+        max_duration: Time budget after which the cleanup stops between batches
+
+    Returns:
+        True if all notifications before the cutoff are deleted
+    """
+    started_at = time.monotonic()
+    deleted = 0
+    while time.monotonic() - started_at < max_duration:
+        batch_deleted = delete_notifications_batch(cutoff, batch_size)
+        deleted += batch_deleted
+        if batch_deleted < batch_size:
+            logger.info(f"Deleted {deleted} notifications created before {cutoff.isoformat()}.")
+            return True
+
+    logger.info(f"Deleted {deleted} notifications created before {cutoff.isoformat()}, cleanup is not finished.")
+    return False
+
+
+@transaction.atomic
+def delete_notifications_batch(cutoff: datetime, batch_size: int) -> int:
+    """
+    Delete a batch of the oldest notifications created before the cutoff.
+
+    Rows are deleted with raw DELETE queries together with their context objects,
+    without loading them and sending per-row signals, and unread counters of
+    their users are decreased with one grouped query. Locked rows are skipped,
+    so several cleanups can run concurrently.
+
+    Returns:
+        Number of deleted notifications
+    """
+    started_at = time.monotonic()
+    notification_ids = list(Notification.objects.select_for_update(
+        skip_locked=True
+    ).filter(
+        created_at__lt=cutoff
+    ).order_by('created_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not notification_ids:
+        return 0
+
+    delete_notifications(notification_ids)
+
+    notification_retention_deleted.labels(app='devsync').inc(len(notification_ids))
+    notification_retention_batch_duration.labels(app='devsync').observe(time.monotonic() - started_at)
+    return len(notification_ids)
+
+
+def delete_notifications(notification_ids: list[int]) -> None:
+    """
+    Delete notifications with their context objects and digest events without loading them.
+
+    Unread counters of their users are decreased with one grouped query
+    and tombstones are left for delta sync clients. Must be called inside a transaction.
+    """
+    unread_counts = Notification.visible_objects.filter(
+        id__in=notification_ids,
+        is_read=False
+    ).values_list(
+        'user_id'
+    ).annotate(
+        count=Count('id')
+    ).order_by()
+    change_unread_counts({user_id: -count for user_id, count in unread_counts})
+
+    context_objects = NotificationContextObject.objects.filter(notification_id__in=notification_ids)
+    context_objects._raw_delete(context_objects.db)
+    digest_events = NotificationDigestEvent.objects.filter(notification_id__in=notification_ids)
+    digest_events._raw_delete(digest_events.db)
+    notifications = Notification.objects.filter(id__in=notification_ids)
+    NotificationTombstone.objects.bulk_create(
+        [
+            NotificationTombstone(user_id=user_id, notification_id=notification_id)
+            for notification_id, user_id in notifications.values_list('id', 'user_id')
+        ],
+        batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE
+    )
+    notifications._raw_delete(notifications.db)
+
+
+def delete_tombstones_before(cutoff: datetime, batch_size: int = settings.NOTIFICATION_RETENTION_BATCH_SIZE) -> int:
+    """
+    Delete tombstones of notifications deleted before the cutoff in batches.
+
+    Returns:
+        Number of deleted tombstones
+    """
+    deleted = 0
+    while True:
+        tombstone_ids = list(NotificationTombstone.objects.filter(
+            deleted_at__lt=cutoff
+        ).order_by('deleted_at', 'id').values_list('id', flat=True)[:batch_size])
+        tombstones = NotificationTombstone.objects.filter(id__in=tombstone_ids)
+        tombstones._raw_delete(tombstones.db)
+        deleted += len(tombstone_ids)
+        if len(tombstone_ids) < batch_size:
+            return deleted
@@ -25,8 +25,15 @@ class TemplateActionSchema(BaseModel):
         return self
 
 
+class TemplateDigestSchema(BaseModel):
+    title: str = Field(max_length=128)
+    message: str = Field(max_length=256)
+    window: int = Field(gt=0)
+
+
 class TemplateSchema(BaseModel):
     title: str = Field(max_length=128)
     message: str = Field(max_length=256)
     actions: dict[ActionName, TemplateActionSchema] = Field(default_factory=dict)
     footnote: Optional[str] = Field(max_length=256, default=None)
+    digest: Optional[TemplateDigestSchema] = None
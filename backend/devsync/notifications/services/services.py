@@ -1,17 +1,27 @@
 import logging
 from abc import abstractmethod, ABC
+from collections import Counter, defaultdict
+from collections.abc import Iterable
 from typing import Optional, TypeVar, Generic, Any
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Q
 
-from notifications.models import Notification, NotificationContextObject
+from config import settings
+
+from notifications.models import Notification, NotificationContextObject, NotificationOutbox
 from notifications.services.action_building import TemplateActionsBuilder
 from notifications.services.actions import NotificationAction
-from notifications.services.factories import ContextObjectFactory, NotificationCreator
+from notifications.services.factories import ContextObjectFactory, NotificationCreator, TemplateNotificationFactory
+from notifications.services.counters import change_unread_counts
+from notifications.services.digesting import NotificationDigester
+from notifications.services.outbox import enqueue_notification_events
 from notifications.services.schemes import ActionName
 from notifications.services.template_loading import NotificationTemplateNotFoundError, NotificationTemplateLoader
-from notifications.services.utils import apply_template_to_notification, update_notification_footer
+from notifications.services.utils import apply_template_to_notification, update_notification_footer, \
+    render_message, get_notification_context
 
 logger = logging.getLogger('django')
 
@@ -25,6 +35,14 @@ class NotificationServiceBase(ABC, Generic[T]):
     def create_notification(self, user: AbstractUser, related_object: T, **kwargs: Any) -> Notification:
         """Create a new notification."""
 
+    @abstractmethod
+    def create_notifications_for_objects(
+            self,
+            recipients: Iterable[tuple[AbstractUser, T]],
+            **kwargs: Any
+    ) -> list[Notification]:
+        """Create notifications about different related objects at once."""
+
     @abstractmethod
     def get_notification(self, user: AbstractUser, related_object: T, **kwargs: Any) -> Optional[Notification]:
         """Retrieve an existing notification."""
@@ -51,25 +69,162 @@ class NotificationService(NotificationServiceBase[T]):
     ):
         self._template_loader = template_loader
         self._factory = factory
+        self._actions_builders: dict[str, TemplateActionsBuilder] = {}
+        self._digester: Optional[NotificationDigester] = None
+        if isinstance(factory, TemplateNotificationFactory) and factory.template.digest:
+            self._digester = NotificationDigester(factory)
+
+    @transaction.atomic
+    def create_notification(
+            self,
+            user: AbstractUser,
+            related_object: T,
+            context: Optional[dict[str, models.Model]] = None,
+            **kwargs
+    ) -> Notification:
+        if self._digester is not None:
+            if digest := self._digester.get_open_digests([user.id]).get(user.id):
+                self._digester.add_events([digest], related_object, context or {})
+                return digest
 
-    def create_notification(self, user: AbstractUser, related_object: T, **kwargs) -> Notification:
         notification = self._factory.create(
             user,
             related_object
         )
+        notification.rendered_message = render_message(notification.message, context or {})
         notification.save()
+        if self._digester is not None:
+            self._digester.record_events([notification])
         return notification
 
+    @transaction.atomic
+    def create_notifications_bulk(
+            self,
+            users: Iterable[AbstractUser],
+            related_object: T,
+            context: Optional[dict[str, models.Model]] = None,
+            **kwargs
+    ) -> list[Notification]:
+        """
+        Create notifications about the related object for many users at once.
+
+        Notifications are inserted with bulk queries and published to all recipients
+        with a single outbox batch once the transaction commits. For digested templates,
+        users with an open digest get it updated instead of a new notification.
+
+        Args:
+            users: Recipients of the notification
+            related_object: Object the notifications are about
+            context: Context objects used to render the message
+
+        Returns:
+            List of created notifications and updated digests
+        """
+        digests = []
+        if self._digester is not None:
+            users = list(users)
+            open_digests = self._digester.get_open_digests(user.id for user in users)
+            digests = self._digester.add_events(open_digests.values(), related_object, context or {})
+            users = [user for user in users if user.id not in open_digests]
+
+        if isinstance(self._factory, TemplateNotificationFactory):
+            notifications = self._factory.create_bulk(users, related_object)
+        else:
+            notifications = [self._factory.create(user, related_object) for user in users]
+
+        return self._save_new_notifications(notifications, context) + digests
+
+    @transaction.atomic
+    def create_notifications_for_objects(
+            self,
+            recipients: Iterable[tuple[AbstractUser, T]],
+            context: Optional[dict[str, models.Model]] = None,
+            **kwargs
+    ) -> list[Notification]:
+        """
+        Create notifications about different related objects, one for each recipient, at once.
+
+        Works like create_notifications_bulk, but every user is notified about its own object.
+
+        Args:
+            recipients: Pairs of a user and an object the user is notified about
+            context: Context objects, shared by all notifications, used to render the message
+
+        Returns:
+            List of created notifications and updated digests
+        """
+        recipients = list(recipients)
+        digests = []
+        if self._digester is not None:
+            open_digests = self._digester.get_open_digests(user.id for user, _ in recipients)
+            for user, related_object in recipients:
+                if digest := open_digests.get(user.id):
+                    digests += self._digester.add_events([digest], related_object, context or {})
+            recipients = [(user, related_object) for user, related_object in recipients if user.id not in open_digests]
+
+        notifications = [self._factory.create(user, related_object) for user, related_object in recipients]
+        return self._save_new_notifications(notifications, context) + digests
+
     def get_notification(self, user: AbstractUser, related_object: T, **kwargs) -> Optional[Notification]:
-        try:
-            return Notification.objects.filter(
-                user=user,
-                object_id=related_object.id,
-            ).latest()
-        except Notification.DoesNotExist:
-            logger.warning(f"No notification found for {user} by {related_object}.", exc_info=True)
-            return None
+        content_type = ContentType.objects.get_for_model(related_object)
+        notification = Notification.objects.filter(
+            user_id=user.id,
+            content_type=content_type,
+            object_id=related_object.id,
+        ).order_by('-created_at', '-id').first()
+        if notification is None and self._digester is not None:
+            # Digests point to their latest events, older ones are found by recorded events
+            notification = Notification.objects.filter(
+                user_id=user.id,
+                digest_events__content_type=content_type,
+                digest_events__object_id=related_object.id,
+            ).order_by('-created_at', '-id').first()
+        if notification is None:
+            logger.warning(f"No notification found for {user} by {related_object}.")
+        return notification
+
+    def get_notifications(
+            self,
+            recipients: Iterable[tuple[AbstractUser, T]]
+    ) -> dict[tuple[int, T], Notification]:
+        """
+        Retrieve the latest notifications about many related objects with one query.
+
+        Args:
+            recipients: Pairs of a user and an object the user was notified about
+
+        Returns:
+            Latest notifications by pairs of a user ID and a related object,
+            pairs without notifications are missing
+        """
+        related_objects = defaultdict(dict)
+        user_ids = defaultdict(set)
+        requested = set()
+        for user, related_object in recipients:
+            content_type = ContentType.objects.get_for_model(related_object)
+            related_objects[content_type.id][related_object.id] = related_object
+            user_ids[content_type.id].add(user.id)
+            requested.add((user.id, content_type.id, related_object.id))
+        if not related_objects:
+            return {}
+
+        lookup = Q()
+        for content_type_id, objects in related_objects.items():
+            lookup |= Q(
+                content_type_id=content_type_id,
+                user_id__in=user_ids[content_type_id],
+                object_id__in=objects
+            )
+
+        notifications = {}
+        for notification in Notification.objects.filter(lookup).order_by('created_at', 'id'):
+            if (notification.user_id, notification.content_type_id, notification.object_id) not in requested:
+                continue
+            related_object = related_objects[notification.content_type_id][notification.object_id]
+            notifications[(notification.user_id, related_object)] = notification
+        return notifications
 
+    @transaction.atomic
     def update_notification_by_action(
             self,
             user: AbstractUser,
@@ -80,17 +235,26 @@ class NotificationService(NotificationServiceBase[T]):
         if not notification:
             return None
 
+        if self._is_digest(notification) and self._remove_digest_event(notification, related_object):
+            return notification
+
         action = notification.actions_data.get(action_name)
         if action is None:
             return notification
 
         try:
             action = NotificationAction(**action)
-            template = self._template_loader.get_template(action.payload['next_template'])
+            actions_builder = self._get_actions_builder(action.payload['next_template'])
             apply_template_to_notification(
                 notification,
-                template,
-                TemplateActionsBuilder(template)
+                actions_builder.template,
+                actions_builder
+            )
+            # Handled notifications don't absorb later events as digests
+            notification.digest_key = None
+            notification.rendered_message = render_message(
+                notification.message,
+                get_notification_context(notification)
             )
             notification.save()
         except (KeyError, NotificationTemplateNotFoundError) as e:
@@ -102,12 +266,80 @@ class NotificationService(NotificationServiceBase[T]):
             )
             return notification
 
+    @transaction.atomic
     def delete_notification(self, user: AbstractUser, related_object: T, **kwargs):
         notification = self.get_notification(user, related_object)
         if not notification:
             return
+
+        if self._is_digest(notification) and self._remove_digest_event(notification, related_object):
+            return
         notification.delete()
 
+    def _is_digest(self, notification: Notification) -> bool:
+        return self._digester is not None and notification.events_count > 1
+
+    def _remove_digest_event(self, digest: Notification, related_object: T) -> bool:
+        """
+        Remove the event about the related object from the digest with other pending events.
+
+        Without other pending events the digest is left with this event only,
+        so it's handled like a regular notification about the related object.
+
+        Returns:
+            True if the digest still has other pending events
+        """
+        if pending_objects := self._get_pending_digest_objects(digest, [related_object.id]):
+            self._set_digest_events(digest, pending_objects)
+            return True
+
+        if digest.events_count != 1 or digest.object_id != related_object.id:
+            self._set_digest_events(digest, [related_object])
+        return False
+
+    def _get_pending_digest_objects(self, digest: Notification, excluded_ids: list[int]) -> list[T]:
+        """Get related objects of the digest events that still need the user's attention, the latest first."""
+        if digest.content_type is None:
+            return []
+        return list(digest.content_type.model_class().objects.filter(
+            id__in=self._digester.get_event_object_ids(digest)
+        ).exclude(
+            id__in=excluded_ids
+        ).order_by('-id'))
+
+    def _set_digest_events(self, digest: Notification, related_objects: list[T]) -> None:
+        self._digester.set_events(digest, related_objects, get_notification_context(digest))
+
+    def _save_new_notifications(
+            self,
+            notifications: list[Notification],
+            context: Optional[dict[str, models.Model]]
+    ) -> list[Notification]:
+        """Render and insert notifications, then publish them with a single outbox batch."""
+        for notification in notifications:
+            notification.rendered_message = render_message(notification.message, context or {})
+
+        notifications = Notification.objects.bulk_create(
+            notifications,
+            batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE
+        )
+        if self._digester is not None:
+            self._digester.record_events(notifications)
+        enqueue_notification_events(notifications, NotificationOutbox.EventType.NEW)
+        change_unread_counts(Counter(
+            notification.user_id
+            for notification in notifications
+            if not notification.is_hidden and not notification.is_read
+        ))
+        return notifications
+
+    def _get_actions_builder(self, template_name: str) -> TemplateActionsBuilder:
+        """Get a builder of the template, reusing its compiled action URLs between calls."""
+        if template_name not in self._actions_builders:
+            template = self._template_loader.get_template(template_name)
+            self._actions_builders[template_name] = TemplateActionsBuilder(template)
+        return self._actions_builders[template_name]
+
 
 class NotificationContextServiceBase(ABC):
     """Abstract base class for notification context services."""
@@ -120,6 +352,14 @@ class NotificationContextServiceBase(ABC):
     ) -> list[NotificationContextObject]:
         """Create notification context objects."""
 
+    @staticmethod
+    @abstractmethod
+    def create_contexts(
+            notifications: Iterable[Notification],
+            context_data: dict[str, models.Model]
+    ) -> list[NotificationContextObject]:
+        """Create the same context objects for many notifications."""
+
 
 class NotificationContextService(NotificationContextServiceBase):
     @staticmethod
@@ -134,4 +374,31 @@ class NotificationContextService(NotificationContextServiceBase):
             notification,
             context_data
         )
-        return NotificationContextObject.objects.bulk_create(context_objects)
+        # Digests already have context objects, they are moved to the latest event
+        return NotificationContextObject.objects.bulk_create(
+            context_objects,
+            update_conflicts=True,
+            unique_fields=['notification', 'name'],
+            update_fields=['content_type', 'object_id']
+        )
+
+    @staticmethod
+    def create_contexts(
+            notifications: Iterable[Notification],
+            context_data: dict[str, models.Model]
+    ) -> list[NotificationContextObject]:
+        if not context_data:
+            return []
+
+        context_objects = [
+            context_object
+            for notification in notifications
+            for context_object in ContextObjectFactory.create_context_objects(notification, context_data)
+        ]
+        return NotificationContextObject.objects.bulk_create(
+            context_objects,
+            batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['notification', 'name'],
+            update_fields=['content_type', 'object_id']
+        )
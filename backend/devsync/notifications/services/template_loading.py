@@ -3,12 +3,17 @@ from abc import ABCMeta, abstractmethod
 from functools import lru_cache
 from pathlib import Path
 from types import MappingProxyType
+from typing import Optional
 
 from rest_framework.exceptions import ParseError
 
 from config import settings
-from notifications.services.schemes import TemplateSchema, TemplateActionSchema, ActionName
-from notifications.services.templates import NotificationTemplate, NotificationActionTemplate
+from notifications.services.schemes import TemplateSchema, TemplateActionSchema, TemplateDigestSchema, ActionName
+from notifications.services.templates import (
+    NotificationTemplate,
+    NotificationActionTemplate,
+    NotificationDigestTemplate
+)
 
 
 class NotificationTemplateNotFoundError(Exception):
@@ -79,6 +84,8 @@ class JsonNotificationTemplateLoader(NotificationTemplateLoader):
                 message=validated_scheme.message,
                 actions=MappingProxyType(cls._parse_actions(validated_scheme.actions)),
                 footnote=validated_scheme.footnote,
+                name=template_name,
+                digest=cls._parse_digest(validated_scheme.digest),
             )
         except Exception as e:
             raise ParseError(f"Invalid template {template_name}: {str(e)}")
@@ -90,6 +97,16 @@ class JsonNotificationTemplateLoader(NotificationTemplateLoader):
     ) -> dict[ActionName, NotificationActionTemplate]:
         return {action_name: cls._parse_action(action) for action_name, action in actions.items()}
 
+    @classmethod
+    def _parse_digest(cls, digest: Optional[TemplateDigestSchema]) -> Optional[NotificationDigestTemplate]:
+        if digest is None:
+            return None
+        return NotificationDigestTemplate(
+            title=digest.title,
+            message=digest.message,
+            window=digest.window,
+        )
+
     @classmethod
     def _parse_action(cls, action: TemplateActionSchema) -> NotificationActionTemplate:
         return NotificationActionTemplate(
@@ -18,6 +18,13 @@ class NotificationActionTemplate:
     next_template: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class NotificationDigestTemplate:
+    title: str
+    message: str
+    window: int
+
+
 @dataclass(frozen=True)
 class NotificationTemplate:
     UPDATE_FIELDS: ClassVar[list[str]] = ['title', 'message', 'footnote']
@@ -26,6 +33,8 @@ class NotificationTemplate:
     message: str
     actions: MappingProxyType[ActionName, NotificationActionTemplate] = MappingProxyType({})
     footnote: Optional[str] = None
+    name: Optional[str] = None
+    digest: Optional[NotificationDigestTemplate] = None
 
     def __post_init__(self):
         for field_name in self.UPDATE_FIELDS:
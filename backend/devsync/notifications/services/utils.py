@@ -1,6 +1,8 @@
 from dataclasses import asdict
 from typing import Optional
 
+from django.db.models import Model
+
 from notifications.models import Notification
 from notifications.services.action_building import NotificationActionsBuilder, TemplateActionsBuilder
 from notifications.services.templates import NotificationTemplate
@@ -36,6 +38,36 @@ def apply_template_to_notification(
 
     return notification
 
+
+def render_message(message: str, context_data: dict[str, Model]) -> str:
+    """
+    Formats a notification message with its context objects.
+
+    Args:
+        message: Message with placeholders like {project.title}
+        context_data: Context objects by placeholder names
+
+    Returns:
+        Formatted message or the message itself if it can't be formatted
+    """
+    try:
+        return message.format(**context_data)
+    except (KeyError, AttributeError, IndexError):
+        return message
+
+
+def get_notification_context(notification: Notification) -> dict[str, Model]:
+    """Collects context objects of a notification, using prefetched ones when available."""
+    context_objects = getattr(notification, 'prefetched_context_objects', None)
+    if context_objects is None:
+        context_objects = notification.context_objects.prefetch_related('content_object')
+
+    return {
+        context.name: context.content_object
+        for context in context_objects
+    }
+
+
 def update_notification_footer(notification, *, footnote: str, clear_actions=False) -> Notification:
     """
     Updates notification footer text and optionally clears actions.
@@ -50,9 +82,11 @@ def update_notification_footer(notification, *, footnote: str, clear_actions=Fal
     """
 
     notification.footnote = footnote
-    updated_fields = ['footnote']
+    updated_fields = ['footnote', 'updated_at']
     if clear_actions:
+        # Notifications without actions are handled, so they don't absorb later events as digests
         notification.actions_data = {}
-        updated_fields.append('actions_data')
+        notification.digest_key = None
+        updated_fields.extend(['actions_data', 'digest_key'])
     notification.save(update_fields=updated_fields)
     return notification
@@ -1,13 +1,54 @@
+from itertools import batched
+from typing import Optional
+
 from celery import shared_task
+from django.contrib.auth import get_user_model
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+
+from config import settings
+
+
+@shared_task(bind=True)
+def cleanup_old_notifications(self, cutoff: Optional[str] = None):
+    from notifications.services.retention import delete_notifications_before, delete_tombstones_before
+
+    if cutoff is None:
+        cutoff = (timezone.now() - timedelta(seconds=settings.NOTIFICATION_RETENTION_PERIOD)).isoformat()
+
+    if not delete_notifications_before(datetime.fromisoformat(cutoff)):
+        # Continue in a new task, so a large cleanup doesn't hold the worker
+        self.apply_async((cutoff,))
+        return
+
+    delete_tombstones_before(timezone.now() - timedelta(seconds=settings.NOTIFICATION_TOMBSTONE_PERIOD))
+
+
+@shared_task
+def dispatch_notification_outbox():
+    from notifications.services.outbox import dispatch_outbox
+
+    while dispatch_outbox() == settings.NOTIFICATION_OUTBOX_BATCH_SIZE:
+        pass
+
+
+@shared_task
+def rerender_notification_messages(content_type_id: int, object_id: int):
+    from notifications.services.rendering import rerender_messages
+
+    rerender_messages(content_type_id, object_id)
+
 
 @shared_task
-def cleanup_old_notifications():
-    from notifications.models import Notification
+def reconcile_unread_counts():
+    from notifications.services.counters import reconcile_unread_counts as reconcile
 
-    cutoff = timezone.now() - timedelta(weeks=2)
-    Notification.objects.filter(created_at__lt=cutoff).delete()
+    active_since = timezone.now() - timedelta(seconds=settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT)
+    user_ids = get_user_model().objects.filter(
+        last_seen__gte=active_since
+    ).order_by('id').values_list('id', flat=True)
+    for ids in batched(user_ids, settings.NOTIFICATION_BULK_BATCH_SIZE):
+        reconcile(ids)
 
 
 @shared_task
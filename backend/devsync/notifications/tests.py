@@ -1,3 +1,646 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework.test import APITestCase
+
+from config import settings
+from notifications.consumers import NotificationConsumer
+from notifications.models import Notification, NotificationOutbox, NotificationContextObject, NotificationTombstone
+from notifications.services.counters import get_unread_count
+from notifications.services.events import get_user_events_key
+from notifications.services.marking import mark_notifications
+from notifications.services.outbox import dispatch_outbox
+from notifications.services.rendering import rerender_messages
+from notifications.services.retention import delete_notifications_before
+from notifications.services.services import NotificationContextService
+from projects.exceptions import ProjectInvitationIsExpiredError
+from projects.models import Project, ProjectInvitation, ProjectMember
+from projects.notifications.loaders import json_loader
+from projects.services import ProjectInvitationNotificationService, ProjectInvitationService
+from users import presence
+from users.models import User
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+
+    def _create_notification(self):
+        return Notification.objects.create(user=self.user, title='Title', message='Message')
+
+    def test_events_enqueued_on_write(self):
+        notification = self._create_notification()
+        notification.read()
+        notification.title = 'New title'
+        notification.save()
+        notification.delete()
+
+        self.assertEqual(
+            list(NotificationOutbox.objects.order_by('id').values_list('event_type', flat=True)),
+            ['NEW', 'UPDATE', 'DELETE']
+        )
+
+    def test_dispatch_after_commit(self):
+        with patch('notifications.tasks.dispatch_notification_outbox.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._create_notification()
+        delay.assert_called_once()
+
+    def test_dispatch_publishes_and_deletes_events(self):
+        notification = self._create_notification()
+
+        with patch('channels.layers.InMemoryChannelLayer.group_send') as group_send:
+            self.assertEqual(dispatch_outbox(), 1)
+
+        group_send.assert_called_once()
+        group, message = group_send.call_args.args
+        self.assertEqual(group, f'user_{self.user.id}')
+        self.assertEqual(message['notification']['id'], notification.id)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_dispatch_retries_failed_events(self):
+        self._create_notification()
+
+        with patch('channels.layers.InMemoryChannelLayer.group_send', side_effect=ConnectionError):
+            dispatch_outbox()
+
+        event = NotificationOutbox.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(dispatch_outbox(), 0)
+
+    def test_dispatch_claims_events_before_publishing(self):
+        self._create_notification()
+
+        concurrent_dispatched = []
+
+        async def dispatch_concurrently(*args):
+            concurrent_dispatched.append(await sync_to_async(dispatch_outbox)())
+
+        with patch('channels.layers.InMemoryChannelLayer.group_send', side_effect=dispatch_concurrently):
+            self.assertEqual(dispatch_outbox(), 1)
+
+        # Another dispatcher doesn't take events, that are being published
+        self.assertEqual(concurrent_dispatched, [0])
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationEventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.redis = get_redis_connection("default")
+        self.redis_keys = (
+            get_user_events_key(self.user.id),
+            presence.PresenceKeys.CONNECTIONS,
+            presence.PresenceKeys.CONNECTION_COUNTS
+        )
+        self.redis.delete(*self.redis_keys)
+        self.addCleanup(self.redis.delete, *self.redis_keys)
+
+    def _dispatch(self, **kwargs):
+        with patch('channels.layers.InMemoryChannelLayer.group_send', **kwargs) as group_send:
+            dispatch_outbox()
+        return [call.args[1]['notification'] for call in group_send.call_args_list]
+
+    def _get_stream(self):
+        return self.redis.xrange(get_user_events_key(self.user.id))
+
+    def test_dispatch_logs_events(self):
+        notification = Notification.objects.create(user=self.user, title='Title', message='Message')
+
+        published, = self._dispatch()
+
+        (event_id, fields), = self._get_stream()
+        self.assertEqual(published['event_id'], event_id.decode())
+        self.assertEqual(json.loads(fields[b'payload'])['id'], notification.id)
+
+    def test_retried_events_are_logged_once(self):
+        Notification.objects.create(user=self.user, title='Title', message='Message')
+
+        self._dispatch(side_effect=ConnectionError)
+        event = NotificationOutbox.objects.get()
+        self.assertEqual(len(self._get_stream()), 1)
+        self.assertEqual(event.event_id, self._get_stream()[0][0].decode())
+
+        NotificationOutbox.objects.update(available_at=timezone.now())
+        published, = self._dispatch()
+
+        self.assertEqual(len(self._get_stream()), 1)
+        self.assertEqual(published['event_id'], event.event_id)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    async def _connect(self, last_event_id):
+        communicator = WebsocketCommunicator(
+            NotificationConsumer.as_asgi(),
+            f'/ws/notifications/?last_event_id={last_event_id}'
+        )
+        communicator.scope['user'] = self.user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        unread_count = await communicator.receive_json_from()
+        self.assertEqual(unread_count['type'], 'unread_count')
+        return communicator
+
+    async def test_replay_missed_events(self):
+        first, second = [
+            await Notification.objects.acreate(user=self.user, title='Title', message=message)
+            for message in ('First', 'Second')
+        ]
+        first_published, second_published = await sync_to_async(self._dispatch)()
+
+        communicator = await self._connect(first_published['event_id'])
+
+        replayed = await communicator.receive_json_from()
+        self.assertEqual(replayed['type'], 'notification')
+        self.assertEqual(replayed['data']['id'], second.id)
+        self.assertEqual(replayed['data']['event_id'], second_published['event_id'])
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_replay_requires_resync_after_trimmed_events(self):
+        communicator = await self._connect('1-0')
+
+        message = await communicator.receive_json_from()
+        self.assertEqual(message, {'type': 'resync_required', 'data': {'last_event_id': '1-0'}})
+        await communicator.disconnect()
+
+
+class InvitationNotificationTestMixin:
+    """Creates a project with an invitation and the invitation notification service."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='testpass')
+        self.users = [
+            User.objects.create_user(email=f'user{index}@test.com', password='testpass')
+            for index in range(3)
+        ]
+        self.project = Project.objects.create(title='Test Project', owner=self.owner)
+        self.invitation = ProjectInvitation.objects.create(
+            project=self.project,
+            user=self.users[0],
+            invited_by=self.owner
+        )
+        self.service = ProjectInvitationNotificationService(
+            'invitation',
+            json_loader,
+            NotificationContextService()
+        )
+        ContentType.objects.get_for_models(Project, ProjectInvitation)
+
+
+class NotificationBulkCreateTests(InvitationNotificationTestMixin, APITestCase):
+    def test_create_notifications_bulk(self):
+        # Open digests are looked up, notifications, digest events, outbox events and context objects
+        # are inserted with one query each
+        with self.assertNumQueries(9):
+            notifications = self.service.create_notifications_bulk(self.users, self.invitation)
+
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(NotificationOutbox.objects.count(), 3)
+        self.assertEqual(NotificationContextObject.objects.count(), 3)
+        for notification in Notification.objects.all():
+            self.assertEqual(notification.object_id, self.invitation.id)
+            self.assertIn('accept', notification.actions_data)
+            self.assertEqual(notification.rendered_message, "Дорогой пользователь, Вы приглашены в проект 'Test Project'!")
+
+    def test_get_notifications(self):
+        notifications = self.service.create_notifications_bulk(self.users[:2], self.invitation)
+        Notification.objects.create(
+            user=self.users[0],
+            title='Title',
+            message='Message',
+            content_type=ContentType.objects.get_for_model(Project),
+            object_id=self.invitation.id
+        )
+
+        with self.assertNumQueries(1):
+            found = self.service.get_notifications([(user, self.invitation) for user in self.users])
+
+        self.assertEqual(found, {
+            (self.users[0].id, self.invitation): notifications[0],
+            (self.users[1].id, self.invitation): notifications[1],
+        })
+        self.assertEqual(self.service.get_notification(self.users[0], self.invitation), notifications[0])
+
+
+class NotificationActionUrlTests(InvitationNotificationTestMixin, APITestCase):
+    def test_action_urls(self):
+        notification = self.service.create_notification(self.users[0], self.invitation)
+
+        self.assertEqual(notification.actions_data['accept']['payload']['url'], reverse(
+            'invitation-accept',
+            kwargs={'pk': self.invitation.id}
+        ))
+        self.assertEqual(notification.actions_data['reject']['payload']['url'], reverse(
+            'invitation-reject',
+            kwargs={'pk': self.invitation.id}
+        ))
+
+
+class ProjectInvitationServiceTests(InvitationNotificationTestMixin, APITestCase):
+    def test_invite_users(self):
+        service = ProjectInvitationService(self.service)
+        # Invitations, open digests, notifications, digest events, outbox events and context objects take one query each
+        with self.assertNumQueries(12):
+            invitations = service.invite_users(self.project, self.owner, self.users[1:])
+
+        self.assertEqual(len(invitations), 2)
+        for invitation in invitations:
+            notification = Notification.objects.get(user=invitation.user)
+            self.assertEqual(notification.object_id, invitation.id)
+            self.assertEqual(notification.actions_data['accept']['payload']['url'], reverse(
+                'invitation-accept',
+                kwargs={'pk': invitation.id}
+            ))
+        self.assertEqual(NotificationOutbox.objects.count(), 2)
+        self.assertEqual(NotificationContextObject.objects.count(), 2)
+
+
+class InvitationExpiryTests(InvitationNotificationTestMixin, APITestCase):
+    def test_expire_invitations(self):
+        notification = self.service.create_notification(self.users[0], self.invitation)
+        fresh_invitation = ProjectInvitation.objects.create(
+            project=self.project,
+            user=self.users[1],
+            invited_by=self.owner
+        )
+        self.service.create_notification(self.users[1], fresh_invitation)
+        ProjectInvitation.objects.filter(id=self.invitation.id).update(
+            date_created=timezone.now() - timedelta(days=settings.PROJECT_INVITATION_EXPIRY_DAYS, minutes=1)
+        )
+        NotificationOutbox.objects.all().delete()
+
+        self.assertEqual(ProjectInvitationService(self.service).expire_invitations(batch_size=1), 1)
+
+        self.assertFalse(ProjectInvitation.objects.filter(id=self.invitation.id).exists())
+        self.assertTrue(ProjectInvitation.objects.filter(id=fresh_invitation.id).exists())
+        notification.refresh_from_db()
+        self.assertEqual(notification.footnote, settings.INVITATION_IS_EXPIRED_MESSAGE)
+        self.assertEqual(notification.actions_data, {})
+        self.assertIsNone(notification.digest_key)
+        event = NotificationOutbox.objects.get()
+        self.assertEqual(event.notification_id, notification.id)
+        self.assertEqual(event.event_type, NotificationOutbox.EventType.UPDATE)
+
+
+class NotificationRerenderTests(InvitationNotificationTestMixin, APITestCase):
+    def test_rerender_messages(self):
+        self.service.create_notifications_bulk(self.users, self.invitation)
+        self.project.title = 'Renamed Project'
+        self.project.save()
+
+        count = rerender_messages(ContentType.objects.get_for_model(Project).id, self.project.id)
+
+        self.assertEqual(count, 3)
+        for notification in Notification.objects.all():
+            self.assertIn('Renamed Project', notification.rendered_message)
+
+
+class NotificationDigestTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='testpass')
+        self.user = User.objects.create_user(email='user@test.com', password='testpass')
+        self.projects = [
+            Project.objects.create(title=f'Project {index}', owner=self.owner)
+            for index in range(2)
+        ]
+        self.invitations = [
+            ProjectInvitation.objects.create(project=project, user=self.user, invited_by=self.owner)
+            for project in self.projects
+        ]
+        self.notification_service = ProjectInvitationNotificationService(
+            'invitation',
+            json_loader,
+            NotificationContextService()
+        )
+        self.invitation_service = ProjectInvitationService(self.notification_service)
+
+    def test_digest_events(self):
+        notification = self.notification_service.create_notification(self.user, self.invitations[0])
+        other_user = User.objects.create_user(email='other@test.com', password='testpass')
+
+        notifications = self.notification_service.create_notifications_bulk(
+            [self.user, other_user],
+            self.invitations[1]
+        )
+
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(len(notifications), 2)
+        digest = Notification.objects.get(id=notification.id)
+        self.assertEqual(digest.events_count, 2)
+        self.assertEqual(digest.object_id, self.invitations[1].id)
+        self.assertEqual(
+            digest.rendered_message,
+            "Новых приглашений: 2. Последнее — в проект 'Project 1'. "
+            "Остальные приглашения доступны в списке приглашений."
+        )
+        self.assertEqual(
+            list(NotificationOutbox.objects.filter(notification_id=digest.id).values_list('event_type', flat=True)),
+            ['NEW', 'UPDATE']
+        )
+        self.assertEqual(
+            NotificationContextObject.objects.get(notification=digest, name='project').object_id,
+            self.projects[1].id
+        )
+
+    def test_action_closes_digest(self):
+        notification = self.notification_service.create_notification(self.user, self.invitations[0])
+        self.notification_service.update_notification_by_action(self.user, self.invitations[0], 'accept')
+
+        other_notification = self.notification_service.create_notification(self.user, self.invitations[1])
+
+        self.assertNotEqual(other_notification.id, notification.id)
+        notification.refresh_from_db()
+        self.assertIsNone(notification.digest_key)
+        self.assertEqual(notification.events_count, 1)
+        self.assertEqual(notification.object_id, self.invitations[0].id)
+        self.assertEqual(notification.footnote, "Вы приняли приглашение в проект!")
+
+    def test_delete_retargets_digest(self):
+        for invitation in self.invitations:
+            digest = self.notification_service.create_notification(self.user, invitation)
+
+        self.invitation_service.delete_invitation(self.user, self.invitations[1])
+
+        digest.refresh_from_db()
+        self.assertEqual(digest.events_count, 1)
+        self.assertEqual(digest.object_id, self.invitations[0].id)
+        self.assertEqual(digest.actions_data['accept']['payload']['url'], reverse(
+            'invitation-accept',
+            kwargs={'pk': self.invitations[0].id}
+        ))
+        self.assertIn("Новых приглашений: 1. Последнее — в проект 'Project 0'.", digest.rendered_message)
+
+        self.invitation_service.delete_invitation(self.user, self.invitations[0])
+
+        self.assertFalse(Notification.objects.exists())
+
+    def test_delete_removes_digest_without_pending_invitations(self):
+        for invitation in self.invitations:
+            self.notification_service.create_notification(self.user, invitation)
+        self.invitations[0].delete()
+
+        self.invitation_service.delete_invitation(self.user, self.invitations[1])
+
+        self.assertFalse(Notification.objects.exists())
+
+    def test_accept_latest_invitation_keeps_digest(self):
+        for invitation in self.invitations:
+            digest = self.notification_service.create_notification(self.user, invitation)
+
+        self.invitation_service.accept_invitation(self.user, self.invitations[1])
+
+        digest.refresh_from_db()
+        self.assertEqual(digest.events_count, 1)
+        self.assertEqual(digest.object_id, self.invitations[0].id)
+        self.assertIn('accept', digest.actions_data)
+        self.assertEqual(digest.digest_key, 'invitation')
+
+    def test_accept_folded_invitation(self):
+        for invitation in self.invitations:
+            digest = self.notification_service.create_notification(self.user, invitation)
+
+        self.invitation_service.accept_invitation(self.user, self.invitations[0])
+
+        self.assertTrue(ProjectMember.objects.filter(project=self.projects[0], user=self.user).exists())
+        digest.refresh_from_db()
+        self.assertEqual(digest.events_count, 1)
+        self.assertEqual(digest.object_id, self.invitations[1].id)
+        self.assertIn("Новых приглашений: 1. Последнее — в проект 'Project 1'.", digest.rendered_message)
+
+        self.invitation_service.accept_invitation(self.user, self.invitations[1])
+
+        digest.refresh_from_db()
+        self.assertEqual(digest.footnote, "Вы приняли приглашение в проект!")
+        self.assertEqual(digest.actions_data, {})
+
+    def test_accept_expired_folded_invitation(self):
+        for invitation in self.invitations:
+            digest = self.notification_service.create_notification(self.user, invitation)
+        self._expire(self.invitations[0])
+
+        with self.assertRaises(ProjectInvitationIsExpiredError):
+            self.invitation_service.accept_invitation(self.user, self.invitations[0])
+
+        digest.refresh_from_db()
+        self.assertEqual(digest.events_count, 1)
+        self.assertEqual(digest.object_id, self.invitations[1].id)
+        self.assertIn('accept', digest.actions_data)
+        self.assertNotEqual(digest.footnote, settings.INVITATION_IS_EXPIRED_MESSAGE)
+
+    def test_accept_expired_invitation_without_notification(self):
+        self._expire(self.invitations[0])
+
+        with self.assertRaises(ProjectInvitationIsExpiredError):
+            self.invitation_service.accept_invitation(self.user, self.invitations[0])
+
+    def test_retarget_skips_invitations_outside_digest(self):
+        for invitation in self.invitations:
+            digest = self.notification_service.create_notification(self.user, invitation)
+        # Invitation, the user got outside the digest, isn't counted by it
+        ProjectInvitation.objects.create(
+            project=Project.objects.create(title='Project 2', owner=self.owner),
+            user=self.user,
+            invited_by=self.owner
+        )
+        self._expire(self.invitations[0])
+
+        self.invitation_service.delete_invitation(self.user, self.invitations[1])
+
+        self.assertFalse(Notification.objects.filter(id=digest.id).exists())
+
+    def test_expire_folded_invitation(self):
+        for invitation in self.invitations:
+            digest = self.notification_service.create_notification(self.user, invitation)
+        self._expire(self.invitations[1])
+
+        self.assertEqual(self.invitation_service.expire_invitations(), 1)
+
+        digest.refresh_from_db()
+        self.assertEqual(digest.events_count, 1)
+        self.assertEqual(digest.object_id, self.invitations[0].id)
+        self.assertEqual(digest.digest_key, 'invitation')
+        self.assertEqual(list(digest.digest_events.values_list('object_id', flat=True)), [self.invitations[0].id])
+
+    @staticmethod
+    def _expire(invitation):
+        invitation.date_created = timezone.now() - timedelta(days=settings.PROJECT_INVITATION_EXPIRY_DAYS, minutes=1)
+        ProjectInvitation.objects.filter(id=invitation.id).update(date_created=invitation.date_created)
+
+
+class NotificationUnreadCountTests(APITestCase):
+    url = '/api/v1/notifications/unread_count/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.notifications = [
+            Notification.objects.create(user=self.user, title='Title', message='Message')
+            for _ in range(2)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def _get_count(self):
+        response = self.client.get(self.url)
+        return response.data['count']
+
+    def test_unread_count(self):
+        self.assertEqual(self._get_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, title='Title', message='Message')
+        self.assertEqual(self._get_count(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notifications[0].read()
+            self.notifications[0].read()
+            self.notifications[1].hide()
+        self.assertEqual(self._get_count(), 1)
+
+    def test_unread_count_after_mark_as_read(self):
+        self.assertEqual(self._get_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put('/api/v1/notifications/mark_as_read/')
+        self.assertEqual(self._get_count(), 0)
+
+
+class NotificationFeedTests(APITestCase):
+    url = '/api/v1/notifications/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.notifications = [
+            Notification.objects.create(user=self.user, title=f'Title {index}', message='Message')
+            for index in range(3)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_pagination(self):
+        response = self.client.get(self.url, {'per_page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [notification['id'] for notification in response.data['notifications']],
+            [self.notifications[2].id, self.notifications[1].id]
+        )
+
+        response = self.client.get(response.data['links']['next'])
+        self.assertEqual(
+            [notification['id'] for notification in response.data['notifications']],
+            [self.notifications[0].id]
+        )
+        self.assertIsNone(response.data['links']['next'])
+
+    def test_delta_sync(self):
+        watermark = timezone.now()
+        self.notifications[0].hide()
+        new_notification = Notification.objects.create(user=self.user, title='New', message='Message')
+
+        response = self.client.get(self.url, {'since': watermark.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        data = response.data['notifications']
+        self.assertEqual(
+            [notification['id'] for notification in data],
+            [self.notifications[0].id, new_notification.id]
+        )
+        self.assertTrue(data[0]['is_hidden'])
+
+    def test_delta_sync_deleted_notifications(self):
+        watermark = timezone.now()
+        deleted_id = self.notifications[1].id
+        self.notifications[1].delete()
+
+        response = self.client.get(self.url, {'since': watermark.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['notifications'], [])
+        self.assertEqual(response.data['deleted'], [deleted_id])
+
+    def test_delta_sync_before_tombstone_horizon(self):
+        since = timezone.now() - timedelta(seconds=settings.NOTIFICATION_TOMBSTONE_PERIOD, minutes=1)
+
+        response = self.client.get(self.url, {'since': since.isoformat()})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.data['code'], 'resync_required')
+
+    def test_delta_sync_invalid_since(self):
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationMarkingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@test.com', password='testpass')
+        self.other_user = User.objects.create_user(email='other@test.com', password='testpass')
+        self.notifications = [
+            Notification.objects.create(user=self.user, title='Title', message='Message')
+            for _ in range(3)
+        ]
+        self.other_notification = Notification.objects.create(user=self.other_user, title='Title', message='Message')
+
+    def test_mark_notifications(self):
+        # One UPDATE per kind inside a savepoint
+        with self.assertNumQueries(4):
+            mark_notifications(
+                self.user.id,
+                read_ids=[self.notifications[0].id, self.other_notification.id],
+                hidden_ids=[self.notifications[1].id]
+            )
+
+        self.assertEqual(
+            list(Notification.objects.order_by('id').values_list('is_read', 'is_hidden')),
+            [(True, False), (False, True), (False, False), (False, False)]
+        )
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@test.com', password='testpass')
+        self.old_notifications = [
+            Notification.objects.create(user=self.user, title='Title', message='Message')
+            for _ in range(3)
+        ]
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=30))
+        NotificationContextObject.objects.create(notification=self.old_notifications[0], name='project')
+        self.notification = Notification.objects.create(user=self.user, title='Title', message='Message')
+        NotificationOutbox.objects.all().delete()
+
+    def test_delete_notifications_before(self):
+        self.assertEqual(get_unread_count(self.user.id), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            is_finished = delete_notifications_before(timezone.now() - timedelta(days=14), batch_size=2)
+
+        self.assertTrue(is_finished)
+        self.assertEqual(list(Notification.objects.values_list('id', flat=True)), [self.notification.id])
+        self.assertFalse(NotificationContextObject.objects.exists())
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        self.assertCountEqual(
+            NotificationTombstone.objects.values_list('notification_id', flat=True),
+            [notification.id for notification in self.old_notifications]
+        )
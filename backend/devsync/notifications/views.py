@@ -1,49 +1,95 @@
-from django.db.models import Prefetch
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from api.views import ReadDeleteViewSet
-from notifications.models import Notification, NotificationContextObject
-from notifications.renderers import NotificationRenderer
+from config import settings
+from notifications.models import Notification, NotificationTombstone
+from notifications.paginators import NotificationCursorPagination
 from notifications.serializers import NotificationSerializer
+from notifications.services.counters import get_unread_count, reset_unread_count
 
 
 class NotificationViewSet(ReadDeleteViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    renderer_classes = [NotificationRenderer]
+    pagination_class = NotificationCursorPagination
     lookup_url_kwarg = "notification_pk"
 
     def get_queryset(self):
+        if self.action == 'list' and (since := self._get_since()):
+            # Delta sync also returns notifications hidden after the watermark
+            return Notification.objects.filter(
+                user=self.request.user,
+                updated_at__gt=since
+            )
+
         return Notification.visible_objects.filter(
             user=self.request.user
-        ).select_related(
-            'content_type'
-        ).prefetch_related(
-            Prefetch(
-                'context_objects',
-                queryset=NotificationContextObject.objects.select_related(
-                    'content_type'
-                ).prefetch_related('content_object'),
-                to_attr='prefetched_context_objects'
+        )
+
+    def list(self, request, *args, **kwargs):
+        since = self._get_since()
+        if since is None:
+            return super().list(request, *args, **kwargs)
+
+        if since < timezone.now() - timedelta(seconds=settings.NOTIFICATION_TOMBSTONE_PERIOD):
+            # Deletions older than the kept tombstones are unknown, so the feed is loaded again
+            return Response(
+                {'detail': 'Требуется полная синхронизация уведомлений.', 'code': 'resync_required'},
+                status=status.HTTP_410_GONE
             )
+
+        response = super().list(request, *args, **kwargs)
+        response.data['deleted'] = list(NotificationTombstone.objects.filter(
+            user_id=self.request.user.id,
+            deleted_at__gt=since
+        ).order_by('deleted_at', 'id').values_list('notification_id', flat=True))
+        return response
+
+    def _get_since(self):
+        value = self.request.query_params.get('since')
+        if not value:
+            return None
+
+        since = parse_datetime(value)
+        if since is None:
+            raise ValidationError({'since': 'Expected ISO 8601 date and time.'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    @action(methods=['get'], detail=False)
+    def unread_count(self, request, *args, **kwargs):
+        return Response(
+            {'count': get_unread_count(self.request.user.id)},
+            status=status.HTTP_200_OK
         )
 
     @action(methods=['put'], detail=False)
+    @transaction.atomic
     def mark_as_read(self, request, *args, **kwargs):
         Notification.objects.filter(
             user=self.request.user,
             is_read=False
-        ).update(is_read=True)
+        ).update(is_read=True, updated_at=timezone.now())
+        reset_unread_count(self.request.user.id)
         return Response(
             {'success': True},
             status=status.HTTP_200_OK
         )
 
     @action(methods=['delete'], detail=False)
+    @transaction.atomic
     def all(self, request, *args, **kwargs):
-        self.get_queryset().update(is_hidden=True)
+        self.get_queryset().update(is_hidden=True, updated_at=timezone.now())
+        reset_unread_count(self.request.user.id)
         return Response(
             {'success': True},
             status=status.HTTP_204_NO_CONTENT
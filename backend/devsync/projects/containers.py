@@ -0,0 +1,29 @@
+from dependency_injector import containers, providers
+
+from notifications.services.services import NotificationContextService
+from projects.notifications.loaders import json_loader
+from projects.services import ProjectInvitationNotificationService, ProjectInvitationService
+
+
+class ProjectsContainer(containers.DeclarativeContainer):
+    """Process-wide services of projects, so they are not rebuilt on every request."""
+
+    # Loaded templates are cached in the loader, so it is shared instead of being copied with the container
+    template_loader = providers.Object(json_loader)
+
+    notification_context_service = providers.ThreadSafeSingleton(NotificationContextService)
+
+    invitation_notification_service = providers.ThreadSafeSingleton(
+        ProjectInvitationNotificationService,
+        'invitation',
+        template_loader,
+        notification_context_service
+    )
+
+    invitation_service = providers.ThreadSafeSingleton(
+        ProjectInvitationService,
+        invitation_notification_service
+    )
+
+
+container = ProjectsContainer()
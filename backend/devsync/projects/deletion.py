@@ -0,0 +1,137 @@
+import logging
+import time
+from collections.abc import Callable, Iterator
+from typing import Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import QuerySet
+
+from api.metrics import project_deletion_deleted
+from config import settings
+from config.utils.cache import delete_pattern
+from notifications.models import Notification
+from notifications.services.retention import delete_notifications
+from projects.containers import container
+from projects.models import Project, ProjectMember, ProjectInvitation, Department, MemberDepartment, Task
+from roles.models import Role, MemberRole, RolePermission
+from voting.models import (
+    Voting,
+    VotingResults,
+    VotingTag,
+    VotingTagCatalog,
+    VotingOption,
+    VotingOptionChoice,
+    VotingComment
+)
+
+logger = logging.getLogger('django')
+
+BeforeDelete = Callable[[list[int]], None]
+
+
+@transaction.atomic
+def mark_project_deleting(project: Project) -> None:
+    """
+    Hide the project and schedule the deletion of it with all its data.
+
+    The project disappears from all endpoints right away, while its data
+    is deleted by a Celery task in bounded batches.
+    """
+    from projects.tasks import delete_project
+
+    project.is_deleting = True
+    project.save(update_fields=['is_deleting'])
+    if project.is_public:
+        transaction.on_commit(lambda: delete_pattern(settings.PUBLIC_PROJECTS_CACHE_KEY.format(urlencode='*')))
+    transaction.on_commit(lambda: delete_project.delay(project.id))
+
+
+def delete_project_data(
+        project_id: int,
+        batch_size: int = settings.PROJECT_DELETION_BATCH_SIZE,
+        max_duration: float = settings.PROJECT_DELETION_MAX_DURATION
+) -> bool:
+    """
+    Delete rows depending on the project in batches for at most max_duration seconds.
+
+    Dependents are deleted children first with raw DELETE queries, without loading
+    rows and sending per-row signals, so every batch is a short transaction and
+    an interrupted deletion is resumed by calling it again.
+
+    Args:
+        project_id: ID of the project marked as deleting
+        batch_size: Maximum number of rows deleted with one transaction
+        max_duration: Time budget after which the deletion stops between batches
+
+    Returns:
+        True if no rows depending on the project are left
+    """
+    started_at = time.monotonic()
+    for queryset, before_delete in _get_dependents(project_id):
+        model_name = queryset.model._meta.label
+        deleted = 0
+        while True:
+            if time.monotonic() - started_at >= max_duration:
+                logger.info(f"Deleted {deleted} {model_name} rows of project {project_id}, deletion is not finished.")
+                return False
+
+            batch_deleted = _delete_batch(queryset, batch_size, before_delete)
+            deleted += batch_deleted
+            if batch_deleted < batch_size:
+                break
+
+        if deleted:
+            logger.info(f"Deleted {deleted} {model_name} rows of project {project_id}.")
+
+    return True
+
+
+def _get_dependents(project_id: int) -> Iterator[tuple[QuerySet, Optional[BeforeDelete]]]:
+    # Ordered so that every model goes before the models it references
+    yield VotingOptionChoice.objects.filter(voting_option__voting__project_id=project_id), None
+    # Replies are newer than their parents, so they are deleted first when going from the newest
+    yield VotingComment.objects.filter(voting__project_id=project_id).order_by('-pk'), None
+    yield VotingOption.objects.filter(voting__project_id=project_id), None
+    yield VotingTag.objects.filter(voting__project_id=project_id), None
+    yield VotingResults.objects.filter(voting__project_id=project_id), None
+    yield Voting.objects.filter(project_id=project_id), None
+    yield VotingTagCatalog.objects.filter(project_id=project_id), None
+    yield RolePermission.objects.filter(role__project_id=project_id), None
+    yield MemberRole.objects.filter(role__project_id=project_id), None
+    yield Role.objects.filter(project_id=project_id), None
+    yield Task.assignees.through.objects.filter(task__project_id=project_id), None
+    yield Task.objects.filter(project_id=project_id), None
+    yield MemberDepartment.objects.filter(department__project_id=project_id), None
+    yield Department.objects.filter(project_id=project_id), None
+    yield ProjectInvitation.objects.filter(project_id=project_id), _delete_invitation_notifications
+    yield ProjectMember.objects.filter(project_id=project_id), None
+
+
+@transaction.atomic
+def _delete_batch(queryset: QuerySet, batch_size: int, before_delete: Optional[BeforeDelete]) -> int:
+    if not queryset.ordered:
+        queryset = queryset.order_by('pk')
+    ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+
+    if before_delete is not None:
+        before_delete(ids)
+
+    rows = queryset.model.objects.filter(pk__in=ids)
+    rows._raw_delete(rows.db)
+    project_deletion_deleted.labels(app='devsync', model=queryset.model._meta.label).inc(len(ids))
+    return len(ids)
+
+
+def _delete_invitation_notifications(invitation_ids: list[int]) -> None:
+    # Invitations of a deleted project can't be accepted, so their notifications go too,
+    # while digests with invitations to other projects only lose events about them
+    container.invitation_notification_service().detach_from_digests(invitation_ids)
+    notification_ids = list(Notification.objects.filter(
+        content_type=ContentType.objects.get_for_model(ProjectInvitation),
+        object_id__in=invitation_ids
+    ).values_list('id', flat=True))
+    if notification_ids:
+        delete_notifications(notification_ids)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2025-06-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='is_deleting',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2025-06-18 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0016_project_is_deleting'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectinvitation',
+            index=models.Index(fields=['date_created'], name='projects_pr_date_cr_66d415_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2025-06-18 19:25
+
+import config.utils.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0017_projectinvitation_date_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='avatar',
+            field=config.utils.fields.WEBPField(blank=True, null=True, upload_to='projects/%Y/%m/%d/', variant_sizes=(32, 64, 128, 256), verbose_name='Аватар'),
+        ),
+    ]
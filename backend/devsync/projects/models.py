@@ -7,12 +7,17 @@ from django.dispatch import receiver
 from django.utils.timezone import now
 
 from config.utils.fields import WEBPField
-from config.settings import PROJECT_INVITATION_EXPIRY_DAYS
+from config.settings import AVATAR_SIZES, PROJECT_INVITATION_EXPIRY_DAYS
 
 User = get_user_model()
 
 
-class PublicProjectManager(models.Manager):
+class ProjectManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleting=False)
+
+
+class PublicProjectManager(ProjectManager):
     def get_queryset(self):
         return super().get_queryset().filter(is_public=True)
 
@@ -23,9 +28,12 @@ class Project(models.Model):
     owner = models.ForeignKey(User, related_name='created_projects', on_delete=models.CASCADE)
     description = models.CharField(max_length=1256, blank=True, default='')
     is_public = models.BooleanField(default=True)
-    avatar = WEBPField(upload_to="projects/%Y/%m/%d/", blank=True, null=True, verbose_name="Аватар")
+    avatar = WEBPField(upload_to="projects/%Y/%m/%d/", variant_sizes=AVATAR_SIZES, blank=True, null=True, verbose_name="Аватар")
+    is_deleting = models.BooleanField(default=False)
 
-    objects = models.Manager()
+    # Projects being deleted in the background are hidden everywhere except all_objects
+    objects = ProjectManager()
+    all_objects = models.Manager()
     public_objects = PublicProjectManager()
 
     class Meta:
@@ -72,6 +80,7 @@ class ProjectInvitation(models.Model):
         indexes = [
             models.Index(fields=['user']),
             models.Index(fields=['project']),
+            models.Index(fields=['date_created']),
         ]
         ordering = ['-date_created']
 
@@ -4,5 +4,6 @@ from .department import DepartmentWithMembersSerializer
 from .invitation import (
     ProjectInvitationSerializer,
     ProjectInvitationCreateSerializer,
+    ProjectInvitationBulkCreateSerializer,
     ProjectInvitationActionSerializer,
 )
\ No newline at end of file
@@ -1,9 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
 
+from config import settings
 from projects.models import ProjectInvitation, ProjectMember
 from projects.serializers import ProjectSerializer
 from users.serializers import UserSerializer
 
+User = get_user_model()
+
 
 class ProjectInvitationSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -47,6 +52,51 @@ class ProjectInvitationCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class ProjectInvitationBulkCreateSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.PROJECT_INVITATION_BULK_MAX_SIZE
+    )
+
+    def validate_users(self, value):
+        project_id = self.context['project_pk']
+        user_ids = set(value)
+
+        # Existence, membership and invitations of all users are checked with one query
+        users = list(User.objects.filter(
+            id__in=user_ids
+        ).annotate(
+            is_member=Exists(ProjectMember.objects.filter(project_id=project_id, user_id=OuterRef('pk'))),
+            is_invited=Exists(ProjectInvitation.objects.filter(project_id=project_id, user_id=OuterRef('pk')))
+        ).order_by('id'))
+
+        missing_ids = user_ids - {user.id for user in users}
+        if missing_ids:
+            raise serializers.ValidationError(
+                f"Пользователи не найдены: {_format_ids(missing_ids)}.",
+                code='user_not_found'
+            )
+
+        if member_ids := [user.id for user in users if user.is_member]:
+            raise serializers.ValidationError(
+                f"Пользователи уже являются участниками проекта: {_format_ids(member_ids)}.",
+                code='already_member'
+            )
+
+        if invited_ids := [user.id for user in users if user.is_invited]:
+            raise serializers.ValidationError(
+                f"Пользователи уже имеют приглашение: {_format_ids(invited_ids)}.",
+                code='duplicate_invitation'
+            )
+
+        return users
+
+
+def _format_ids(ids):
+    return ', '.join(str(user_id) for user_id in sorted(ids))
+
+
 class ProjectInvitationActionSerializer(serializers.Serializer):
     def validate(self, attrs):
         invitation: ProjectInvitation = self.context.get('invitation')
@@ -1,13 +1,14 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from config.utils.serializers import WEBPModelSerializer
 from projects.models import Project, ProjectMember
 from users.serializers import UserSerializer
 
 User = get_user_model()
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(WEBPModelSerializer):
     owner = UserSerializer(read_only=True)
 
     class Meta:
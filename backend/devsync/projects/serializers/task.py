@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from config import settings
+from config.utils.serializers import WEBPImageField
 from projects.models import Task, ProjectMember
 from users.serializers import UserSerializer
 
@@ -56,4 +58,8 @@ class TaskSerializerWithAssignees(TaskSerializer):
 
     def get_assignees(self, obj):
         assignees = obj.assignees.all()
-        return UserSerializer(assignees, many=True).data
+        return UserSerializer(
+            assignees,
+            many=True,
+            context={WEBPImageField.SIZE_PARAM: settings.AVATAR_ICON_SIZE, **self.context}
+        ).data
@@ -1,15 +1,23 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Optional
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 
 from config import settings
-from notifications.models import Notification
+from notifications.models import Notification, NotificationOutbox
 from notifications.services.action_building import TemplateActionsBuilder
 from notifications.services.factories import TemplateNotificationFactory
-from notifications.services.services import NotificationService, NotificationContextServiceBase, \
-    NotificationServiceBase
+from notifications.services.outbox import enqueue_notification_events
+from notifications.services.services import NotificationService, NotificationContextServiceBase
 from notifications.services.template_loading import NotificationTemplateLoader
 from notifications.services.utils import update_notification_footer
 from projects.exceptions import ProjectInvitationIsExpiredError
-from projects.models import ProjectInvitation
+from projects.models import Project, ProjectInvitation
 
 
 class ProjectInvitationNotificationService(NotificationService[ProjectInvitation]):
@@ -27,19 +35,162 @@ class ProjectInvitationNotificationService(NotificationService[ProjectInvitation
         self._context_service = context_service
 
     def create_notification(self, user: AbstractUser, invitation: ProjectInvitation, **kwargs) -> Notification:
-        notification = super().create_notification(user, invitation)
+        context = {'project': invitation.project}
+        notification = super().create_notification(user, invitation, context)
+
+        self._context_service.create_context(notification, context)
+        return notification
+
+    @transaction.atomic
+    def create_notifications_bulk(
+            self,
+            users: Iterable[AbstractUser],
+            invitation: ProjectInvitation,
+            **kwargs
+    ) -> list[Notification]:
+        context = {'project': invitation.project}
+        notifications = super().create_notifications_bulk(users, invitation, context)
+
+        self._context_service.create_contexts(notifications, context)
+        return notifications
+
+    @transaction.atomic
+    def create_notifications_for_objects(
+            self,
+            recipients: Iterable[tuple[AbstractUser, ProjectInvitation]],
+            **kwargs
+    ) -> list[Notification]:
+        """Notify users about their invitations to the same project at once."""
+        recipients = list(recipients)
+        if not recipients:
+            return []
+
+        context = {'project': recipients[0][1].project}
+        notifications = super().create_notifications_for_objects(recipients, context)
+
+        self._context_service.create_contexts(notifications, context)
+        return notifications
+
+    @transaction.atomic
+    def expire_notification(self, user: AbstractUser, invitation: ProjectInvitation) -> Optional[Notification]:
+        """
+        Mark the notification about the expired invitation with the expiry footnote.
 
-        self._context_service.create_context(
+        Digests with other pending invitations only lose the event about this one.
+        """
+        notification = self.get_notification(user, invitation)
+        if notification is None:
+            return None
+
+        if self._is_digest(notification) and self._remove_digest_event(notification, invitation):
+            return notification
+        return update_notification_footer(
             notification,
-            {'project': invitation.project}
+            footnote=settings.INVITATION_IS_EXPIRED_MESSAGE,
+            clear_actions=True
         )
-        return notification
+
+    @transaction.atomic
+    def expire_notifications(self, invitation_ids: list[int]) -> None:
+        """
+        Mark notifications about expired invitations with the expiry footnote.
+
+        Notifications get the footnote and lose their actions with one bulk update
+        and are republished with a single outbox batch. Digests with other pending
+        invitations only lose events about the expired ones.
+        """
+        self.detach_from_digests(invitation_ids)
+
+        notifications = list(Notification.objects.filter(
+            content_type=ContentType.objects.get_for_model(ProjectInvitation),
+            object_id__in=invitation_ids
+        ))
+        now = timezone.now()
+        for notification in notifications:
+            notification.footnote = settings.INVITATION_IS_EXPIRED_MESSAGE
+            notification.actions_data = {}
+            notification.digest_key = None
+            notification.updated_at = now
+        Notification.objects.bulk_update(
+            notifications,
+            ['footnote', 'actions_data', 'digest_key', 'updated_at'],
+            batch_size=settings.NOTIFICATION_BULK_BATCH_SIZE
+        )
+        enqueue_notification_events(notifications, NotificationOutbox.EventType.UPDATE)
+
+    def detach_from_digests(self, invitation_ids: list[int]) -> list[int]:
+        """
+        Remove events about the invitations from digests with other pending invitations.
+
+        Digests pointing to one of the invitations are retargeted to the latest pending one.
+
+        Returns:
+            IDs of digests left with other pending invitations
+        """
+        digests = Notification.objects.filter(
+            events_count__gt=1,
+            digest_events__content_type=ContentType.objects.get_for_model(ProjectInvitation),
+            digest_events__object_id__in=invitation_ids
+        ).distinct()
+
+        kept_ids = []
+        for digest in digests:
+            if pending_invitations := self._get_pending_digest_objects(digest, invitation_ids):
+                self._set_digest_events(digest, pending_invitations)
+                kept_ids.append(digest.id)
+        return kept_ids
+
+    def _get_pending_digest_objects(self, digest: Notification, excluded_ids: list[int]) -> list[ProjectInvitation]:
+        """Get invitations of the digest that can still be accepted, the latest first."""
+        return list(ProjectInvitation.objects.filter(
+            id__in=self._digester.get_event_object_ids(digest),
+            project__is_deleting=False,
+            date_created__gt=timezone.now() - timedelta(days=settings.PROJECT_INVITATION_EXPIRY_DAYS)
+        ).exclude(
+            id__in=excluded_ids
+        ).select_related('project').order_by('-date_created', '-id'))
+
+    def _set_digest_events(self, digest: Notification, invitations: list[ProjectInvitation]) -> None:
+        context = {'project': invitations[0].project}
+        self._digester.set_events(digest, invitations, context)
+        self._context_service.create_context(digest, context)
 
 
 class ProjectInvitationService:
-    def __init__(self, notification_service: NotificationServiceBase[ProjectInvitation]):
+    def __init__(self, notification_service: ProjectInvitationNotificationService):
         self._notification_service = notification_service
 
+    @transaction.atomic
+    def invite_users(
+            self,
+            project: Project,
+            invited_by: AbstractUser,
+            users: Iterable[AbstractUser]
+    ) -> list[ProjectInvitation]:
+        """
+        Invite many users to the project and notify them with batched queries.
+
+        Users must be validated beforehand not to be members or invited already,
+        users invited by a concurrent request in between fail the whole batch.
+
+        Raises:
+            ValidationError: If one of the users already has a pending invitation
+        """
+        try:
+            invitations = ProjectInvitation.objects.bulk_create([
+                ProjectInvitation(project=project, user=user, invited_by=invited_by)
+                for user in users
+            ])
+        except IntegrityError:
+            raise ValidationError(
+                {'users': ['Пользователи уже имеют приглашение.']},
+                code='duplicate_invitation'
+            )
+        self._notification_service.create_notifications_for_objects(
+            (invitation.user, invitation) for invitation in invitations
+        )
+        return invitations
+
     def accept_invitation(self, user: AbstractUser, invitation: ProjectInvitation) -> None:
         self._handle_expired_invitation(user, invitation)
         self._notification_service.update_notification_by_action(user, invitation, 'accept')
@@ -53,14 +204,48 @@ class ProjectInvitationService:
     def _handle_expired_invitation(self, user, invitation: ProjectInvitation):
         if not invitation.is_expired():
             return
-        notification = self._notification_service.get_notification(user, invitation)
-        update_notification_footer(
-            notification,
-            footnote=settings.INVITATION_IS_EXPIRED_MESSAGE,
-            clear_actions=True
-        )
+        self._notification_service.expire_notification(user, invitation)
         raise ProjectInvitationIsExpiredError(settings.INVITATION_IS_EXPIRED_MESSAGE)
 
     def delete_invitation(self, user: AbstractUser, invitation: ProjectInvitation) -> None:
-        invitation.delete()
+        # Notification is looked up by the invitation ID, which is cleared by the deletion
         self._notification_service.delete_notification(user, invitation)
+        invitation.delete()
+
+    def expire_invitations(self, batch_size: int = settings.INVITATION_EXPIRY_BATCH_SIZE) -> int:
+        """
+        Delete invitations older than PROJECT_INVITATION_EXPIRY_DAYS in batches.
+
+        Returns:
+            Number of expired invitations
+        """
+        cutoff = timezone.now() - timedelta(days=settings.PROJECT_INVITATION_EXPIRY_DAYS)
+        expired = 0
+        while True:
+            batch_expired = self._expire_invitations_batch(cutoff, batch_size)
+            expired += batch_expired
+            if batch_expired < batch_size:
+                return expired
+
+    @transaction.atomic
+    def _expire_invitations_batch(self, cutoff: datetime, batch_size: int) -> int:
+        """
+        Expire a batch of the oldest invitations created before the cutoff.
+
+        Notifications about the invitations are marked expired, then the invitations
+        are deleted. Locked invitations are skipped.
+
+        Returns:
+            Number of expired invitations
+        """
+        invitation_ids = list(ProjectInvitation.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            date_created__lt=cutoff
+        ).order_by('date_created', 'id').values_list('id', flat=True)[:batch_size])
+        if not invitation_ids:
+            return 0
+
+        self._notification_service.expire_notifications(invitation_ids)
+        ProjectInvitation.objects.filter(id__in=invitation_ids).delete()
+        return len(invitation_ids)
@@ -0,0 +1,26 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger('django')
+
+
+@shared_task(bind=True)
+def delete_project(self, project_id: int):
+    from projects.deletion import delete_project_data
+    from projects.models import Project
+
+    if not delete_project_data(project_id):
+        # Continue in a new task, so a large project doesn't hold the worker
+        self.apply_async((project_id,))
+        return
+
+    # Only the project row and its avatar are left, so the regular deletion is cheap
+    Project.all_objects.filter(pk=project_id, is_deleting=True).delete()
+
+
+@shared_task
+def expire_invitations():
+    from projects.containers import container
+
+    logger.info(f"Expired {container.invitation_service().expire_invitations()} project invitations.")
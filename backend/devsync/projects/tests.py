@@ -1,3 +1,250 @@
-from django.test import TestCase
+import importlib
+import itertools
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+import projects.containers
+import voting.containers
+from config import settings
+from notifications.models import Notification
+from projects.deletion import delete_project_data, mark_project_deleting
+from projects.models import Project, ProjectMember, ProjectInvitation, Department, MemberDepartment, Task
+from projects.notifications.loaders import json_loader as projects_json_loader
+from projects.services import ProjectInvitationService
+from roles.models import Role, MemberRole, RolePermission, Permission, StaticPermissionManager
+from roles.services.enum import PermissionsEnum
+from users.models import User
+from voting.models import (
+    Voting,
+    VotingResults,
+    VotingTag,
+    VotingTagCatalog,
+    VotingOption,
+    VotingOptionChoice,
+    VotingComment
+)
+from voting.notifications.loaders import json_loader as voting_json_loader
+
+
+class ServiceContainerTests(TestCase):
+    def test_url_conf_imports_after_templates_are_loaded(self):
+        # Server commands load templates in AppConfig.ready() before the URL conf creates the containers
+        projects_json_loader.load_templates()
+        voting_json_loader.load_templates()
+
+        importlib.reload(projects.containers)
+        importlib.reload(voting.containers)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+
+        self.assertIs(
+            projects.containers.container.invitation_notification_service()._template_loader,
+            projects_json_loader
+        )
+        self.assertIs(
+            voting.containers.container.voting_ended_notification_service()._template_loader,
+            voting_json_loader
+        )
+
+
+class ProjectDeletionTests(TransactionTestCase):
+    # Every batch is committed, so deleting a model before the models referencing it fails on commit
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='testpass')
+        self.member = User.objects.create_user(email='member@test.com', password='testpass')
+        self.project = Project.objects.create(title='Test Project', owner=self.owner)
+        self.other_project = Project.objects.create(title='Other Project', owner=self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.member)
+
+        permission, _ = Permission.objects.get_or_create(
+            codename=PermissionsEnum.VOTING_MANAGE.value,
+            defaults={'name': 'Voting manage', 'category': 'voting', 'description': ''}
+        )
+        role = Role.objects.create(name='Manager', project=self.project)
+        RolePermission.objects.create(role=role, permission=permission)
+        MemberRole.objects.create(role=role, user=self.member)
+
+        department = Department.objects.create(project=self.project, title='Department')
+        MemberDepartment.objects.create(department=department, user=self.member)
+        task = Task.objects.create(project=self.project, title='Task')
+        task.assignees.add(self.member)
+
+        for index in range(3):
+            voting = Voting.objects.create(
+                title=f'Voting {index}',
+                body='Test description',
+                creator=self.owner,
+                project=self.project,
+                end_date=timezone.now() + timedelta(days=1)
+            )
+            option = VotingOption.objects.create(voting=voting, body='Yes')
+            VotingOption.objects.create(voting=voting, body='No')
+            VotingOptionChoice.objects.create(voting_option=option, user=self.member)
+            comment = VotingComment.objects.create(voting=voting, body='Comment', sender=self.member)
+            VotingComment.objects.create(voting=voting, body='Reply', sender=self.owner, parent_comment=comment)
+            VotingTag.objects.create(voting=voting, tag='tag')
+            VotingResults.objects.create(voting=voting, options=[], votes_count=1)
+        VotingTagCatalog.objects.create(project=self.project, tag='tag')
+
+        invitee = User.objects.create_user(email='invitee@test.com', password='testpass')
+        invitation = ProjectInvitation.objects.create(project=self.project, user=invitee, invited_by=self.owner)
+        Notification.objects.create(
+            user=invitee,
+            title='Invitation',
+            message='Invitation',
+            content_type=ContentType.objects.get_for_model(ProjectInvitation),
+            object_id=invitation.id
+        )
+
+    def _assert_project_data_deleted(self):
+        self.assertFalse(ProjectMember.objects.filter(project=self.project).exists())
+        self.assertFalse(Role.objects.filter(project=self.project).exists())
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+        self.assertFalse(Department.objects.filter(project=self.project).exists())
+        self.assertFalse(Voting.objects.filter(project=self.project).exists())
+        self.assertFalse(VotingComment.objects.exists())
+        self.assertFalse(VotingTagCatalog.objects.exists())
+        self.assertFalse(ProjectInvitation.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertTrue(ProjectMember.objects.filter(project=self.other_project).exists())
+
+    def test_delete_project_data(self):
+        self.assertTrue(delete_project_data(self.project.id, batch_size=2))
+        self._assert_project_data_deleted()
+
+    def test_delete_project_data_resumes(self):
+        # The clock advances on every call, so the run stops after a few batches
+        with patch('projects.deletion.time.monotonic', side_effect=itertools.count()):
+            self.assertFalse(delete_project_data(self.project.id, batch_size=1, max_duration=3))
+        self.assertLess(VotingOptionChoice.objects.count(), 3)
+        self.assertEqual(Voting.objects.filter(project=self.project).count(), 3)
+
+        self.assertTrue(delete_project_data(self.project.id))
+        self._assert_project_data_deleted()
+
+    @patch('projects.deletion.delete_pattern')
+    def test_delete_project_task(self, delete_pattern):
+        mark_project_deleting(self.project)
+
+        delete_pattern.assert_called_once_with(settings.PUBLIC_PROJECTS_CACHE_KEY.format(urlencode='*'))
+        self.assertFalse(Project.all_objects.filter(pk=self.project.id).exists())
+        self._assert_project_data_deleted()
+
+
+@patch('projects.deletion.delete_pattern')
+class ProjectDeletingVisibilityTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='testpass')
+        self.project = Project.objects.create(title='Test Project', owner=self.owner)
+        self.client.force_authenticate(user=self.owner)
+
+    def _mark_project_deleting(self):
+        with patch('projects.tasks.delete_project.delay') as delay, self.captureOnCommitCallbacks(execute=True):
+            mark_project_deleting(self.project)
+        delay.assert_called_once_with(self.project.id)
+
+    def test_deleting_project_is_hidden(self, delete_pattern):
+        self._mark_project_deleting()
+
+        self.assertFalse(Project.objects.filter(pk=self.project.id).exists())
+        self.assertTrue(Project.all_objects.filter(pk=self.project.id).exists())
+        response = self.client.get(reverse('project-detail', kwargs={'pk': self.project.id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deleting_public_project_invalidates_public_list(self, delete_pattern):
+        self._mark_project_deleting()
+
+        delete_pattern.assert_called_once_with(settings.PUBLIC_PROJECTS_CACHE_KEY.format(urlencode='*'))
+        response = self.client.get(reverse('project-public'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(self.project.id, [project['id'] for project in response.data['projects']])
+
+    def test_destroy_project(self, delete_pattern):
+        with patch('projects.tasks.delete_project.delay') as delay, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('project-detail', kwargs={'pk': self.project.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once_with(self.project.id)
+        self.assertTrue(Project.all_objects.get(pk=self.project.id).is_deleting)
+
+
+class ProjectInvitationBulkTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@test.com', password='testpass')
+        self.users = [
+            User.objects.create_user(email=f'user{index}@test.com', password='testpass')
+            for index in range(3)
+        ]
+        self.project = Project.objects.create(title='Test Project', owner=self.owner)
+        self.url = reverse('project-invitations-bulk', kwargs={'project_pk': self.project.id})
+        self.client.force_authenticate(user=self.owner)
+        cache.clear()
+
+    def _invite(self, user_ids):
+        return self.client.post(self.url, {'users': user_ids}, format='json')
+
+    def _assert_rejected(self, response, code):
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['users'][0].code, code)
+
+    def test_bulk_invite(self):
+        response = self._invite([self.users[0].id, self.users[1].id])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertCountEqual(
+            [invitation['user']['id'] for invitation in response.data],
+            [self.users[0].id, self.users[1].id]
+        )
+        self.assertEqual(ProjectInvitation.objects.filter(project=self.project).count(), 2)
+        self.assertEqual(Notification.objects.filter(user__in=self.users[:2]).count(), 2)
+
+    def test_bulk_invite_member(self):
+        ProjectMember.objects.create(project=self.project, user=self.users[0])
+
+        self._assert_rejected(self._invite([self.users[0].id, self.users[1].id]), 'already_member')
+        self.assertFalse(ProjectInvitation.objects.exists())
+
+    def test_bulk_invite_invited_user(self):
+        ProjectInvitation.objects.create(project=self.project, user=self.users[0], invited_by=self.owner)
+
+        self._assert_rejected(self._invite([self.users[0].id, self.users[1].id]), 'duplicate_invitation')
+        self.assertEqual(ProjectInvitation.objects.count(), 1)
+
+    def test_bulk_invite_unknown_user(self):
+        self._assert_rejected(self._invite([self.users[0].id, 0]), 'user_not_found')
+        self.assertFalse(ProjectInvitation.objects.exists())
+
+    def test_bulk_invite_requires_member_manage(self):
+        for codename in (PermissionsEnum.MEMBER_MANAGE.value, PermissionsEnum.PROJECT_MANAGE.value):
+            Permission.objects.get_or_create(
+                codename=codename,
+                defaults={'name': codename, 'category': 'project', 'description': ''}
+            )
+        # Permissions are cached per process, so the created ones are picked up
+        StaticPermissionManager._cached_permissions = None
+        self.addCleanup(setattr, StaticPermissionManager, '_cached_permissions', None)
+        ProjectMember.objects.create(project=self.project, user=self.users[2])
+        self.client.force_authenticate(user=self.users[2])
+
+        response = self._invite([self.users[0].id])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(ProjectInvitation.objects.exists())
+
+    def test_concurrently_invited_user(self):
+        ProjectInvitation.objects.create(project=self.project, user=self.users[0], invited_by=self.owner)
+        service = ProjectInvitationService(projects.containers.container.invitation_notification_service())
+
+        with self.assertRaises(ValidationError) as context:
+            service.invite_users(self.project, self.owner, [self.users[0], self.users[1]])
+
+        self.assertEqual(context.exception.get_codes(), {'users': ['duplicate_invitation']})
+        self.assertEqual(ProjectInvitation.objects.count(), 1)
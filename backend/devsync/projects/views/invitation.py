@@ -3,18 +3,17 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from notifications.services.services import NotificationContextService
+from projects.containers import container
 from projects.exceptions import ProjectInvitationIsExpiredError
 from projects.models import ProjectInvitation
-from projects.notifications.loaders import json_loader
 from projects.renderers import ProjectInvitationListRenderer
 from projects.serializers import (
     ProjectInvitationSerializer,
     ProjectInvitationCreateSerializer,
+    ProjectInvitationBulkCreateSerializer,
     ProjectInvitationActionSerializer,
 )
 from projects.serializers.invitation import ProjectInvitationWithProjectSerializer
-from projects.services import ProjectInvitationService, ProjectInvitationNotificationService
 from projects.views import ProjectBasedReadCreateDeleteViewSet
 from roles.services.permissions import require_permissions
 from roles.services.enum import PermissionsEnum
@@ -25,12 +24,8 @@ class ProjectInvitationViewSet(ProjectBasedReadCreateDeleteViewSet):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._notification_service = ProjectInvitationNotificationService(
-            'invitation',
-            json_loader,
-            NotificationContextService()
-        )
-        self._invitations_service = ProjectInvitationService(self._notification_service)
+        self._notification_service = container.invitation_notification_service()
+        self._invitations_service = container.invitation_service()
 
     def get_queryset(self):
         return ProjectInvitation.objects.filter(
@@ -52,6 +47,24 @@ class ProjectInvitationViewSet(ProjectBasedReadCreateDeleteViewSet):
         self._notification_service.delete_notification(invitation.user, invitation)
         invitation.delete()
 
+    @action(methods=['post'], detail=False, url_path='bulk')
+    @require_permissions(PermissionsEnum.MEMBER_MANAGE)
+    def bulk(self, request, project_pk=None):
+        serializer = ProjectInvitationBulkCreateSerializer(
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        invitations = self._invitations_service.invite_users(
+            self.project,
+            self.request.user,
+            serializer.validated_data['users']
+        )
+        return Response(
+            ProjectInvitationSerializer(invitations, many=True, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['user'] = self.request.user
@@ -66,16 +79,13 @@ class InvitationViewSet(viewsets.ReadOnlyModelViewSet):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._notification_service = ProjectInvitationNotificationService(
-            'invitation',
-            json_loader,
-            NotificationContextService()
-        )
-        self._invitations_service = ProjectInvitationService(self._notification_service)
+        self._notification_service = container.invitation_notification_service()
+        self._invitations_service = container.invitation_service()
 
     def get_queryset(self):
         return ProjectInvitation.objects.filter(
-            user=self.request.user
+            user=self.request.user,
+            project__is_deleting=False
         ).select_related('user', 'project', 'project__owner')
 
     @action(methods=['post'], detail=True)
@@ -18,9 +18,10 @@ from roles.services.checkers import (
 )
 from roles.services.enum import PermissionsEnum
 from roles.services.permissions import require_permissions
+from users.mixins import UserStatusMixin
 
 
-class ProjectMemberViewSet(ProjectMemberBasedReadDeleteViewSet):
+class ProjectMemberViewSet(UserStatusMixin, ProjectMemberBasedReadDeleteViewSet):
     renderer_classes = [ProjectMemberListRenderer]
     serializer_class = ProjectMemberSerializer
     member_lookup = 'pk'
@@ -33,6 +34,9 @@ class ProjectMemberViewSet(ProjectMemberBasedReadDeleteViewSet):
     def get_object(self):
         return self.member
 
+    def get_status_users(self, instances):
+        return [member.user for member in instances]
+
     @require_permissions(
         PermissionsEnum.MEMBER_MANAGE,
         checkers=[
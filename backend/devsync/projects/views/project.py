@@ -8,6 +8,8 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
 from config.settings import PUBLIC_PROJECTS_CACHE_KEY
+from notifications.services.rendering import schedule_messages_rerender
+from projects.deletion import mark_project_deleting
 from projects.filters import ProjectFilter
 from projects.models import Project
 from projects.paginators import PublicProjectPagination
@@ -54,12 +56,20 @@ class ProjectViewSet(ProjectBasedModelViewSet):
         serializer.save(owner=self.request.user)
 
     @require_permissions(PermissionsEnum.PROJECT_MANAGE)
+    @transaction.atomic
     def perform_update(self, serializer):
-        serializer.save(update_fields=['title', 'description', 'is_public', 'avatar'])
+        previous_title = serializer.instance.title
+        project = serializer.save(update_fields=['title', 'description', 'is_public', 'avatar'])
+        if project.title != previous_title:
+            schedule_messages_rerender(project)
+
+    def destroy(self, request, *args, **kwargs):
+        super().destroy(request, *args, **kwargs)
+        return Response(status=status.HTTP_202_ACCEPTED)
 
     @require_permissions(only_owner=True)
     def perform_destroy(self, instance):
-        return super().perform_destroy(instance)
+        mark_project_deleting(instance)
 
     @action(
         methods=['get'],
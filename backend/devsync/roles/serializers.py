@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from config import settings
+from config.utils.serializers import WEBPImageField
 from roles.models import Role, MemberRole, Permission, RolePermission
 from roles.validators import validate_hex_color
 from users.serializers import UserSerializer
@@ -43,7 +45,7 @@ class RoleWithMembersSerializer(RoleSerializer):
         return UserSerializer(
             users,
             many=True,
-            context=self.context
+            context={WEBPImageField.SIZE_PARAM: settings.AVATAR_ICON_SIZE, **self.context}
         ).data
 
 
@@ -33,9 +33,10 @@ from roles.services.crud import (
 )
 from roles.services.enum import PermissionsEnum
 from roles.services.permissions import get_member_permissions, require_permissions
+from users.mixins import UserStatusMixin
 
 
-class RoleViewSet(ProjectBasedModelViewSet):
+class RoleViewSet(UserStatusMixin, ProjectBasedModelViewSet):
     renderer_classes = [RoleListRenderer]
     serializer_class = RoleSerializer
     cache_timeout = 60 * 15
@@ -52,6 +53,15 @@ class RoleViewSet(ProjectBasedModelViewSet):
     def get_object(self):
         return get_role(self.project, int(self.kwargs['pk']), self.cache_timeout)
 
+    def get_status_users(self, instances):
+        if self.get_serializer_class() is not RoleWithMembersSerializer:
+            return []
+        return [
+            member.user
+            for role in instances
+            for member in getattr(role, 'prefetched_members', ())
+        ]
+
     @require_permissions(
         PermissionsEnum.ROLE_MANAGE,
         checkers=[RankChecker(source_path('rank', 1))],
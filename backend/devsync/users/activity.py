@@ -0,0 +1,86 @@
+import logging
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from itertools import batched
+from typing import Optional
+
+from config import settings
+from config.utils.cache import get_cache_redis
+
+logger = logging.getLogger('django')
+
+
+class ActivityKeys:
+    LAST_SEEN = "activity:last_seen"
+    LAST_SEEN_FLUSHING = "activity:last_seen:flushing"
+
+
+# Records the activity time of a user unless it was recorded less than
+# LAST_SEEN_THROTTLE seconds ago and is not flushed yet
+_TOUCH_SCRIPT = """
+local last_seen = redis.call('HGET', KEYS[1], ARGV[1])
+if not last_seen or tonumber(ARGV[2]) - tonumber(last_seen) >= tonumber(ARGV[3]) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+
+def touch(user_id: int) -> None:
+    """Buffer the current activity time of the user with a single Redis command."""
+    if redis := get_cache_redis():
+        touch_script = redis.register_script(_TOUCH_SCRIPT)
+        touch_script(
+            keys=[ActivityKeys.LAST_SEEN],
+            args=[str(user_id), time.time(), settings.LAST_SEEN_THROTTLE]
+        )
+
+
+def record_last_seen(user_ids: Iterable[int], last_seen: datetime) -> None:
+    """Buffer the same activity time for many users, bypassing the throttling."""
+    mapping = {str(user_id): last_seen.timestamp() for user_id in user_ids}
+    if mapping and (redis := get_cache_redis()):
+        redis.hset(ActivityKeys.LAST_SEEN, mapping=mapping)
+
+
+def parse_last_seen(value: Optional[bytes]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(float(value), tz=timezone.utc)
+
+
+def flush_last_seen(batch_size: int = settings.LAST_SEEN_FLUSH_BATCH_SIZE) -> int:
+    """
+    Write buffered activity times to the database in batches.
+
+    The buffer is swapped out with RENAME, so activity recorded during the flush
+    goes to a fresh buffer. A buffer left by an interrupted flush is written first.
+
+    Args:
+        batch_size: Maximum number of users updated with one query
+
+    Returns:
+        Number of flushed users
+    """
+    from users.services import update_users_last_seen
+
+    redis = get_cache_redis()
+    if redis is None:
+        return 0
+
+    if not redis.exists(ActivityKeys.LAST_SEEN_FLUSHING):
+        if not redis.exists(ActivityKeys.LAST_SEEN):
+            return 0
+        redis.rename(ActivityKeys.LAST_SEEN, ActivityKeys.LAST_SEEN_FLUSHING)
+
+    flushed = 0
+    for batch in batched(redis.hscan_iter(ActivityKeys.LAST_SEEN_FLUSHING, count=batch_size), batch_size):
+        update_users_last_seen({
+            int(user_id): parse_last_seen(value)
+            for user_id, value in batch
+        })
+        flushed += len(batch)
+
+    redis.delete(ActivityKeys.LAST_SEEN_FLUSHING)
+    logger.debug(f"Flushed last_seen of {flushed} users.")
+    return flushed
@@ -0,0 +1,149 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import DEFERRED
+from django.db.models.fields.files import FieldFile
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from config import settings
+
+User = get_user_model()
+
+# Profile fields are cached, so serializers don't load them one by one, while credentials like
+# the password hash never are. last_seen is updated in bulk without invalidating cached users.
+CACHED_USER_FIELDS = tuple(
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname not in ('password', 'last_seen')
+)
+
+
+class CacheKeys:
+    TOKEN_USER = "auth:token:{token_hash}:user"
+
+
+def get_token_user_key(token_key: str) -> str:
+    # Token keys are credentials, so only their hashes are stored
+    token_hash = hashlib.sha256(token_key.encode()).hexdigest()
+    return CacheKeys.TOKEN_USER.format(token_hash=token_hash)
+
+
+class _LocalCache:
+    """
+    Small in-process LRU cache with a per-entry TTL.
+
+    Entries are only evicted by their TTL in other processes, so the TTL
+    bounds how long a revoked token can still be accepted by them.
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._max_size = max_size
+        self._timeout = timeout
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_local_cache = _LocalCache(
+    settings.TOKEN_AUTH_LOCAL_CACHE_SIZE,
+    settings.TOKEN_AUTH_LOCAL_CACHE_TIMEOUT
+)
+
+
+def get_user_by_token(token_key: str) -> Optional[User]:
+    """
+    Get the owner of the token without hitting the database on a cache hit.
+
+    Users are looked up in the in-process cache first, then in the shared cache,
+    and are cached as plain values of CACHED_USER_FIELDS, so the cached principal doesn't
+    depend on pickled model state. Uncached fields are deferred and loaded on access.
+
+    Args:
+        token_key: Key of the authentication token
+
+    Returns:
+        Owner of the token or None if the token doesn't exist
+    """
+    cache_key = get_token_user_key(token_key)
+    fields = _local_cache.get(cache_key)
+    if fields is None:
+        fields = cache.get(cache_key)
+        if fields is None:
+            token = Token.objects.select_related('user').filter(key=token_key).first()
+            if token is None:
+                return None
+            fields = _get_user_fields(token.user)
+            cache.set(cache_key, fields, settings.TOKEN_AUTH_CACHE_TIMEOUT)
+        _local_cache.set(cache_key, fields)
+
+    concrete_fields = User._meta.concrete_fields
+    return User.from_db(
+        'default',
+        [field.attname for field in concrete_fields],
+        [fields.get(field.attname, DEFERRED) for field in concrete_fields]
+    )
+
+
+def invalidate_token(token_key: str) -> None:
+    cache_key = get_token_user_key(token_key)
+    _local_cache.delete(cache_key)
+    cache.delete(cache_key)
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    for token_key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(token_key)
+
+
+def _get_user_fields(user: User) -> dict[str, Any]:
+    fields = {}
+    for field in User._meta.concrete_fields:
+        if field.attname in CACHED_USER_FIELDS:
+            value = field.value_from_object(user)
+            # Files are cached by their names, as they are stored in the database
+            fields[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return fields
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that resolves users from the cache instead of a Token and User join."""
+
+    def authenticate_credentials(self, key):
+        user = get_user_by_token(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return user, Token(key=key, user=user)
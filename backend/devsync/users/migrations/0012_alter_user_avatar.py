@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2025-06-18 19:25
+
+import config.utils.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_createsuperuser'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=config.utils.fields.WEBPField(blank=True, null=True, upload_to='users/%Y/%m/%d/', variant_sizes=(32, 64, 128, 256), verbose_name='Аватар'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from collections.abc import Iterable
+from typing import Any
+
+from config.utils.utils import parse_bool
+from users.services import get_users_statuses
+
+
+# noinspection PyUnresolvedReferences
+class UserStatusMixin:
+    """
+    Adds statuses of serialized users if the with_status query parameter is set.
+
+    Statuses of all users in the response are resolved at once and passed
+    to UserSerializer through the 'user_statuses' serializer context.
+    """
+
+    def get_status_users(self, instances: list[Any]) -> Iterable[Any]:
+        """
+        Get users, whose statuses are shown, from serialized instances.
+
+        Serialized instances are users by default, views serializing
+        other models override it to collect users from them.
+        """
+        return instances
+
+    def get_serializer(self, *args, **kwargs):
+        with_status = self.request.query_params.get('with_status', "")
+        if args and parse_bool(with_status):
+            instance, *args = args
+            if kwargs.get('many'):
+                instance = list(instance)
+                instances = instance
+            else:
+                instances = [instance]
+
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['user_statuses'] = get_users_statuses(self.get_status_users(instances))
+            args = [instance, *args]
+        return super().get_serializer(*args, **kwargs)
@@ -1,8 +1,12 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
+from config import settings
 from config.utils.fields import WEBPField
 
 
@@ -27,7 +31,7 @@ class CustomUserManager(BaseUserManager):
 class User(AbstractUser):
     email = models.EmailField(unique=True, null=False, blank=False)
     is_email_verified = models.BooleanField(default=False)
-    avatar = WEBPField(upload_to="users/%Y/%m/%d/", blank=True, null=True, verbose_name="Аватар")
+    avatar = WEBPField(upload_to="users/%Y/%m/%d/", variant_sizes=settings.AVATAR_SIZES, blank=True, null=True, verbose_name="Аватар")
     city = models.CharField(max_length=50, blank=False, default="Москва")
     last_seen = models.DateTimeField(default=timezone.now)
 
@@ -63,3 +67,21 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"User <{self.get_full_name()}> (id: {self.pk})"
+
+
+@receiver(post_save, sender=User)
+def user_updated(sender, instance, created, **kwargs):
+    from users.authentication import invalidate_user_tokens
+
+    # Cached principals are dropped on every change, including deactivation
+    if not created:
+        transaction.on_commit(lambda: invalidate_user_tokens(instance.id))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    from users.authentication import invalidate_token
+
+    # Primary key of the instance is cleared after the deletion, so it is bound now
+    token_key = instance.key
+    transaction.on_commit(lambda: invalidate_token(token_key))
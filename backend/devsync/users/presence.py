@@ -0,0 +1,151 @@
+import logging
+import time
+from collections.abc import Iterable
+from typing import Optional
+
+from config import settings
+from config.utils.cache import get_cache_redis
+
+logger = logging.getLogger('django')
+
+
+class PresenceKeys:
+    CONNECTIONS = "presence:connections"
+    CONNECTION_COUNTS = "presence:connection_counts"
+
+
+# Decrements the connection count of a user and drops it once the user has no connections,
+# so a concurrent connect can't be lost between the decrement and the deletion
+_RELEASE_CONNECTION_SCRIPT = """
+local count = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+if count <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+def _connection_member(user_id: int, connection_id: str) -> str:
+    return f"{user_id}:{connection_id}"
+
+
+def connect(user_id: int, connection_id: str) -> bool:
+    """
+    Register a new connection of the user.
+
+    Args:
+        user_id: ID of the connected user
+        connection_id: Unique ID of the connection
+
+    Returns:
+        True if the user has just become online
+    """
+    redis = get_cache_redis()
+    if redis is None:
+        return False
+
+    pipeline = redis.pipeline()
+    pipeline.zadd(PresenceKeys.CONNECTIONS, {_connection_member(user_id, connection_id): time.time()})
+    pipeline.hincrby(PresenceKeys.CONNECTION_COUNTS, str(user_id), 1)
+    _, count = pipeline.execute()
+    return count == 1
+
+
+def heartbeat(user_id: int, connection_id: str) -> None:
+    """Prolong the connection of the user for another PRESENCE_TIMEOUT seconds."""
+    redis = get_cache_redis()
+    if redis is None:
+        return
+
+    is_prolonged = redis.zadd(
+        PresenceKeys.CONNECTIONS,
+        {_connection_member(user_id, connection_id): time.time()},
+        xx=True,
+        ch=True
+    )
+    if not is_prolonged:
+        # The connection was released by the sweeper while it was stalled
+        connect(user_id, connection_id)
+
+
+def disconnect(user_id: int, connection_id: str) -> None:
+    """
+    Let the connection of the user expire after PRESENCE_DISCONNECT_GRACE seconds.
+
+    The connection is released by the sweeper, so quick reconnects, like page reloads,
+    don't make the user offline and disconnects cost a single Redis command.
+    """
+    if redis := get_cache_redis():
+        expires_at = time.time() - settings.PRESENCE_TIMEOUT + settings.PRESENCE_DISCONNECT_GRACE
+        redis.zadd(
+            PresenceKeys.CONNECTIONS,
+            {_connection_member(user_id, connection_id): expires_at},
+            xx=True
+        )
+
+
+def get_online_statuses(user_ids: Iterable[int]) -> dict[int, bool]:
+    """Check which of the users are online with one Redis command."""
+    user_ids = list(user_ids)
+    redis = get_cache_redis()
+    if redis is None or not user_ids:
+        return dict.fromkeys(user_ids, False)
+
+    counts = redis.hmget(PresenceKeys.CONNECTION_COUNTS, [str(user_id) for user_id in user_ids])
+    return {
+        user_id: is_connected(count)
+        for user_id, count in zip(user_ids, counts)
+    }
+
+
+def is_connected(count: Optional[bytes]) -> bool:
+    """Check a raw connection count of a user read from PresenceKeys.CONNECTION_COUNTS."""
+    return bool(count and int(count) > 0)
+
+
+def is_online(user_id: int) -> bool:
+    return get_online_statuses([user_id])[user_id]
+
+
+def sweep_expired_connections(batch_size: int = settings.PRESENCE_SWEEP_BATCH_SIZE) -> tuple[int, list[int]]:
+    """
+    Release a batch of connections without heartbeats for PRESENCE_TIMEOUT seconds.
+
+    Args:
+        batch_size: Maximum number of connections released at once
+
+    Returns:
+        Number of released connections and IDs of users that went offline
+    """
+    redis = get_cache_redis()
+    if redis is None:
+        return 0, []
+
+    expired = redis.zrangebyscore(
+        PresenceKeys.CONNECTIONS,
+        '-inf',
+        time.time() - settings.PRESENCE_TIMEOUT,
+        start=0,
+        num=batch_size
+    )
+    if not expired:
+        return 0, []
+
+    # Only connections removed by this sweeper are released, in case of concurrent sweepers
+    pipeline = redis.pipeline()
+    for member in expired:
+        pipeline.zrem(PresenceKeys.CONNECTIONS, member)
+    removed = [member for member, is_removed in zip(expired, pipeline.execute()) if is_removed]
+
+    release_connection = redis.register_script(_RELEASE_CONNECTION_SCRIPT)
+    pipeline = redis.pipeline()
+    user_ids = []
+    for member in removed:
+        user_id = int(member.decode().split(':', 1)[0])
+        user_ids.append(user_id)
+        release_connection(keys=[PresenceKeys.CONNECTION_COUNTS], args=[str(user_id)], client=pipeline)
+    counts = pipeline.execute()
+
+    offline_user_ids = {user_id for user_id, count in zip(user_ids, counts) if count <= 0}
+    logger.debug(f"Released {len(removed)} expired connections, {len(offline_user_ids)} users went offline.")
+    return len(expired), list(offline_user_ids)
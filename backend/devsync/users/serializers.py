@@ -4,6 +4,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError, PermissionDenied
 
 from config import settings
+from config.utils.serializers import WEBPModelSerializer
 from .models import User
 from .services import generate_verification_code
 from .tasks import send_verification_code_email
@@ -97,7 +98,7 @@ class TokenCreateSerializer(BaseTokenCreateSerializer):
         return data
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(WEBPModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'email', 'first_name', 'last_name', 'city', 'avatar')
@@ -106,4 +107,35 @@ class UserSerializer(serializers.ModelSerializer):
             "first_name": {"trim_whitespace": True},
             "last_name": {"trim_whitespace": True},
             "city": {"trim_whitespace": True},
-        }
\ No newline at end of file
+        }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if (user_statuses := self.context.get('user_statuses')) is not None:
+            data['status'] = user_statuses.get(instance.id)
+        return data
+
+
+class UserStatusesQuerySerializer(serializers.Serializer):
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            user_ids = {int(user_id) for user_id in value.split(',') if user_id.strip()}
+        except ValueError:
+            raise ValidationError(
+                "ID пользователей должны быть целыми числами.",
+                code="invalid_ids"
+            )
+
+        if not user_ids:
+            raise ValidationError(
+                "Необходимо указать хотя бы одного пользователя.",
+                code="empty_ids"
+            )
+        if len(user_ids) > settings.USER_STATUSES_MAX_SIZE:
+            raise ValidationError(
+                f"Нельзя запросить статусы более чем {settings.USER_STATUSES_MAX_SIZE} пользователей.",
+                code="too_many_ids"
+            )
+        return list(user_ids)
@@ -1,12 +1,18 @@
+from collections.abc import Iterable, Mapping
 from datetime import datetime
 from random import randint
 from typing import Any
 
-from django.core.cache import cache
+from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
-from django.utils import timezone
+from django.db.models import Case, DateTimeField, Value, When
+from django.db.models.functions import Greatest
 
 from config import settings
+from config.utils.cache import get_cache_redis
+from users import activity, presence
+
+User = get_user_model()
 
 
 def generate_verification_code() -> str:
@@ -23,64 +29,73 @@ def send_email(subject: str, message: str, user_email: str) -> None:
     )
 
 
-_TIMEOUT = 60 * 60 * 24
-
+def update_users_last_seen(last_seen: Mapping[int, datetime]) -> None:
+    """
+    Update last_seen of many users with one UPDATE ... SET last_seen = GREATEST(last_seen, CASE ...) query.
 
-def get_status_cache_key(user_id: int) -> str:
-    return f"user_status:{user_id}"
+    last_seen never moves backwards, so stale values written late are ignored.
+    """
+    if not last_seen:
+        return
 
-def get_last_seen_cache_key(user_id: int) -> str:
-    return f"user_last_seen:{user_id}"
+    User.objects.filter(id__in=last_seen).update(last_seen=Greatest(
+        'last_seen',
+        Case(
+            *[When(id=user_id, then=Value(time)) for user_id, time in last_seen.items()],
+            output_field=DateTimeField()
+        )
+    ))
 
 
-def update_user_status(user: Any, is_online: bool, timeout: int = _TIMEOUT) -> None:
-    time = timezone.now()
-    update_user_last_seen(user, time, timeout)
-    update_status_cache(user.id, is_online, timeout)
+def get_user_status(user: Any) -> dict[str, Any]:
+    return get_users_statuses([user])[user.id]
 
 
-def update_user_last_seen(user: Any, time: datetime, timeout: int = _TIMEOUT) -> None:
-    user.last_seen = time
-    user.save()
+def get_users_statuses(users: Iterable[Any]) -> dict[int, dict[str, Any]]:
+    """
+    Get statuses of many users with a single Redis round trip.
 
-    update_last_seen_cache(user.id, time, timeout)
+    Online flags and buffered last_seen values are read with two pipelined HMGETs,
+    users without a buffered last_seen fall back to their User.last_seen.
 
+    Args:
+        users: Users with loaded last_seen
 
-def get_user_status(user: Any, timeout: int = _TIMEOUT) -> dict[str, Any]:
-    cache_key = get_status_cache_key(user.id)
-    if status_cached := cache.get(cache_key):
-        is_online = status_cached
-    else:
-        is_online = False
-        update_status_cache(user.id, is_online, timeout)
+    Returns:
+        Statuses of users by their IDs
+    """
+    users = {user.id: user for user in users}
+    if not users:
+        return {}
 
-    cache_key = get_last_seen_cache_key(user.id)
-    if last_seen_cached := cache.get(cache_key):
-        last_seen = last_seen_cached
-    else:
-        last_seen = user.last_seen
-        update_last_seen_cache(user.id, last_seen, timeout)
-    status_data = {
-        'is_online': is_online,
-        'last_seen': last_seen,
+    online_statuses, pending_last_seen = _get_cached_statuses(list(users))
+    return {
+        user_id: {
+            'is_online': online_statuses[user_id],
+            'last_seen': max(filter(None, (pending_last_seen.get(user_id), user.last_seen)), default=None),
+        }
+        for user_id, user in users.items()
     }
 
-    return status_data
-
-
-def update_last_seen_user(user: Any, timeout: int = _TIMEOUT) -> None:
-    time = timezone.now()
-    user.last_seen = time
-    user.save()
 
-    update_last_seen_cache(user.id, time, timeout)
+def _get_cached_statuses(user_ids: list[int]) -> tuple[dict[int, bool], dict[int, datetime]]:
+    redis = get_cache_redis()
+    if redis is None:
+        return presence.get_online_statuses(user_ids), {}
 
+    fields = [str(user_id) for user_id in user_ids]
+    pipeline = redis.pipeline(transaction=False)
+    pipeline.hmget(presence.PresenceKeys.CONNECTION_COUNTS, fields)
+    pipeline.hmget(activity.ActivityKeys.LAST_SEEN, fields)
+    counts, values = pipeline.execute()
 
-def update_status_cache(user_id: int, is_online: bool, timeout: int = _TIMEOUT) -> None:
-    cache_key = get_status_cache_key(user_id)
-    cache.set(cache_key, is_online, timeout=timeout)
-
-
-def update_last_seen_cache(user_id: int, time: datetime, timeout: int = _TIMEOUT) -> None:
-    cache_key = get_last_seen_cache_key(user_id)
-    cache.set(cache_key, time, timeout=timeout)
+    online_statuses = {
+        user_id: presence.is_connected(count)
+        for user_id, count in zip(user_ids, counts)
+    }
+    pending_last_seen = {
+        user_id: activity.parse_last_seen(value)
+        for user_id, value in zip(user_ids, values)
+        if value is not None
+    }
+    return online_statuses, pending_last_seen
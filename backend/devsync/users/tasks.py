@@ -1,5 +1,6 @@
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
+from django.utils import timezone
 
 from config import settings
 from config.celery import app
@@ -21,3 +22,22 @@ def send_verification_code_email(user_full_name: str, verification_code: str, us
     )
     message.attach_alternative(html_message, "text/html")
     message.send()
+
+
+@app.task
+def sweep_presence():
+    from users.activity import record_last_seen
+    from users.presence import sweep_expired_connections
+
+    while True:
+        released_count, offline_user_ids = sweep_expired_connections(settings.PRESENCE_SWEEP_BATCH_SIZE)
+        record_last_seen(offline_user_ids, timezone.now())
+        if released_count < settings.PRESENCE_SWEEP_BATCH_SIZE:
+            break
+
+
+@app.task
+def flush_last_seen():
+    from users.activity import flush_last_seen as flush
+
+    flush()
@@ -1,3 +1,358 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.client import Pipeline
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from config import settings
+from projects.models import Project
+from users import activity, presence
+from users.authentication import (
+    CachedTokenAuthentication,
+    CACHED_USER_FIELDS,
+    get_token_user_key,
+    get_user_by_token,
+    _local_cache
+)
+from users.models import User
+from users.serializers import UserSerializer
+from users.services import get_users_statuses, update_users_last_seen
+from users.tasks import sweep_presence
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass',
+            first_name='Ivan',
+            last_name='Ivanov'
+        )
+        self.token_key = Token.objects.create(user=self.user).key
+        self.cache_key = get_token_user_key(self.token_key)
+        self.addCleanup(self._clear_cache)
+
+    def _clear_cache(self):
+        _local_cache.delete(self.cache_key)
+        cache.delete(self.cache_key)
+
+    def _authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.token_key)
+
+    def test_cache_hit(self):
+        self._authenticate()
+        with self.assertNumQueries(0):
+            user, token = self._authenticate()
+
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(user.get_full_name(), 'Ivan Ivanov')
+        self.assertEqual(token.key, self.token_key)
+
+    def test_cache_hit_from_shared_cache(self):
+        self._authenticate()
+        _local_cache.delete(self.cache_key)
+
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+        self.assertEqual(user.email, 'user@test.com')
+
+    def test_password_is_not_cached(self):
+        self._authenticate()
+
+        self.assertEqual(set(cache.get(self.cache_key)), set(CACHED_USER_FIELDS))
+        with self.assertNumQueries(1):
+            user = get_user_by_token(self.token_key)
+            self.assertTrue(user.check_password('testpass'))
+
+    def test_profile_fields_are_cached(self):
+        User.objects.filter(pk=self.user.pk).update(avatar='users/avatar.webp')
+        self._authenticate()
+
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate()
+            data = UserSerializer(user).data
+        self.assertEqual(data['city'], self.user.city)
+        self.assertEqual(data['avatar'], '/media/users/avatar.webp')
+
+    def test_token_delete_invalidates_cache(self):
+        self._authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.get(key=self.token_key).delete()
+
+        self.assertIsNone(cache.get(self.cache_key))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self._authenticate()
+
+    def test_user_save_invalidates_cache(self):
+        self._authenticate()
+        self.user.first_name = 'Petr'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        self.assertIsNone(cache.get(self.cache_key))
+        user, _ = self._authenticate()
+        self.assertEqual(user.first_name, 'Petr')
+
+    def test_deactivated_user_is_rejected(self):
+        self._authenticate()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self._authenticate()
+
+    def test_local_cache_expires(self):
+        self._authenticate()
+        cache.delete(self.cache_key)
+
+        with patch('users.authentication.time.monotonic', return_value=float('inf')):
+            with self.assertNumQueries(1):
+                self._authenticate()
+
+
+class RedisTestMixin:
+    """Clears presence and activity keys of the shared Redis around every test."""
+    redis_keys = (
+        presence.PresenceKeys.CONNECTIONS,
+        presence.PresenceKeys.CONNECTION_COUNTS,
+        activity.ActivityKeys.LAST_SEEN,
+        activity.ActivityKeys.LAST_SEEN_FLUSHING,
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.redis = get_redis_connection("default")
+        self.redis.delete(*self.redis_keys)
+        self.addCleanup(self.redis.delete, *self.redis_keys)
+
+
+class UserStatusTests(RedisTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.last_seen = timezone.now() - timedelta(days=1)
+        self.user = User.objects.create_user(email='user@test.com', password='testpass', last_seen=self.last_seen)
+        self.other_user = User.objects.create_user(
+            email='other@test.com',
+            password='testpass',
+            last_seen=self.last_seen
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_get_users_statuses(self):
+        presence.connect(self.user.id, 'connection')
+        buffered_last_seen = (timezone.now() - timedelta(minutes=1)).replace(microsecond=0)
+        activity.record_last_seen([self.user.id], buffered_last_seen)
+
+        with self.assertNumQueries(0), patch.object(
+                Pipeline, 'execute', autospec=True, side_effect=Pipeline.execute
+        ) as execute:
+            statuses = get_users_statuses([self.user, self.other_user])
+
+        execute.assert_called_once()
+        self.assertEqual(statuses, {
+            self.user.id: {'is_online': True, 'last_seen': buffered_last_seen},
+            self.other_user.id: {'is_online': False, 'last_seen': self.last_seen},
+        })
+
+    def test_get_users_statuses_keeps_newer_last_seen(self):
+        activity.record_last_seen([self.user.id], self.last_seen - timedelta(days=1))
+
+        statuses = get_users_statuses([self.user])
+        self.assertEqual(statuses[self.user.id]['last_seen'], self.last_seen)
+
+    def test_statuses(self):
+        presence.connect(self.other_user.id, 'connection')
+
+        response = self.client.get(reverse('user-statuses'), {'ids': f'{self.user.id},{self.other_user.id}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = {user_status['id']: user_status for user_status in response.data}
+        self.assertEqual(set(statuses), {self.user.id, self.other_user.id})
+        self.assertFalse(statuses[self.user.id]['is_online'])
+        self.assertTrue(statuses[self.other_user.id]['is_online'])
+        self.assertEqual(statuses[self.user.id]['last_seen'], self.last_seen)
+
+    def test_statuses_invalid_ids(self):
+        response = self.client.get(reverse('user-statuses'), {'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_members_with_status(self):
+        project = Project.objects.create(title='Test Project', owner=self.user)
+        presence.connect(self.user.id, 'connection')
+        url = reverse('project-members-list', kwargs={'project_pk': project.id})
+
+        response = self.client.get(url, {'with_status': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_data = response.data[0]['user']
+        self.assertEqual(user_data['status'], {'is_online': True, 'last_seen': self.last_seen})
+
+        response = self.client.get(url)
+        self.assertNotIn('status', response.data[0]['user'])
+
+
+class LastSeenTests(RedisTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.last_seen = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        self.users = [
+            User.objects.create_user(email=f'user{index}@test.com', password='testpass', last_seen=self.last_seen)
+            for index in range(3)
+        ]
+
+    def _get_buffered(self, user_id, key=activity.ActivityKeys.LAST_SEEN):
+        return activity.parse_last_seen(self.redis.hget(key, str(user_id)))
+
+    def _get_last_seen(self, user):
+        user.refresh_from_db(fields=['last_seen'])
+        return user.last_seen
+
+    @patch('users.activity.time')
+    def test_touch_is_throttled(self, time):
+        user_id = self.users[0].id
+        started_at = self.last_seen.timestamp()
+
+        time.time.return_value = started_at
+        activity.touch(user_id)
+        time.time.return_value = started_at + settings.LAST_SEEN_THROTTLE - 1
+        activity.touch(user_id)
+        self.assertEqual(self._get_buffered(user_id).timestamp(), started_at)
+
+        time.time.return_value = started_at + settings.LAST_SEEN_THROTTLE
+        activity.touch(user_id)
+        self.assertEqual(self._get_buffered(user_id).timestamp(), started_at + settings.LAST_SEEN_THROTTLE)
+
+    def test_update_users_last_seen_never_moves_backwards(self):
+        newer = self.last_seen + timedelta(hours=1)
+        older = self.last_seen - timedelta(hours=1)
+
+        with self.assertNumQueries(1):
+            update_users_last_seen({self.users[0].id: newer, self.users[1].id: older})
+
+        self.assertEqual(self._get_last_seen(self.users[0]), newer)
+        self.assertEqual(self._get_last_seen(self.users[1]), self.last_seen)
+        self.assertEqual(self._get_last_seen(self.users[2]), self.last_seen)
+
+    def test_flush_last_seen(self):
+        newer = self.last_seen + timedelta(hours=1)
+        activity.record_last_seen([user.id for user in self.users[:2]], newer)
+
+        self.assertEqual(activity.flush_last_seen(batch_size=1), 2)
+
+        self.assertEqual(self._get_last_seen(self.users[0]), newer)
+        self.assertEqual(self._get_last_seen(self.users[1]), newer)
+        self.assertEqual(self._get_last_seen(self.users[2]), self.last_seen)
+        self.assertFalse(self.redis.exists(activity.ActivityKeys.LAST_SEEN, activity.ActivityKeys.LAST_SEEN_FLUSHING))
+
+    def test_flush_last_seen_keeps_activity_recorded_during_flush(self):
+        newer = self.last_seen + timedelta(hours=1)
+        activity.record_last_seen([self.users[0].id], newer)
+
+        def record_during_flush(last_seen):
+            activity.record_last_seen([self.users[1].id], newer)
+            update_users_last_seen(last_seen)
+
+        with patch('users.services.update_users_last_seen', side_effect=record_during_flush):
+            self.assertEqual(activity.flush_last_seen(), 1)
+
+        self.assertEqual(self._get_last_seen(self.users[0]), newer)
+        self.assertEqual(self._get_last_seen(self.users[1]), self.last_seen)
+        self.assertEqual(self._get_buffered(self.users[1].id), newer)
+
+    def test_flush_last_seen_resumes_interrupted_flush(self):
+        newer = self.last_seen + timedelta(hours=1)
+        activity.record_last_seen([self.users[0].id], newer)
+        self.redis.rename(activity.ActivityKeys.LAST_SEEN, activity.ActivityKeys.LAST_SEEN_FLUSHING)
+        activity.record_last_seen([self.users[1].id], newer)
+
+        self.assertEqual(activity.flush_last_seen(), 1)
+
+        self.assertEqual(self._get_last_seen(self.users[0]), newer)
+        self.assertEqual(self._get_buffered(self.users[1].id), newer)
+        self.assertEqual(activity.flush_last_seen(), 1)
+        self.assertEqual(self._get_last_seen(self.users[1]), newer)
+
+
+class PresenceTests(RedisTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user_id = User.objects.create_user(email='user@test.com', password='testpass').id
+        patcher = patch('users.presence.time')
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.time.time.return_value = 1_000_000.0
+
+    def _advance(self, seconds):
+        self.time.time.return_value += seconds
+
+    def test_multiple_tabs(self):
+        self.assertTrue(presence.connect(self.user_id, 'first'))
+        self.assertFalse(presence.connect(self.user_id, 'second'))
+
+        presence.disconnect(self.user_id, 'first')
+        self._advance(settings.PRESENCE_DISCONNECT_GRACE)
+        self.assertEqual(presence.sweep_expired_connections(), (1, []))
+        self.assertTrue(presence.is_online(self.user_id))
+
+        presence.disconnect(self.user_id, 'second')
+        self._advance(settings.PRESENCE_DISCONNECT_GRACE)
+        self.assertEqual(presence.sweep_expired_connections(), (1, [self.user_id]))
+        self.assertFalse(presence.is_online(self.user_id))
+        self.assertFalse(self.redis.hexists(presence.PresenceKeys.CONNECTION_COUNTS, str(self.user_id)))
+
+    def test_reconnect_within_grace(self):
+        presence.connect(self.user_id, 'first')
+        presence.disconnect(self.user_id, 'first')
+        self._advance(settings.PRESENCE_DISCONNECT_GRACE - 1)
+        self.assertEqual(presence.sweep_expired_connections(), (0, []))
+
+        self.assertFalse(presence.connect(self.user_id, 'second'))
+        self._advance(1)
+        self.assertEqual(presence.sweep_expired_connections(), (1, []))
+        self.assertTrue(presence.is_online(self.user_id))
+
+    def test_connection_expires_without_heartbeats(self):
+        presence.connect(self.user_id, 'first')
+        self._advance(settings.PRESENCE_TIMEOUT - 1)
+        presence.heartbeat(self.user_id, 'first')
+        self._advance(settings.PRESENCE_TIMEOUT - 1)
+        self.assertEqual(presence.sweep_expired_connections(), (0, []))
+
+        self._advance(1)
+        self.assertEqual(presence.sweep_expired_connections(), (1, [self.user_id]))
+        self.assertFalse(presence.is_online(self.user_id))
+
+    def test_heartbeat_after_sweep_reconnects(self):
+        presence.connect(self.user_id, 'first')
+        self._advance(settings.PRESENCE_TIMEOUT)
+        presence.sweep_expired_connections()
+
+        presence.heartbeat(self.user_id, 'first')
+        self.assertTrue(presence.is_online(self.user_id))
+
+    @patch.object(settings, 'PRESENCE_SWEEP_BATCH_SIZE', 1)
+    def test_sweep_presence(self):
+        other_user_id = User.objects.create_user(email='other@test.com', password='testpass').id
+        presence.connect(self.user_id, 'first')
+        presence.connect(other_user_id, 'first')
+        presence.connect(other_user_id, 'second')
+        presence.disconnect(self.user_id, 'first')
+        presence.disconnect(other_user_id, 'first')
+        self._advance(settings.PRESENCE_DISCONNECT_GRACE)
+
+        sweep_presence()
 
-# Create your tests here.
+        self.assertEqual(self.redis.zcard(presence.PresenceKeys.CONNECTIONS), 1)
+        self.assertEqual(presence.get_online_statuses([self.user_id, other_user_id]), {
+            self.user_id: False,
+            other_user_id: True,
+        })
+        buffered = self.redis.hgetall(activity.ActivityKeys.LAST_SEEN)
+        self.assertEqual(set(buffered), {str(self.user_id).encode()})
@@ -13,8 +13,13 @@ from .filters import UserFilter
 from .models import User
 from .paginators import UsersPagination
 from .permissions import IsAdminOrOwnerOrReadOnly
-from .serializers import ConfirmEmailSerializer, SendVerificationCodeSerializer, UserSerializer
-from .services import get_user_status
+from .serializers import (
+    ConfirmEmailSerializer,
+    SendVerificationCodeSerializer,
+    UserSerializer,
+    UserStatusesQuerySerializer
+)
+from .services import get_user_status, get_users_statuses
 from .throttling import VerificationCodeSendThrottle
 
 logger = logging.getLogger('__name__')
@@ -57,7 +62,7 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action == 'me':
             self.permission_classes = (IsAuthenticated, IsAdminOrOwnerOrReadOnly)
-        elif self.action == 'list':
+        elif self.action in ('list', 'statuses'):
             self.permission_classes = (IsAuthenticated, )
 
         return super().get_permissions()
@@ -85,3 +90,15 @@ class UserViewSet(viewsets.ModelViewSet):
     def status(self, request, *args, **kwargs):
         user = self.get_object()
         return Response(get_user_status(user), status=status.HTTP_200_OK)
+
+    @action(methods=['get'], detail=False)
+    def statuses(self, request, *args, **kwargs):
+        serializer = UserStatusesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        users = User.objects.filter(id__in=serializer.validated_data['ids']).only('id', 'last_seen')
+        statuses = get_users_statuses(users)
+        return Response(
+            [{'id': user_id, **user_status} for user_id, user_status in statuses.items()],
+            status=status.HTTP_200_OK
+        )
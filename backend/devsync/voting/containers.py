@@ -0,0 +1,24 @@
+from dependency_injector import containers, providers
+
+from notifications.services.services import NotificationContextService
+from voting.notifications.loaders import json_loader
+from voting.services import VotingNotificationService
+
+
+class VotingContainer(containers.DeclarativeContainer):
+    """Process-wide services of votings, so they are not rebuilt for every task."""
+
+    # Loaded templates are cached in the loader, so it is shared instead of being copied with the container
+    template_loader = providers.Object(json_loader)
+
+    notification_context_service = providers.ThreadSafeSingleton(NotificationContextService)
+
+    voting_ended_notification_service = providers.ThreadSafeSingleton(
+        VotingNotificationService,
+        'voting-ended',
+        template_loader,
+        notification_context_service
+    )
+
+
+container = VotingContainer()
@@ -0,0 +1,100 @@
+import csv
+import json
+from collections.abc import Callable, Iterator, Sequence
+from itertools import batched
+from typing import Any, Literal, TypeAlias
+
+from django.db import transaction
+from django.db.models import Count
+
+from config import settings
+from voting.models import Voting, VotingOption, VotingOptionChoice
+
+ExportFormat: TypeAlias = Literal['csv', 'ndjson']
+ExportData: TypeAlias = Literal['tallies', 'ballots']
+
+EXPORT_FORMATS: tuple[ExportFormat, ...] = ('csv', 'ndjson')
+EXPORT_DATA: tuple[ExportData, ...] = ('tallies', 'ballots')
+
+CONTENT_TYPES: dict[ExportFormat, str] = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+TALLY_FIELDS = ('option_id', 'body', 'votes_count')
+BALLOT_FIELDS = ('id', 'option_id', 'user_id', 'user_email')
+
+
+class _Echo:
+    """File-like object returning written values, used to format single CSV rows."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _iter_tallies(voting: Voting, chunk_size: int) -> Iterator[tuple[Any, ...]]:
+    return VotingOption.objects.filter(
+        voting=voting
+    ).annotate(
+        votes_count=Count('choices')
+    ).order_by('id').values_list(
+        'id', 'body', 'votes_count'
+    ).iterator(chunk_size=chunk_size)
+
+
+def _iter_ballots(voting: Voting, chunk_size: int) -> Iterator[tuple[Any, ...]]:
+    return VotingOptionChoice.objects.filter(
+        voting_option__voting=voting
+    ).order_by('id').values_list(
+        'id', 'voting_option_id', 'user_id', 'user__email'
+    ).iterator(chunk_size=chunk_size)
+
+
+def _csv_encoder(fields: Sequence[str]) -> tuple[str, Callable[[Sequence[Any]], str]]:
+    writer = csv.writer(_Echo())
+    return writer.writerow(fields), writer.writerow
+
+
+def _ndjson_encoder(fields: Sequence[str]) -> tuple[str, Callable[[Sequence[Any]], str]]:
+    def encode(row: Sequence[Any]) -> str:
+        return json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n'
+
+    return '', encode
+
+
+def export_voting(
+        voting: Voting,
+        data: ExportData,
+        export_format: ExportFormat,
+        chunk_size: int = settings.VOTING_EXPORT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Lazily export voting tallies or ballots as CSV or NDJSON.
+
+    Rows are read through a server-side cursor and written in chunks of
+    chunk_size rows, so memory usage doesn't depend on the number of ballots.
+    The cursor lives inside a transaction, as required by pgbouncer
+    transaction pooling.
+
+    Args:
+        voting: Voting to export
+        data: 'tallies' for per-option vote counts or 'ballots' for individual choices
+        export_format: 'csv' or 'ndjson'
+        chunk_size: Number of rows fetched from the cursor and yielded at once
+
+    Yields:
+        Encoded chunks of the export
+    """
+    if data == 'ballots':
+        fields, rows_getter = BALLOT_FIELDS, _iter_ballots
+    else:
+        fields, rows_getter = TALLY_FIELDS, _iter_tallies
+
+    encoder = _csv_encoder if export_format == 'csv' else _ndjson_encoder
+    header, encode = encoder(fields)
+    if header:
+        yield header
+
+    with transaction.atomic():
+        for rows in batched(rows_getter(voting, chunk_size), chunk_size):
+            yield ''.join(encode(row) for row in rows)
@@ -1,5 +1,6 @@
 import django_filters
-from voting.models import Voting
+from voting.models import Voting, VotingTag
+from voting.services import normalize_tag
 
 
 class VotingFilter(django_filters.FilterSet):
@@ -10,4 +11,5 @@ class VotingFilter(django_filters.FilterSet):
         fields = ['title', 'date_started', 'tag', 'status']
 
     def filter_by_tag(self, queryset, name, value):
-        return queryset.filter(tags__tag=value)
+        voting_ids = VotingTag.objects.filter(tag=normalize_tag(value)).values('voting_id')
+        return queryset.filter(id__in=voting_ids)
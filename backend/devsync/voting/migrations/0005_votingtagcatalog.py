@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2025-06-14 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_tag_catalog(apps, schema_editor):
+    VotingTag = apps.get_model('voting', 'VotingTag')
+    VotingTagCatalog = apps.get_model('voting', 'VotingTagCatalog')
+
+    usages = VotingTag.objects.values(
+        'voting__project_id', 'tag'
+    ).annotate(
+        usage_count=Count('id')
+    ).order_by()
+
+    VotingTagCatalog.objects.bulk_create(
+        [
+            VotingTagCatalog(
+                project_id=usage['voting__project_id'],
+                tag=usage['tag'],
+                usage_count=usage['usage_count'],
+            )
+            for usage in usages
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_task'),
+        ('voting', '0004_votingtag_voting_allow_multiple_alter_voting_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VotingTagCatalog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=150)),
+                ('usage_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['tag'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='votingtag',
+            index=models.Index(fields=['tag', 'voting'], name='voting_voti_tag_fdf399_idx'),
+        ),
+        migrations.AddField(
+            model_name='votingtagcatalog',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voting_tags', to='projects.project'),
+        ),
+        migrations.AddIndex(
+            model_name='votingtagcatalog',
+            index=models.Index(fields=['project', 'tag'], name='voting_tag_catalog_prefix_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='votingtagcatalog',
+            constraint=models.UniqueConstraint(fields=('project', 'tag'), name='unique_project_voting_tag'),
+        ),
+        migrations.RunPython(fill_tag_catalog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2025-06-15 10:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0005_votingtagcatalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VotingResults',
+            fields=[
+                ('voting', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='results', serialize=False, to='voting.voting')),
+                ('options', models.JSONField(default=list)),
+                ('votes_count', models.PositiveIntegerField(default=0)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2025-06-18 19:05
+
+from django.db import migrations
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def end_past_due_votings(apps, schema_editor):
+    """
+    Store votings ended by the old list view with the 'ended' status value and freeze their results.
+
+    The list view used to write 'ENDED', which doesn't match Voting.Status.ENDED, so without this
+    the first schedule_ending_votings run would close every past voting again and notify its members.
+    Past-due votings are closed here without notifications.
+    """
+    Voting = apps.get_model('voting', 'Voting')
+    VotingOption = apps.get_model('voting', 'VotingOption')
+    VotingResults = apps.get_model('voting', 'VotingResults')
+
+    Voting.objects.filter(
+        Q(status='ENDED') | Q(end_date__lte=timezone.now())
+    ).update(status='ended')
+
+    voting_ids = list(Voting.objects.filter(
+        status='ended',
+        results__isnull=True
+    ).values_list('id', flat=True))
+    for voting_id in voting_ids:
+        options = list(VotingOption.objects.filter(
+            voting_id=voting_id
+        ).annotate(
+            votes_count=Count('choices')
+        ).order_by('id').values('id', 'body', 'votes_count'))
+        VotingResults.objects.create(
+            voting_id=voting_id,
+            options=options,
+            votes_count=sum(option['votes_count'] for option in options)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0006_votingresults'),
+    ]
+
+    operations = [
+        migrations.RunPython(end_past_due_votings, migrations.RunPython.noop),
+    ]
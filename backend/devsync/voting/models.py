@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
 from projects.models import Project
 
@@ -37,6 +39,16 @@ class Voting(models.Model):
         return f"Voting: {self.title} (Status: {self.status})"
 
 
+class VotingResults(models.Model):
+    voting = models.OneToOneField(Voting, related_name='results', on_delete=models.CASCADE, primary_key=True)
+    options = models.JSONField(default=list)
+    votes_count = models.PositiveIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Results of voting {self.voting_id} ({self.votes_count} votes)"
+
+
 class VotingTag(models.Model):
     voting = models.ForeignKey(Voting, related_name='tags', on_delete=models.CASCADE)
     tag = models.CharField(max_length=150)
@@ -45,11 +57,36 @@ class VotingTag(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['voting', 'tag'], name='unique_voting_tag'),
         ]
+        indexes = [
+            models.Index(fields=['tag', 'voting']),
+        ]
 
     def __str__(self):
         return f"VotingTag: {self.tag}"
 
 
+class VotingTagCatalog(models.Model):
+    project = models.ForeignKey(Project, related_name='voting_tags', on_delete=models.CASCADE)
+    tag = models.CharField(max_length=150)
+    usage_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['tag']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'tag'], name='unique_project_voting_tag'),
+        ]
+        indexes = [
+            models.Index(
+                name='voting_tag_catalog_prefix_idx',
+                fields=['project', 'tag'],
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f"VotingTagCatalog: {self.tag} ({self.usage_count})"
+
+
 class VotingOption(models.Model):
     voting = models.ForeignKey(Voting, related_name='options', on_delete=models.CASCADE)
     body = models.CharField(max_length=250)
@@ -90,4 +127,14 @@ class VotingComment(models.Model):
         ]
 
     def __str__(self):
-        return f"Comment by {self.sender}: {self.body[:20]}..."
\ No newline at end of file
+        return f"Comment by {self.sender}: {self.body[:20]}..."
+
+
+@receiver(post_save, sender=Voting)
+def voting_updated(sender, instance, created, **kwargs):
+    if created or instance.status == Voting.Status.ENDED:
+        return
+
+    from voting.services import schedule_voting_end
+
+    schedule_voting_end(instance)
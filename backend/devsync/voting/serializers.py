@@ -5,7 +5,9 @@ from django.utils import timezone
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
-from voting.models import Voting, VotingOption, VotingOptionChoice, VotingComment, VotingTag
+from config import settings
+from voting.models import Voting, VotingOption, VotingOptionChoice, VotingComment, VotingTagCatalog
+from voting.services import normalize_tag, create_votings, get_voting_results
 
 from users.serializers import UserSerializer
 
@@ -19,6 +21,13 @@ class VotingTagSerializer(serializers.Serializer):
         fields = ['tag']
 
 
+class VotingTagCatalogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VotingTagCatalog
+        fields = ['tag', 'usage_count']
+        read_only_fields = ['tag', 'usage_count']
+
+
 class VotingOptionSerializer(serializers.ModelSerializer):
     body = serializers.CharField(max_length=250)
     votes_count = serializers.IntegerField(read_only=True)
@@ -73,7 +82,7 @@ class VotingOptionChoiceSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        voting = instance.voting_option.voting
+        voting = self.context.get('voting') or instance.voting_option.voting
 
         if voting.is_anonymous:
             representation.pop('user', None)
@@ -81,6 +90,11 @@ class VotingOptionChoiceSerializer(serializers.ModelSerializer):
         return representation
 
 
+class VotingOptionTallySerializer(serializers.Serializer):
+    voting_option = serializers.IntegerField(source='id', read_only=True)
+    votes_count = serializers.IntegerField(read_only=True)
+
+
 class VotingCommentSerializer(serializers.ModelSerializer):
     body = serializers.CharField(max_length=3000)
     sender = UserSerializer(read_only=True)
@@ -141,7 +155,7 @@ class VotingSerializer(serializers.ModelSerializer):
                 )
         if 'tags' in data:
             tags_data = data['tags']
-            tags = [tag['tag'].strip().lower() for tag in tags_data]
+            tags = [normalize_tag(tag['tag']) for tag in tags_data]
 
             if len(tags) != len(set(tags)):
                 raise serializers.ValidationError(
@@ -167,27 +181,16 @@ class VotingSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        options_data = validated_data.pop('options', [])
-        tags_data = validated_data.pop('tags', [])
-        voting = Voting.objects.create(**validated_data)
-
-        for option_data in options_data:
-            VotingOption.objects.create(voting=voting, **option_data)
-
-        for tag_data in tags_data:
-            VotingTag.objects.create(
-                voting=voting,
-                tag=tag_data['tag'].strip().lower()
-            )
-
-        return voting
+        return create_votings([validated_data])[0]
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
 
-        options = instance.options.annotate(
-            votes_count=Count('choices')
-        )
+        options = get_voting_results(instance)
+        if options is None:
+            options = instance.options.annotate(
+                votes_count=Count('choices')
+            )
 
         representation['options'] = VotingOptionSerializer(
             options,
@@ -200,3 +203,15 @@ class VotingSerializer(serializers.ModelSerializer):
         ).data
 
         return representation
+
+
+class VotingBulkImportSerializer(serializers.Serializer):
+    votings = VotingSerializer(many=True, allow_empty=False, max_length=settings.VOTING_BULK_IMPORT_MAX_SIZE)
+
+    def create(self, validated_data):
+        creator = validated_data['creator']
+        project = validated_data['project']
+        return create_votings(
+            {**voting_data, 'creator': creator, 'project': project}
+            for voting_data in validated_data['votings']
+        )
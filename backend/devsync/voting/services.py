@@ -0,0 +1,272 @@
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, QuerySet
+from django.utils import timezone
+
+from config import settings
+from notifications.models import Notification
+from notifications.services.action_building import TemplateActionsBuilder
+from notifications.services.factories import TemplateNotificationFactory
+from notifications.services.services import NotificationService, NotificationContextServiceBase
+from notifications.services.template_loading import NotificationTemplateLoader
+from voting.models import Voting, VotingOption, VotingTagCatalog, VotingTag, VotingResults
+
+
+class CacheKeys:
+    VOTING_RESULTS = "voting:{voting_pk}:results"
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
+def get_project_tags(project_id: int, prefix: Optional[str] = None) -> QuerySet[VotingTagCatalog]:
+    queryset = VotingTagCatalog.objects.filter(
+        project_id=project_id,
+        usage_count__gt=0
+    )
+    if prefix:
+        queryset = queryset.filter(tag__startswith=normalize_tag(prefix))
+    return queryset
+
+
+def register_tags(project_id: int, tags: Iterable[str]) -> None:
+    """Increase usage counters of project tags, adding missing tags to the catalog."""
+    usages = _count_tags(tags)
+    if not usages:
+        return
+
+    VotingTagCatalog.objects.bulk_create(
+        [VotingTagCatalog(project_id=project_id, tag=tag) for tag in usages],
+        ignore_conflicts=True
+    )
+    for count, count_tags in _group_by_count(usages).items():
+        VotingTagCatalog.objects.filter(
+            project_id=project_id,
+            tag__in=count_tags
+        ).update(usage_count=F('usage_count') + count)
+
+
+def unregister_tags(project_id: int, tags: Iterable[str]) -> None:
+    """Decrease usage counters of project tags, dropping tags that are no longer used."""
+    usages = _count_tags(tags)
+    if not usages:
+        return
+
+    catalog = VotingTagCatalog.objects.filter(project_id=project_id, tag__in=usages)
+    for count, count_tags in _group_by_count(usages).items():
+        catalog.filter(tag__in=count_tags, usage_count__lte=count).delete()
+        catalog.filter(tag__in=count_tags).update(usage_count=F('usage_count') - count)
+
+
+def _count_tags(tags: Iterable[str]) -> Counter[str]:
+    return Counter(normalize_tag(tag) for tag in tags)
+
+
+def _group_by_count(usages: Counter[str]) -> dict[int, list[str]]:
+    groups = defaultdict(list)
+    for tag, count in usages.items():
+        groups[count].append(tag)
+    return groups
+
+
+def get_voting_tags(voting_id: int) -> list[str]:
+    return list(VotingTag.objects.filter(voting_id=voting_id).values_list('tag', flat=True))
+
+
+@transaction.atomic
+def create_votings(votings_data: Iterable[dict[str, Any]]) -> list[Voting]:
+    """
+    Create votings together with their options and tags.
+
+    Options and tags of all votings are inserted with one bulk query each,
+    so the number of queries doesn't depend on the votings size.
+
+    Args:
+        votings_data: Validated voting data with nested 'options' and 'tags' lists
+
+    Returns:
+        List of created votings
+    """
+    votings = []
+    nested_data = []
+    for voting_data in votings_data:
+        voting_data = dict(voting_data)
+        nested_data.append((
+            voting_data.pop('options', []),
+            voting_data.pop('tags', []),
+        ))
+        votings.append(Voting(**voting_data))
+
+    Voting.objects.bulk_create(votings)
+
+    options = []
+    tags = []
+    project_tags = defaultdict(list)
+    for voting, (options_data, tags_data) in zip(votings, nested_data):
+        options.extend(
+            VotingOption(voting=voting, **option_data)
+            for option_data in options_data
+        )
+        for tag_data in tags_data:
+            tag = normalize_tag(tag_data['tag'])
+            tags.append(VotingTag(voting=voting, tag=tag))
+            project_tags[voting.project_id].append(tag)
+
+    VotingOption.objects.bulk_create(options)
+    VotingTag.objects.bulk_create(tags)
+    for project_id, project_tag_names in project_tags.items():
+        register_tags(project_id, project_tag_names)
+
+    for voting in votings:
+        schedule_voting_end(voting)
+
+    return votings
+
+
+def schedule_voting_end(voting: Voting) -> None:
+    """
+    Schedule an exact-time end of the voting once the current transaction commits.
+
+    Only votings ending within VOTING_END_SCHEDULE_HORIZON get an ETA task right away;
+    the rest are picked up by the periodic schedule_ending_votings task, so that
+    long ETA tasks are never held by workers or redelivered by the broker.
+    """
+    from voting.tasks import end_voting_task
+
+    if voting.end_date > timezone.now() + timedelta(seconds=settings.VOTING_END_SCHEDULE_HORIZON):
+        return
+
+    voting_id, end_date = voting.id, voting.end_date
+    transaction.on_commit(lambda: end_voting_task.apply_async(
+        (voting_id, end_date.isoformat()),
+        eta=end_date
+    ))
+
+
+def get_votings_ending_before(date: datetime) -> QuerySet[Voting]:
+    return Voting.objects.filter(
+        end_date__lte=date,
+        project__is_deleting=False
+    ).exclude(
+        status=Voting.Status.ENDED
+    )
+
+
+@transaction.atomic
+def end_voting(voting_id: int) -> Optional[VotingResults]:
+    """
+    Close the voting and freeze its tallies into an immutable results snapshot.
+
+    Safe to call several times and before the voting end date: only the first call
+    after the end date closes the voting.
+
+    Args:
+        voting_id: ID of the voting to close
+
+    Returns:
+        Created results snapshot or None if the voting was not closed by this call
+    """
+    is_ended = get_votings_ending_before(timezone.now()).filter(
+        id=voting_id
+    ).update(status=Voting.Status.ENDED)
+    if not is_ended:
+        return None
+
+    options = list(VotingOption.objects.filter(
+        voting_id=voting_id
+    ).annotate(
+        votes_count=Count('choices')
+    ).order_by('id').values('id', 'body', 'votes_count'))
+
+    results = VotingResults.objects.create(
+        voting_id=voting_id,
+        options=options,
+        votes_count=sum(option['votes_count'] for option in options)
+    )
+    transaction.on_commit(lambda: cache_voting_results(results))
+    return results
+
+
+def get_voting_results_key(voting_pk: int) -> str:
+    return CacheKeys.VOTING_RESULTS.format(voting_pk=voting_pk)
+
+
+def cache_voting_results(results: VotingResults) -> None:
+    cache_key = get_voting_results_key(results.voting_id)
+    cache.set(cache_key, results.options, settings.VOTING_RESULTS_CACHE_TIMEOUT)
+
+
+def get_voting_results(voting: Voting) -> Optional[list[dict[str, Any]]]:
+    """Return frozen per-option tallies of an ended voting or None if there are none."""
+    if voting.status != Voting.Status.ENDED:
+        return None
+
+    cache_key = get_voting_results_key(voting.id)
+    options = cache.get(cache_key)
+    if options is None:
+        results = VotingResults.objects.filter(voting_id=voting.id).first()
+        if results is None:
+            return None
+        cache_voting_results(results)
+        options = results.options
+    return options
+
+
+def get_voting_tallies(voting: Voting) -> list[dict[str, Any]]:
+    """
+    Return per-option vote counts of the voting without loading individual ballots.
+
+    Ended votings are served from the frozen results snapshot, others are
+    aggregated by the database with one query.
+    """
+    results = get_voting_results(voting)
+    if results is not None:
+        return results
+
+    return list(VotingOption.objects.filter(
+        voting_id=voting.id
+    ).annotate(
+        votes_count=Count('choices')
+    ).order_by('id').values('id', 'body', 'votes_count'))
+
+
+class VotingNotificationService(NotificationService[Voting]):
+    def __init__(
+            self,
+            template_name: str,
+            template_loader: NotificationTemplateLoader,
+            context_service: NotificationContextServiceBase
+    ):
+        template = template_loader.get_template(template_name)
+        super().__init__(template_loader, TemplateNotificationFactory(
+            template,
+            TemplateActionsBuilder(template)
+        ))
+        self._context_service = context_service
+
+    def create_notification(self, user: AbstractUser, voting: Voting, **kwargs) -> Notification:
+        context = {'voting': voting, 'project': voting.project}
+        notification = super().create_notification(user, voting, context)
+
+        self._context_service.create_context(notification, context)
+        return notification
+
+    @transaction.atomic
+    def create_notifications_bulk(
+            self,
+            users: Iterable[AbstractUser],
+            voting: Voting,
+            **kwargs
+    ) -> list[Notification]:
+        context = {'voting': voting, 'project': voting.project}
+        notifications = super().create_notifications_bulk(users, voting, context)
+
+        self._context_service.create_contexts(notifications, context)
+        return notifications
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from itertools import batched
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from config import settings
+
+User = get_user_model()
+
+
+@shared_task
+def end_voting_task(voting_id: int, end_date: str):
+    from voting.models import Voting
+    from voting.services import end_voting
+
+    # The voting was edited after the task had been scheduled, a newer task handles it
+    if not Voting.objects.filter(id=voting_id, end_date=datetime.fromisoformat(end_date)).exists():
+        return
+
+    if end_voting(voting_id) is not None:
+        notify_voting_ended.delay(voting_id)
+
+
+@shared_task
+def schedule_ending_votings():
+    from voting.services import get_votings_ending_before
+
+    horizon = timezone.now() + timedelta(seconds=settings.VOTING_END_SCHEDULE_HORIZON)
+    for voting_id, end_date in get_votings_ending_before(horizon).values_list('id', 'end_date'):
+        end_voting_task.apply_async((voting_id, end_date.isoformat()), eta=end_date)
+
+
+@shared_task
+def notify_voting_ended(voting_id: int):
+    from voting.containers import container
+    from voting.models import Voting
+
+    voting = Voting.objects.select_related('project').get(id=voting_id)
+    notification_service = container.voting_ended_notification_service()
+    members = User.objects.filter(
+        project_memberships__project_id=voting.project_id
+    ).only('id').order_by('id')
+    for users in batched(members, settings.NOTIFICATION_BULK_BATCH_SIZE):
+        notification_service.create_notifications_bulk(users, voting)
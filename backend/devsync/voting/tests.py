@@ -7,7 +7,10 @@ from unittest.mock import patch
 
 from projects.models import Project, ProjectMember
 from users.models import User
-from voting.models import Voting, VotingOption, VotingOptionChoice, VotingComment
+from notifications.models import Notification
+from voting.models import Voting, VotingOption, VotingOptionChoice, VotingComment, VotingTagCatalog
+from voting.services import end_voting
+from voting.tasks import end_voting_task
 
 
 class VotingTests(APITestCase):
@@ -131,6 +134,260 @@ class VotingTests(APITestCase):
     #     self.assertEqual(Voting.objects.count(), 1)
 
 
+class VotingTagTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.url = reverse('voting-list', kwargs={'project_pk': self.project.id})
+        self.tags_url = reverse('voting-tags', kwargs={'project_pk': self.project.id})
+        self.client.force_authenticate(user=self.user)
+
+    def _create_voting(self, *tags):
+        response = self.client.post(self.url, {
+            'title': 'Tagged Voting',
+            'body': 'Tagged voting description',
+            'end_date': (timezone.now() + timedelta(days=1)).isoformat(),
+            'options': [{'body': 'Option 1'}, {'body': 'Option 2'}],
+            'tags': [{'tag': tag} for tag in tags]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_tags_catalog_counts_usages(self):
+        self._create_voting('Backend', 'api')
+        self._create_voting('backend')
+
+        response = self.client.get(self.tags_url, {'with_counts': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'tag': 'api', 'usage_count': 1},
+            {'tag': 'backend', 'usage_count': 2},
+        ])
+
+    def test_tags_catalog_names(self):
+        self._create_voting('Backend', 'api')
+
+        response = self.client.get(self.tags_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, ['api', 'backend'])
+
+    def test_tags_prefix_autocomplete(self):
+        self._create_voting('backend', 'bugs', 'api')
+
+        response = self.client.get(self.tags_url, {'prefix': 'B'})
+        self.assertEqual(response.data, ['backend', 'bugs'])
+
+    def test_delete_voting_updates_catalog(self):
+        voting_id = self._create_voting('backend', 'api')
+        self._create_voting('backend')
+
+        url = reverse('voting-detail', kwargs={'project_pk': self.project.id, 'pk': voting_id})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        catalog = dict(VotingTagCatalog.objects.values_list('tag', 'usage_count'))
+        self.assertEqual(catalog, {'backend': 1})
+
+    def test_filter_by_tag(self):
+        voting_id = self._create_voting('backend')
+        self._create_voting('frontend')
+
+        response = self.client.get(self.url, {'tag': 'Backend'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([voting['id'] for voting in response.data['votings']], [voting_id])
+
+
+class VotingBulkImportTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.url = reverse('voting-bulk', kwargs={'project_pk': self.project.id})
+        self.client.force_authenticate(user=self.user)
+
+    def _voting_data(self, title, *tags):
+        return {
+            'title': title,
+            'body': 'Imported voting',
+            'end_date': (timezone.now() + timedelta(days=1)).isoformat(),
+            'options': [{'body': 'Yes'}, {'body': 'No'}, {'body': 'Abstain'}],
+            'tags': [{'tag': tag} for tag in tags]
+        }
+
+    def test_bulk_import(self):
+        data = {'votings': [
+            self._voting_data('First', 'sprint'),
+            self._voting_data('Second', 'sprint', 'release'),
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['votings']), 2)
+        self.assertEqual(Voting.objects.filter(project=self.project, creator=self.user).count(), 2)
+        self.assertEqual(VotingOption.objects.filter(voting__project=self.project).count(), 6)
+        self.assertEqual(
+            dict(VotingTagCatalog.objects.values_list('tag', 'usage_count')),
+            {'sprint': 2, 'release': 1}
+        )
+
+    def test_bulk_import_rejects_invalid_voting(self):
+        invalid_voting = self._voting_data('Invalid')
+        invalid_voting['options'] = [{'body': 'Single Option'}]
+        data = {'votings': [self._voting_data('Valid'), invalid_voting]}
+
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Voting.objects.count(), 0)
+
+
+class VotingExportTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.voting = Voting.objects.create(
+            title='Test Voting',
+            body='Test description',
+            creator=self.user,
+            project=self.project,
+            end_date=timezone.now() + timedelta(days=1)
+        )
+        self.option = VotingOption.objects.create(voting=self.voting, body='Yes')
+        VotingOption.objects.create(voting=self.voting, body='No')
+        VotingOptionChoice.objects.create(voting_option=self.option, user=self.user)
+        self.url = reverse('voting-export', kwargs={
+            'project_pk': self.project.id,
+            'pk': self.voting.id
+        })
+        self.client.force_authenticate(user=self.user)
+
+    def _get_content(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_tallies_csv(self):
+        content = self._get_content()
+        self.assertEqual(content.splitlines(), [
+            'option_id,body,votes_count',
+            f'{self.option.id},Yes,1',
+            f'{self.option.id + 1},No,0',
+        ])
+
+    def test_export_ballots_ndjson(self):
+        content = self._get_content(data='ballots', export_format='ndjson')
+        self.assertIn('"user_email": "user@test.com"', content)
+        self.assertEqual(len(content.splitlines()), 1)
+
+    def test_export_ballots_anonymous_voting(self):
+        self.voting.is_anonymous = True
+        self.voting.save()
+        response = self.client.get(self.url, {'data': 'ballots'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_by_creator_without_manage_permission(self):
+        creator = User.objects.create_user(email='creator@test.com', password='testpass')
+        ProjectMember.objects.create(project=self.project, user=creator)
+        self.voting.creator = creator
+        self.voting.save()
+        self.client.force_authenticate(user=creator)
+
+        content = self._get_content()
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_export_by_member_without_manage_permission(self):
+        member = User.objects.create_user(email='member@test.com', password='testpass')
+        ProjectMember.objects.create(project=self.project, user=member)
+        self.client.force_authenticate(user=member)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class VotingLifecycleTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='user@test.com',
+            password='testpass'
+        )
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        ProjectMember.objects.get_or_create(project=self.project, user=self.user)
+        self.voting = Voting.objects.create(
+            title='Test Voting',
+            body='Test description',
+            creator=self.user,
+            project=self.project,
+            end_date=timezone.now() + timedelta(days=1)
+        )
+        self.option = VotingOption.objects.create(voting=self.voting, body='Yes')
+        VotingOptionChoice.objects.create(voting_option=self.option, user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def _expire(self):
+        Voting.objects.filter(id=self.voting.id).update(end_date=timezone.now() - timedelta(minutes=1))
+        self.voting.refresh_from_db()
+
+    def test_end_voting_before_end_date(self):
+        self.assertIsNone(end_voting(self.voting.id))
+        self.voting.refresh_from_db()
+        self.assertNotEqual(self.voting.status, Voting.Status.ENDED)
+
+    def test_end_voting_freezes_results(self):
+        self._expire()
+        results = end_voting(self.voting.id)
+
+        self.assertEqual(results.votes_count, 1)
+        self.assertIsNone(end_voting(self.voting.id))
+
+        other_user = User.objects.create_user(email='other@test.com', password='testpass')
+        VotingOptionChoice.objects.create(voting_option=self.option, user=other_user)
+        url = reverse('voting-option-list', kwargs={
+            'project_pk': self.project.id,
+            'voting_pk': self.voting.id
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['votes_count'], 1)
+
+    def test_end_voting_task_notifies_members(self):
+        self._expire()
+        end_voting_task(self.voting.id, self.voting.end_date.isoformat())
+
+        self.voting.refresh_from_db()
+        self.assertEqual(self.voting.status, Voting.Status.ENDED)
+        self.assertTrue(Notification.objects.filter(user=self.user, object_id=self.voting.id).exists())
+
+    def test_end_voting_task_with_outdated_end_date(self):
+        end_date = self.voting.end_date
+        self._expire()
+        end_voting_task(self.voting.id, end_date.isoformat())
+
+        self.voting.refresh_from_db()
+        self.assertNotEqual(self.voting.status, Voting.Status.ENDED)
+
+
 class VotingOptionTests(APITestCase):
     def setUp(self):
         self.client = APIClient()
@@ -227,6 +484,17 @@ class VotingOptionChoiceTests(APITestCase):
         self.assertEqual(VotingOptionChoice.objects.count(), 1)
         self.assertNotIn('user', response.data)
 
+    def test_list_choices_anonymous_voting(self):
+        self.voting.is_anonymous = True
+        self.voting.save()
+        VotingOptionChoice.objects.create(voting_option=self.option, user=self.user)
+        VotingOptionChoice.objects.create(voting_option=self.option, user=self.other_user)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'voting_option': self.option.id, 'votes_count': 2}])
+
     def test_double_vote(self):
         self.client.force_authenticate(user=self.user)
         response = self.client.post(self.url, self.choice_data, format='json')
@@ -1,19 +1,22 @@
-from django.db.models import Count, Q
-from django.utils.timezone import now
+from django.db import transaction
+from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters
+from rest_framework import filters, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 
+from config.utils.streaming import streaming_response
+from config.utils.utils import parse_bool
 from projects.views import ProjectBasedModelViewSet
 from roles.services.checkers import CreatorBypassChecker, source_path
 from roles.services.enum import PermissionsEnum
 from roles.services.permissions import require_permissions
+from voting.exports import export_voting, EXPORT_DATA, EXPORT_FORMATS, CONTENT_TYPES
 from voting.filters import VotingFilter
-from voting.models import Voting, VotingOption, VotingOptionChoice, VotingComment, VotingTag
+from voting.models import Voting, VotingOption, VotingOptionChoice, VotingComment
 from voting.paginators import PublicVotingPagination
 from voting.renderers import VotingListRenderer, VotingOptionChoiceListRenderer, \
     VotingCommentListRenderer
@@ -21,8 +24,13 @@ from voting.serializers import (
     VotingSerializer,
     VotingCommentSerializer,
     VotingOptionChoiceSerializer,
-    VotingOptionSerializer
+    VotingOptionSerializer,
+    VotingOptionTallySerializer,
+    VotingTagCatalogSerializer,
+    VotingBulkImportSerializer
 )
+from voting.services import get_project_tags, get_voting_tags, unregister_tags, get_voting_results, \
+    get_voting_tallies
 
 
 class VotingViewSet(ProjectBasedModelViewSet):
@@ -37,10 +45,52 @@ class VotingViewSet(ProjectBasedModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='tags')
     def tags(self, request, project_pk=None):
-        tags = VotingTag.objects.filter(
-            voting__project__id=project_pk
-        ).values_list('tag', flat=True).distinct().order_by('tag')
-        return Response(tags)
+        tags = get_project_tags(self.project.id, request.query_params.get('prefix'))
+        if parse_bool(request.query_params.get('with_counts', '')):
+            return Response(VotingTagCatalogSerializer(tags, many=True).data)
+        # Plain tag names are kept by default for existing clients
+        return Response(list(tags.values_list('tag', flat=True)))
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @require_permissions(PermissionsEnum.VOTING_MANAGE, PermissionsEnum.VOTING_CREATE)
+    def bulk(self, request, project_pk=None):
+        serializer = VotingBulkImportSerializer(
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        votings = serializer.save(creator=self.request.user, project=self.project)
+        return Response(
+            {'votings': [voting.id for voting in votings]},
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=['get'], url_path='export')
+    def export(self, request, project_pk=None, pk=None):
+        return self.perform_export(self.get_object())
+
+    @require_permissions(
+        PermissionsEnum.VOTING_MANAGE,
+        checkers=[CreatorBypassChecker(source_path('creator.id'))]
+    )
+    def perform_export(self, voting):
+        request = self.request
+        data = request.query_params.get('data', 'tallies')
+        export_format = request.query_params.get('export_format', 'csv')
+
+        if data not in EXPORT_DATA:
+            raise ValidationError({'data': f"Expected one of: {', '.join(EXPORT_DATA)}."})
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'export_format': f"Expected one of: {', '.join(EXPORT_FORMATS)}."})
+        if data == 'ballots' and voting.is_anonymous:
+            raise ValidationError({'data': 'Ballots of anonymous voting can not be exported.'})
+
+        return streaming_response(
+            request,
+            export_voting(voting, data, export_format),
+            content_type=CONTENT_TYPES[export_format],
+            filename=f'voting_{voting.id}_{data}.{export_format}'
+        )
 
     def get_permissions(self):
         permissions = super().get_permissions()
@@ -55,10 +105,6 @@ class VotingViewSet(ProjectBasedModelViewSet):
         ).annotate(
             options_count=Count('options')
         )
-
-        queryset.filter(
-            Q(end_date__lt=now()) & ~Q(status='ENDED')
-        ).update(status='ENDED')
         return queryset
 
     @require_permissions(PermissionsEnum.VOTING_MANAGE, PermissionsEnum.VOTING_CREATE)
@@ -70,7 +116,9 @@ class VotingViewSet(ProjectBasedModelViewSet):
         PermissionsEnum.VOTING_MANAGE,
         checkers=[CreatorBypassChecker(source_path('creator.id'))]
     )
+    @transaction.atomic
     def perform_destroy(self, instance):
+        unregister_tags(instance.project_id, get_voting_tags(instance.id))
         return super().perform_destroy(instance)
 
     def get_serializer_context(self):
@@ -80,15 +128,18 @@ class VotingViewSet(ProjectBasedModelViewSet):
 
 
 class VotingBasedViewSet(ProjectBasedModelViewSet):
+    _voting: Voting | None = None
+
     def get_permissions(self):
         permissions = super().get_permissions()
         return permissions
 
     def get_voting(self):
-        voting_id = self.kwargs.get('voting_pk')
-        voting = get_object_or_404(Voting, pk=voting_id)
+        if self._voting is None:
+            voting_id = self.kwargs.get('voting_pk')
+            self._voting = get_object_or_404(Voting, pk=voting_id)
 
-        return voting
+        return self._voting
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -107,6 +158,12 @@ class VotingOptionViewSet(VotingBasedViewSet):
     def get_queryset(self):
         return super().get_queryset().filter(voting=self.get_voting())
 
+    def list(self, request, *args, **kwargs):
+        results = get_voting_results(self.get_voting())
+        if results is not None:
+            return Response(VotingOptionSerializer(results, many=True).data)
+        return super().list(request, *args, **kwargs)
+
 
 class VotingOptionChoiceViewSet(VotingBasedViewSet):
     serializer_class = VotingOptionChoiceSerializer
@@ -121,18 +178,23 @@ class VotingOptionChoiceViewSet(VotingBasedViewSet):
         voting = self.get_voting()
         queryset = VotingOptionChoice.objects.filter(voting_option__voting=voting)
 
-        if voting.is_anonymous:
-            queryset = queryset.select_related('voting_option').defer('user')
-        else:
-            queryset = queryset.select_related("voting_option", "user")
+        if not voting.is_anonymous:
+            queryset = queryset.select_related("user")
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        voting = self.get_voting()
+        if voting.is_anonymous:
+            tallies = get_voting_tallies(voting)
+            return Response(VotingOptionTallySerializer(tallies, many=True).data)
+        return super().list(request, *args, **kwargs)
+
     @require_permissions(PermissionsEnum.VOTING_VOTE)
     def perform_create(self, serializer):
         voting = self.get_voting()
 
-        if voting.status == 'ENDED':
+        if voting.status == Voting.Status.ENDED:
             raise ValidationError("Voting is ended")
 
         serializer.save(user=self.request.user)
@@ -141,6 +203,9 @@ class VotingOptionChoiceViewSet(VotingBasedViewSet):
         checkers=[CreatorBypassChecker(source_path('user.id'))]
     )
     def perform_destroy(self, instance):
+        if self.get_voting().status == Voting.Status.ENDED:
+            raise ValidationError("Voting is ended")
+
         return super().perform_destroy(instance)
 
 